@@ -0,0 +1,148 @@
+# Scrapy and Twister libs
+from scrapy.exceptions import NotConfigured
+
+# Project libs
+from crawlers.constants import *
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Downloader middleware adjusting the concurrency and the delay of each
+    download slot (domain) to the behaviour of its server:
+
+    - when a 429/503 response or a download error is received, concurrency
+      is halved and the delay doubled (or set to the Retry-After header);
+    - when the average latency grows well above the fastest latency seen,
+      concurrency is decreased by one;
+    - otherwise, after a round of successful responses (as many as the
+      current concurrency), concurrency is increased by one and the delay
+      reduced.
+
+    Values stay between the configured bounds. The current values of each
+    domain are available in get_domains and in the crawler stats, under
+    adaptive_concurrency/<domain>/.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+
+        self.min_concurrency = max(settings.getint(
+            "ADAPTIVE_CONCURRENCY_MIN", ADAPTIVE_MIN_CONCURRENCY), 1)
+        self.max_concurrency = max(settings.getint(
+            "ADAPTIVE_CONCURRENCY_MAX", ADAPTIVE_MAX_CONCURRENCY),
+            self.min_concurrency)
+        self.min_delay = settings.getfloat("DOWNLOAD_DELAY", 0)
+        self.max_delay = settings.getfloat(
+            "ADAPTIVE_CONCURRENCY_MAX_DELAY", ADAPTIVE_MAX_DELAY)
+
+        self.domains = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ADAPTIVE_CONCURRENCY_ENABLED"):
+            raise NotConfigured
+        return cls(crawler)
+
+    def get_slot(self, request):
+        key = request.meta.get("download_slot")
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+    def get_state(self, key, slot) -> dict:
+        """Returns the state of the domain, starting at the lower bound."""
+        if key not in self.domains:
+            slot.concurrency = self.min_concurrency
+            slot.delay = max(slot.delay, self.min_delay)
+            self.domains[key] = {
+                "concurrency": slot.concurrency,
+                "delay": slot.delay,
+                "latency": None,
+                "min_latency": None,
+                "responses": 0,
+                "errors": 0,
+                "throttled": 0,
+                "successes": 0,
+            }
+        return self.domains[key]
+
+    def get_domains(self) -> dict:
+        """Returns the current values of each domain."""
+        return {key: dict(state) for key, state in self.domains.items()}
+
+    def retry_after(self, response) -> float:
+        """Returns the seconds in the Retry-After header, 0 if absent."""
+        value = response.headers.get("Retry-After", b"").decode()
+        try:
+            return float(value)
+        except ValueError:
+            # Missing, or an HTTP date
+            return 0
+
+    def back_off(self, slot, state: dict, wait: float = 0):
+        slot.concurrency = max(self.min_concurrency, slot.concurrency // 2)
+        delay = max(slot.delay * 2, wait, ADAPTIVE_BACKOFF_DELAY)
+        slot.delay = min(self.max_delay, max(self.min_delay, delay))
+        state["successes"] = 0
+
+    def adapt_to_latency(self, slot, state: dict, latency: float):
+        if state["latency"] is None:
+            state["latency"] = latency
+        else:
+            state["latency"] = (1 - ADAPTIVE_LATENCY_WEIGHT) * state["latency"]\
+                + ADAPTIVE_LATENCY_WEIGHT * latency
+        if state["min_latency"] is None or latency < state["min_latency"]:
+            state["min_latency"] = latency
+
+        # Small variations of fast servers are ignored
+        slow_latency = max(ADAPTIVE_LATENCY_TOLERANCE * state["min_latency"],
+                           state["min_latency"] + ADAPTIVE_LATENCY_SLACK)
+        if state["latency"] > slow_latency:
+            # The server is getting slower, ease off
+            slot.concurrency = max(self.min_concurrency, slot.concurrency - 1)
+            state["successes"] = 0
+            return
+
+        state["successes"] += 1
+        if state["successes"] >= slot.concurrency:
+            slot.concurrency = min(self.max_concurrency, slot.concurrency + 1)
+            slot.delay = max(self.min_delay, slot.delay * ADAPTIVE_DELAY_DECAY)
+            state["successes"] = 0
+
+    def publish(self, key, slot, state: dict):
+        state["concurrency"] = slot.concurrency
+        state["delay"] = slot.delay
+
+        stats = self.crawler.stats
+        for name in ["concurrency", "delay", "latency", "errors", "throttled"]:
+            stats.set_value(f"adaptive_concurrency/{key}/{name}", state[name])
+
+    def process_response(self, request, response, spider):
+        key, slot = self.get_slot(request)
+        if slot is None:
+            return response
+
+        state = self.get_state(key, slot)
+        state["responses"] += 1
+
+        if response.status in ADAPTIVE_THROTTLE_STATUS:
+            state["throttled"] += 1
+            self.back_off(slot, state, self.retry_after(response))
+        else:
+            latency = request.meta.get("download_latency")
+            if latency is not None:
+                self.adapt_to_latency(slot, state, latency)
+
+        self.publish(key, slot, state)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        key, slot = self.get_slot(request)
+        if slot is None:
+            return None
+
+        state = self.get_state(key, slot)
+        state["errors"] += 1
+        self.back_off(slot, state)
+
+        self.publish(key, slot, state)
+        return None
@@ -1,104 +1,190 @@
 import json
+import queue
 
-# Only needed for the fix before kafka and sc integrations.
-# Remove and these are done.
-import time
-import os
-import shutil
-import random
+from kafka import KafkaConsumer, KafkaProducer
+
+# Project libs
+from crawlers.constants import *
+
+# Control message used to signal sources that they should stop
+STOP_MESSAGE = {"__stop_source__": True}
 
 
 class BaseMessenger:
-    @staticmethod
-    def feed(address, content):
+    """
+    Transport of json serializable messages between processes. Child classes
+    implement feed, flush and source.
+    """
+
+    def feed(self, content):
         """
-        Feeder "gambiarra"
-        Must be replaced by a kafka producer when integrations with Kafka and
-        SC are complete.
+        Sends a message.
 
         Keyword arguments:
-        address -- str, address to folder that must contain the file
         content -- any, json serializable
         """
-        name = int(random.random() * 100000)
-        fname = f"{address}/{name}.json"
+        raise NotImplementedError
 
-        with open(fname, "w+") as f:
-            f.write(json.dumps(content))
+    def flush(self):
+        """Blocks until every message fed was delivered to the transport."""
+        raise NotImplementedError
 
-    @staticmethod
-    def stop_source(address):
+    def source(self, max_batch: int = SOURCE_MAX_BATCH, timeout: float = SOURCE_TIMEOUT,
+               auto_commit=True, testing=False):
         """
-        Signals that the source should stop checking for new descriptions.
-        
+        Yields lists of received messages, with up to max_batch messages
+        each. An empty list is yielded when no message arrives within timeout,
+        so the caller can run periodic work. Stops when the control message
+        sent by stop_source is received.
+
         Keyword arguments:
-        address -- str, address to folder that contains flags.json file
+        max_batch -- int, maximum number of messages in a batch
+        timeout -- float, seconds to wait for messages before polling again
+        auto_commit -- bool, acknowledge each batch once the caller asks for
+        the next one. If False, the caller must call commit after persisting
+        the messages, and close_source when done. (default True)
+        testing -- do not use this argument. It is used to stop the source
+        when no message arrives within timeout during tests. (default False)
         """
-        with open(address + "/flags.json", "w") as f:
-            f.write(json.dumps({"stop": True}))
+        raise NotImplementedError
+
+    def commit(self):
+        """Acknowledges every message yielded by the source so far."""
+        pass
 
-    @staticmethod
-    def source(address, testing=False):
+    def close_source(self):
+        """Releases the resources of a source used without auto_commit."""
+        pass
+
+    def stop_source(self):
+        """Signals that the source should stop checking for new messages."""
+        self.feed(STOP_MESSAGE)
+        self.flush()
+
+
+class KafkaMessenger(BaseMessenger):
+    """
+    Messenger backed by a Kafka topic. Messages are batched by the producer,
+    and the consumer only commits offsets after a batch was processed, so a
+    message is never lost if the consumer dies in the middle of a batch.
+    """
+
+    def __init__(self, topic: str, bootstrap_servers=KAFKA_HOSTS,
+                 group_id: str = None):
         """
-        Download source 'gambiarra'.
-        Must be replaced by a kafka listener when integrations with Kafka and
-        SC are complete.
-        
         Keyword arguments:
-        address -- str, address to folder that will contain new items
-        testing -- do not use this argument. It is used to stop process if any
-        error occurs during tests. (default False)
+        topic -- str, Kafka topic used to transport messages
+        bootstrap_servers -- list of Kafka brokers
+        group_id -- str, consumer group of the source (default: topic name)
         """
-        # Create essential files and folder
+        self.topic = topic
+        self.bootstrap_servers = bootstrap_servers
+        self.group_id = group_id if group_id is not None else topic
+
+        # Created on first use, so each process gets its own connections
+        self.producer = None
+        self.consumer = None
+
+    def get_producer(self) -> KafkaProducer:
+        if self.producer is None:
+            self.producer = KafkaProducer(
+                bootstrap_servers=self.bootstrap_servers,
+                value_serializer=lambda m: json.dumps(m).encode("utf-8"),
+                acks="all",
+                retries=5,
+                linger_ms=KAFKA_LINGER_MS,
+            )
+        return self.producer
+
+    def feed(self, content):
+        self.get_producer().send(self.topic, content)
+
+    def flush(self):
+        if self.producer is not None:
+            self.producer.flush()
+
+    def commit(self):
+        if self.consumer is not None:
+            self.consumer.commit()
+
+    def close_source(self):
+        if self.consumer is not None:
+            self.consumer.close(autocommit=False)
+            self.consumer = None
+
+    def source(self, max_batch: int = SOURCE_MAX_BATCH, timeout: float = SOURCE_TIMEOUT,
+               auto_commit=True, testing=False):
+        self.consumer = KafkaConsumer(
+            self.topic,
+            bootstrap_servers=self.bootstrap_servers,
+            group_id=self.group_id,
+            enable_auto_commit=False,
+            auto_offset_reset="earliest",
+            value_deserializer=lambda m: json.loads(m.decode("utf-8")),
+        )
+
         try:
-            shutil.rmtree(address)
-        except FileNotFoundError:
-            pass
-        os.mkdir(address)
+            stop = False
+            while not stop:
+                records = self.consumer.poll(timeout_ms=int(timeout * 1000),
+                                        max_records=max_batch)
+
+                batch = []
+                for partition_records in records.values():
+                    for record in partition_records:
+                        if record.value == STOP_MESSAGE:
+                            stop = True
+                            continue
+                        batch.append(record.value)
+
+                if len(batch) == 0 and testing:
+                    break
+                yield batch
+
+                # Only acknowledge the batch after it was processed
+                if auto_commit:
+                    self.commit()
+
+        finally:
+            if auto_commit:
+                self.close_source()
+
+        print("Sinalized to stop.")
+
 
-        flag_file = address + "/flags.json"
-        with open(flag_file, "w") as f:
-            f.write(json.dumps({"stop": False}))
+class LocalMessenger(BaseMessenger):
+    """
+    Messenger backed by an in-process queue. Useful for tests and for running
+    producers and the source in the same process.
+    """
 
-        # Check for new files every 10 seconds
-        # files are only yielded after they appeared in two checks
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def feed(self, content):
+        self.queue.put(content)
+
+    def flush(self):
+        pass
+
+    def source(self, max_batch: int = SOURCE_MAX_BATCH, timeout: float = SOURCE_TIMEOUT,
+               auto_commit=True, testing=False):
         stop = False
-        file_check = {}
-        count = 5
         while not stop:
-            if testing:
-                count -= 1
-                if count == 0:
-                    break
-
-            new_files = os.listdir(address)
-            print(new_files)
-            to_yield = []
-            for f in new_files:
-                if f == "flags.json":
-                    continue
-
-                # print(f"Found file {f}")
-
-                if f not in file_check:
-                    file_check[f] = 0
-                else:
-                    to_yield.append(f)
-
-            for f in to_yield:
-                name = address + "/" + f
-                content = open(name, "r").read()
-                print("Yielding file", f, ", content:", content)
-                yield content
-
-                del file_check[f]
-                os.remove(name)
-
-            time.sleep(5)
-            with open(flag_file, "r") as f:
-                flags = json.loads(f.read())
-                stop = flags["stop"]
-                if stop:
-                    print("Sinalized to stop.")
-
-        shutil.rmtree(address)
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+                while len(batch) < max_batch:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if STOP_MESSAGE in batch:
+                stop = True
+                batch = [m for m in batch if m != STOP_MESSAGE]
+
+            if len(batch) == 0 and testing:
+                break
+            yield batch
+
+        print("Sinalized to stop.")
@@ -7,34 +7,54 @@ from twisted.internet.error import TimeoutError
 
 # Other external libs
 import datetime
+import hashlib
 import json
 import itertools
 import logging
 import os
 import re
-import pandas
 import time
+import lxml.html
 from lxml.html.clean import Cleaner
 import urllib.parse as urlparse
 import mimetypes
-import requests
 import string
 
 # Project libs
 import crawling_utils
 
-from binary import Extractor
 from crawlers.constants import *
+from crawlers.content_store import ContentStore
+from crawlers.extraction_pool import ExtractionPool, extract_binary_tables,\
+    extract_html_content
 from crawlers.file_descriptor import FileDescriptor
-from entry_probing import BinaryFormatProbingResponse, HTTPProbingRequest,\
+from crawlers.incremental import ValidatorStore
+from crawlers.large_file_downloader import LargeFileDownloader
+from crawlers.seen_urls import create_seen_urls, url_key
+from entry_probing import AsyncHTTPProbingRequest,\
+    BinaryFormatProbingResponse, HTTPProbingRequest,\
     HTTPStatusProbingResponse, TextMatchProbingResponse,\
-    EntryProbing
+    EntryProbing, ResponseData, MemoryProbeCache, DiskProbeCache
 from param_injector import ParamInjector
 from range_inference import RangeInference
-import parsing_html
 
 PUNCTUATIONS = "[{}]".format(string.punctuation)
 
+
+def lazy_product(*iterables):
+    """
+    Same as itertools.product, but the first iterable is consumed as the
+    combinations are generated, instead of being loaded into memory.
+    """
+    if len(iterables) == 0:
+        yield ()
+        return
+
+    others = [tuple(it) for it in iterables[1:]]
+    for first in iterables[0]:
+        for combination in itertools.product(*others):
+            yield (first,) + combination
+
 class BaseSpider(scrapy.Spider):
     name = 'base_spider'
 
@@ -47,6 +67,8 @@ class BaseSpider(scrapy.Spider):
 
         print("At BaseSpider.init")
         self.stop_flag = False
+        self.stop_flag_mtime = None
+        self.last_stop_check = -STOP_CHECK_INTERVAL
 
         self.data_folder = f"{config['data_path']}/data/"
         self.flag_folder = f"{config['data_path']}/flags/"
@@ -73,6 +95,98 @@ class BaseSpider(scrapy.Spider):
 
         self.get_format = lambda i: str(i).split("/")[1][:-1].split(";")[0]
 
+        # Pages are stored as downloaded when cleaning is disabled
+        self.clean_html = config.get("clean_html", True)
+        self.html_cleaner = Cleaner(
+            style=True, links=False, scripts=True,
+            comments=True, page_structure=False
+        )
+
+        # Initial requests in flight, see next_initial_requests
+        self.initial_requests = None
+        self.initial_lookahead = config.get(
+            "initial_requests_lookahead", INITIAL_REQUESTS_LOOKAHEAD)
+        self.pending_initial = set()
+        self.next_initial_index = 0
+        self.finished_initial = 0
+        self.probe = None
+
+        # In distributed mode, the first worker generates the initial
+        # requests, and any worker may process their responses
+        self.distributed = bool(config.get("distributed_workers"))
+        self.worker_index = config.get("worker_index", 0)
+
+        # Algorithm used to name stored pages and files
+        self.hash_algorithm = config.get("hash_algorithm") or HASH_ALGORITHM
+
+        # Table extraction runs in worker processes
+        self.extraction_pool = ExtractionPool(
+            workers=config.get("extraction_workers", EXTRACTION_WORKERS),
+            timeout=config.get("extraction_timeout", EXTRACTION_TIMEOUT)
+        )
+
+        # Files are stored once per distinct content, across instances
+        self.content_store = ContentStore(
+            self.data_folder, config["instance_id"], self.hash_algorithm)
+
+        # URLs already requested, probed or downloaded by the instance. The
+        # workers of a distributed instance may share the data path, so each
+        # one keeps its own store (the shared dupefilter is in Redis)
+        seen_urls_path = f"{config['data_path']}/{JOB_FOLDER}/{config['instance_id']}/seen_urls"
+        if self.distributed:
+            seen_urls_path = f"{seen_urls_path}_{self.worker_index}"
+        self.seen_urls = create_seen_urls(
+            config.get("seen_urls_store") or SEEN_URLS_STORE, seen_urls_path)
+
+        # Validators of stored content, sent back in incremental crawls
+        self.validators = None
+        conditional_headers = None
+        if config.get("incremental_crawl"):
+            self.validators = ValidatorStore(
+                f"{self.data_folder}{VALIDATORS_FILE}")
+            conditional_headers = self.validators.conditional_headers
+
+        # Large files are transferred in background threads
+        self.large_file_downloader = LargeFileDownloader(
+            resolve_destination=self.resolve_large_file_destination,
+            on_complete=self.store_large_file_content,
+            conditional_headers=conditional_headers,
+            on_unchanged=self.store_unchanged,
+            delay=config.get("antiblock_download_delay")
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.initial_request_dropped,
+                                signal=scrapy.signals.request_dropped)
+        return spider
+
+    def closed(self, reason):
+        """
+        Waits for pending large file downloads and extractions before
+        finishing. If the spider was stopped before completing the crawl,
+        queued large files are discarded and their transfers cancelled
+        instead (partial files are resumed by the next run).
+        """
+        self.large_file_downloader.close(wait=reason == "finished")
+        self.extraction_pool.close(wait=True)
+        self.content_store.close()
+        print(f"Seen URLs: {len(self.seen_urls)},",
+              f"memory: {self.seen_urls.memory_usage()} bytes")
+        self.seen_urls.close()
+        if self.probe is not None:
+            self.probe.close()
+            if self.probe.cache is not None:
+                self.report_probe_cache()
+                print(f"Probe cache: {self.probe.cache.stats}")
+                self.probe.cache.close()
+        if self.validators is not None:
+            self.validators.close()
+        if self.initial_requests is not None and not self.distributed:
+            self.save_cursor()
+        FileDescriptor.flush_descriptions()
+
     def start_requests(self):
         """
         Should be implemented by child class.
@@ -87,11 +201,29 @@ class BaseSpider(scrapy.Spider):
         """
         raise NotImplementedError
 
-    def generate_initial_requests(self):
+    def make_initial_request(self, req):
+        """
+        Should be implemented by child class.
+        Should return the scrapy.Request for an item of
+        generate_initial_requests, with parse_initial_request as callback and
+        errback_initial_request as errback, and the item in
+        meta["initial_request"].
+        """
+        raise NotImplementedError
+
+    def generate_initial_requests(self, start=0):
         """
         Generates the initial requests to be done from the templated requests
         configuration. Yields the base URL if no template is used. Should be
         called by start_requests.
+
+        Combinations are generated lazily and are not probed here: items
+        have a 'probe' key, and the response to the request must be checked
+        with self.probe before being processed (see parse_initial_request).
+        Combinations the cache of the probe knows to be missing are skipped.
+
+        Keyword arguments:
+        start -- int, index of the first combination to generate (default 0)
         """
 
         base_url = self.config['base_url']
@@ -111,51 +243,245 @@ class BaseSpider(scrapy.Spider):
 
                 param_key = templated_url_config['post_key']"""
 
-            # Configure the probing process
-            probe = self.create_probing_object(base_url, req_type, req_body,
-                self.config['templated_url_response_handlers']
-            )
-
             # Instantiate the parameter injectors for the URL
+            probe = self.get_probe()
             url_injectors = self.create_parameter_generators(probe,
                 self.config['parameter_handlers']
             )
+            self.report_probe_cache()
 
             # Generate the requests
-            param_generator = itertools.product(*url_injectors)
-            for param_combination in param_generator:
-                # Check if this entry hits a valid page
-                if probe.check_entry(param_combination):
-                    curr_url = base_url
-
-                    # Insert parameter into URL
-                    curr_url = base_url.format(*param_combination)
-                    req_body = {}
-
-                    yield {
-                        'url': curr_url,
-                        'method': req_type,
-                        'body': req_body
-                    }
+            param_generator = itertools.islice(
+                lazy_product(*url_injectors), start, None)
+            for index, param_combination in enumerate(param_generator, start):
+                # Entries already found missing (e.g.: while filtering the
+                # ranges) are not requested again
+                if probe.cached_result(param_combination) is False:
+                    continue
 
-        else:
+                # Insert parameter into URL
+                curr_url = base_url.format(*param_combination)
+                req_body = {}
+
+                yield {
+                    'url': curr_url,
+                    'method': req_type,
+                    'body': req_body,
+                    'probe': True,
+                    'index': index,
+                    'url_entries': list(param_combination),
+                }
+
+        elif start == 0:
             # By default does a request to the base_url
             yield {
                 'url': base_url,
                 'method': req_type,
-                'body': {}
+                'body': {},
+                'probe': False,
+                'index': 0,
             }
 
+    def start_initial_requests(self):
+        """
+        Starts generating the initial requests from the cursor saved by a
+        previous run of this instance, if any, and yields the first ones.
+        Those after the cursor already sent by the previous run are dropped
+        by the persisted dupefilter. Should be called by start_requests.
+        """
+        if self.distributed:
+            if self.worker_index > 0:
+                return iter(())
+
+            # Requests go to the shared queue as Scrapy consumes them, and
+            # their responses may be processed by other workers
+            return (self.make_initial_request(req)
+                    for req in self.generate_initial_requests())
+
+        cursor = self.load_cursor()
+        self.initial_requests = self.generate_initial_requests(cursor)
+        self.next_initial_index = cursor
+
+        return self.next_initial_requests()
+
+    def next_initial_requests(self):
+        """
+        Yields initial requests until self.initial_lookahead of them are in
+        flight. The next ones are yielded as these finish, so huge parameter
+        spaces are never loaded into the scheduler at once.
+        """
+        if self.initial_requests is None:
+            return
+
+        while len(self.pending_initial) < self.initial_lookahead:
+            req = next(self.initial_requests, None)
+            if req is None:
+                return
+
+            self.pending_initial.add(req['index'])
+            self.next_initial_index = req['index'] + 1
+            yield self.make_initial_request(req)
+
+    def initial_request_dropped(self, request, spider):
+        """
+        Releases the lookahead slot of an initial request dropped by the
+        dupefilter, e.g. because it was sent before the instance was resumed
+        (and is still in the restored queue, or was already processed).
+        """
+        req = request.meta.get("initial_request")
+        if req is None or spider is not self or self.initial_requests is None:
+            return
+
+        self.finish_initial_request(req['index'])
+
+        # The next requests are sent in the following reactor iteration, as
+        # they may be dropped too, which would nest these calls
+        from twisted.internet import reactor
+        reactor.callLater(0, self.crawl_next_initial_requests)
+
+    def crawl_next_initial_requests(self):
+        for request in self.next_initial_requests():
+            self.crawler.engine.crawl(request)
+
+    def finish_initial_request(self, index):
+        if self.initial_requests is None:
+            return
+
+        self.pending_initial.discard(index)
+        self.finished_initial += 1
+        if self.finished_initial % CURSOR_SAVE_INTERVAL == 0:
+            self.save_cursor()
+
+    def cursor_path(self):
+        return f"{self.flag_folder}{self.config['instance_id']}_cursor.json"
+
+    def load_cursor(self):
+        """
+        Returns the index of the first initial request not finished by a
+        previous run of this instance (0 if there was none).
+        """
+        try:
+            with open(self.cursor_path()) as f:
+                return json.load(f)["cursor"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0
+
+    def save_cursor(self):
+        """
+        Saves the index of the first initial request not finished yet, from
+        where a new run of this instance should continue.
+        """
+        cursor = self.next_initial_index
+        if len(self.pending_initial) > 0:
+            cursor = min(self.pending_initial)
+
+        try:
+            with open(self.cursor_path(), "w+") as f:
+                json.dump({"cursor": cursor}, f)
+        except OSError as e:
+            print(f"Could not save cursor - message: {str(type(e))}-{e}")
+
+    def parse_initial_request(self, response):
+        """
+        Callback of the initial requests. Yields the next initial requests,
+        checks if the response hits a valid entry (for templated requests)
+        and passes it to the callback named in the request.
+        """
+        req = response.meta["initial_request"]
+        self.finish_initial_request(req['index'])
+
+        for request in self.next_initial_requests():
+            yield request
+
+        if req['probe']:
+            probe = self.get_probe()
+            response_data = ResponseData.create_from_scrapy(
+                response, probe.body_mode)
+            if not probe.check_response(response_data,
+                                        req.get('url_entries')):
+                print(f"Entry not found at {response.url}, skipping it")
+                return
+
+            # Probing requests receive any status, to be checked by the
+            # response handlers
+            if not 200 <= response.status < 300:
+                return
+
+        result = getattr(self, req['callback'])(response)
+        if result is not None:
+            for item in result:
+                yield item
+
+    def errback_initial_request(self, failure):
+        """Errback of the initial requests."""
+        req = failure.request.meta["initial_request"]
+        self.finish_initial_request(req['index'])
+
+        for request in self.next_initial_requests():
+            yield request
+
+        self.errback_httpbin(failure)
+
+    def get_probe(self):
+        """
+        Returns the EntryProbing instance of the templated requests,
+        creating it on first use.
+        """
+        if self.probe is None:
+            # Request body (TODO)
+            resp_handlers = self.config['templated_url_response_handlers']
+            self.probe = self.create_probing_object(self.config['base_url'],
+                self.config['request_type'], {}, resp_handlers,
+                self.create_probe_cache(resp_handlers)
+            )
+        return self.probe
+
+    def create_probe_cache(self, resp_handlers):
+        """
+        Returns the cache of the results of the templated requests, of the
+        type in the probe_cache configuration, or None if it is disabled.
+        The disk cache is shared by the instances of the crawler with the
+        same response handlers.
+        """
+        cache_type = self.config.get("probe_cache") or PROBE_CACHE
+        if cache_type == "memory":
+            return MemoryProbeCache(PROBE_CACHE_SIZE, PROBE_CACHE_TTL)
+        if cache_type == "disk":
+            handlers_digest = hashlib.blake2b(
+                json.dumps(resp_handlers, sort_keys=True, default=str).encode(),
+                digest_size=8).hexdigest()
+            return DiskProbeCache(
+                f"{self.data_folder}{PROBE_CACHE_FILE.format(handlers_digest)}",
+                PROBE_CACHE_SIZE, PROBE_CACHE_TTL)
+        return None
+
+    def report_probe_cache(self):
+        """Publishes the counters of the probe cache in the stats."""
+        crawler = getattr(self, "crawler", None)
+        if crawler is None or crawler.stats is None:
+            return
+        if self.probe is None or self.probe.cache is None:
+            return
+        for key, value in self.probe.cache.stats.items():
+            crawler.stats.set_value(f"probe_cache/{key}", value)
+
     def create_probing_object(self, base_url, req_type, req_body,
-                              resp_handlers):
+                              resp_handlers, cache=None):
         """
         Loads the request data and response handlers supplied, and generates
-        the respective EntryProbing instance
+        the respective EntryProbing instance, with the cache of results
+        supplied, if any
         """
 
-        # Probing request
-        probe = EntryProbing(HTTPProbingRequest(base_url, method=req_type,
-                                                req_data=req_body))
+        # Probing request, sharing a pool of connections and able to check
+        # many entries concurrently when aiohttp is installed
+        try:
+            req_handler = AsyncHTTPProbingRequest(base_url, method=req_type,
+                                                  req_data=req_body)
+        except ValueError:
+            req_handler = HTTPProbingRequest(base_url, method=req_type,
+                                             req_data=req_body)
+        probe = EntryProbing(req_handler, cache)
 
         # Probing response
         for handler_data in resp_handlers:
@@ -237,7 +563,9 @@ class BaseSpider(scrapy.Spider):
                         max_seq = RangeInference.filter_process_code(
                             first_year, last_year, segment_ids, court_ids,
                             origin_ids, probe, entries_list,
-                            cons_misses=cons_misses
+                            cons_misses=cons_misses,
+                            parallel=RANGE_INFERENCE_PARALLEL,
+                            max_probes=RANGE_INFERENCE_MAX_PROBES
                         )
 
                     subparam_list = [
@@ -267,7 +595,9 @@ class BaseSpider(scrapy.Spider):
                     if i == 2:
                         # Filter the number range
                         end = RangeInference.filter_numeric_range(begin, end,
-                                  probe, entries_list, cons_misses=cons_misses)
+                                  probe, entries_list, cons_misses=cons_misses,
+                                  parallel=RANGE_INFERENCE_PARALLEL,
+                                  max_probes=RANGE_INFERENCE_MAX_PROBES)
 
                     param_gen = ParamInjector.generate_num_sequence(
                         first=begin,
@@ -289,7 +619,9 @@ class BaseSpider(scrapy.Spider):
                         # Filter the date range
                         end = RangeInference.filter_daterange(begin, end,
                                   probe, frequency, date_format, entries_list,
-                                  cons_misses=cons_misses)
+                                  cons_misses=cons_misses,
+                                  parallel=RANGE_INFERENCE_PARALLEL,
+                                  max_probes=RANGE_INFERENCE_MAX_PROBES)
 
                     param_gen = ParamInjector.generate_daterange(
                         date_format=date_format,
@@ -317,25 +649,39 @@ class BaseSpider(scrapy.Spider):
     def stop(self):
         """
         Checks if the crawler was signaled to stop.
-        Should be called at the begining of every parse operation.
+        Should be called at the begining of every parse operation. The flag
+        file is read at most once every STOP_CHECK_INTERVAL seconds, and only
+        decoded when it was modified since the last read.
         """
 
-        flag_file = f"{self.flag_folder}/{self.config['instance_id']}.json"
+        now = time.monotonic()
+        if now - self.last_stop_check >= STOP_CHECK_INTERVAL:
+            self.last_stop_check = now
+
+            flag_file = f"{self.flag_folder}/{self.config['instance_id']}.json"
+            mtime = os.stat(flag_file).st_mtime_ns
+            if mtime != self.stop_flag_mtime:
+                self.stop_flag_mtime = mtime
 
-        with open(flag_file) as f:
-            flags = json.loads(f.read())
+                with open(flag_file) as f:
+                    flags = json.loads(f.read())
 
-        self.stop_flag = flags["stop"]
+                self.stop_flag = flags["stop"]
 
         if self.stop_flag:
             raise CloseSpider("Received signal to stop.")
 
         return self.stop_flag
 
-    def extract_and_store_csv(self, response, description):
-        """Try to extract a json/csv from page html."""
+    def extract_and_store_csv(self, response, description, body, callback):
+        """
+        Schedules the extraction of a json/csv from page html in the
+        extraction pool. When it finishes, callback receives the list of
+        extracted files.
+        """
 
         config = response.meta['config']
+        url = response.url
 
         hsh = self.hash_response(response)
 
@@ -343,71 +689,83 @@ class BaseSpider(scrapy.Spider):
         if config["save_csv"]:
             output_filename += ".csv"
 
-        success = False
-        try:
-            table_attrs = config["table_attrs"]
-            if table_attrs is None or table_attrs == "":
-                parsing_html.content.html_detect_content(
-                    description["relative_path"],
-                    is_string=False,
-                    output_file=output_filename,
-                    to_csv=config["save_csv"]
-                )
-            else:
-                extra_config = self.extra_config_parser(
-                    config["table_attrs"])
-                parsing_html.content.html_detect_content(
-                    description["relative_path"],
-                    is_string=False, output_file=output_filename,
-                    match=extra_config['table_match'],
-                    flavor=extra_config['table_flavor'],
-                    header=extra_config['table_header'],
-                    index_col=extra_config['table_index_col'],
-                    skiprows=extra_config['table_skiprows'],
-                    attrs=extra_config['table_attributes'],
-                    parse_dates=extra_config['table_parse_dates'],
-                    thousands=extra_config['table_thousands'],
-                    encoding=extra_config['table_encoding'],
-                    decimal=extra_config['table_decimal'],
-                    na_values=extra_config['table_na_values'],
-                    keep_default_na=extra_config['table_default_na'],
-                    displayed_only=extra_config['table_displayed_only'],
-                    to_csv=config["save_csv"]
-                )
-            success = True
+        detect_kwargs = {}
+        table_attrs = config["table_attrs"]
+        if table_attrs is not None and table_attrs != "":
+            extra_config = self.extra_config_parser(config["table_attrs"])
+            detect_kwargs = {
+                "match": extra_config['table_match'],
+                "flavor": extra_config['table_flavor'],
+                "header": extra_config['table_header'],
+                "index_col": extra_config['table_index_col'],
+                "skiprows": extra_config['table_skiprows'],
+                "attrs": extra_config['table_attributes'],
+                "parse_dates": extra_config['table_parse_dates'],
+                "thousands": extra_config['table_thousands'],
+                "encoding": extra_config['table_encoding'],
+                "decimal": extra_config['table_decimal'],
+                "na_values": extra_config['table_na_values'],
+                "keep_default_na": extra_config['table_default_na'],
+                "displayed_only": extra_config['table_displayed_only'],
+            }
 
-        except Exception as e:
-            print(
-                f"Could not extract csv from {response.url} -",
-                f"message: {str(type(e))}-{e}"
-            )
+        def done(result, error):
+            if error is not None:
+                print(
+                    f"Could not extract csv from {url} -",
+                    f"message: {str(type(error))}-{error}"
+                )
+                callback([])
+                return
 
-        if success:
             description["extracted_from"] = description["relative_path"]
             description["relative_path"] = output_filename
             description["type"] = "csv"
             self.feed_file_description(f"{self.data_folder}csv/", description)
-            return [output_filename]
+            callback([output_filename])
 
-        return []
+        self.extraction_pool.submit(
+            extract_html_content,
+            (body, output_filename, config["save_csv"], detect_kwargs),
+            done
+        )
 
     def store_html(self, response):
-        """Stores html and adds its description to file_description file."""
+        """
+        Stores html and adds its description to file_description file.
+        The description is fed once the csv extraction of the page finishes.
+        """
         print(f'Saving html page {response.url}')
 
-        cleaner = Cleaner(
-            style=True, links=False, scripts=True,
-            comments=True, page_structure=False
-        )
-        body = cleaner.clean_html(
-            response.body.decode('utf-8', errors='ignore'))
-
         hsh = self.hash_response(response)
 
         relative_path = f"{self.data_folder}raw_pages/{hsh}.html"
 
-        with open(file=relative_path, mode="w+", errors='ignore') as f:
-            f.write(body)
+        # Pages are named by the hash of their URL and content, so an
+        # existing file means the page did not change since a previous run
+        unchanged = os.path.exists(relative_path)
+        self.content_store.record(
+            response.url, relative_path, hsh, not unchanged)
+
+        if unchanged:
+            with open(relative_path, errors='ignore') as f:
+                body = f.read()
+
+        elif self.clean_html:
+            tree = lxml.html.document_fromstring(
+                response.body.decode('utf-8', errors='ignore'))
+            self.html_cleaner(tree)
+            body = lxml.html.tostring(tree, encoding='unicode')
+
+            with open(file=relative_path, mode="w+", errors='ignore') as f:
+                f.write(body)
+
+        else:
+            # Write the downloaded bytes as they are, without decoding and
+            # re-encoding the page
+            with open(file=relative_path, mode="wb") as f:
+                f.write(memoryview(response.body))
+            body = response.text
 
         description = {
             "file_name": f"{hsh}.html",
@@ -420,12 +778,14 @@ class BaseSpider(scrapy.Spider):
             "referer": response.meta["referer"]
         }
 
-        extracted_files = self.extract_and_store_csv(
-            response, description.copy())
-        description["extracted_files"] = extracted_files
+        def feed(extracted_files):
+            description["extracted_files"] = extracted_files
+            self.feed_file_description(
+                self.data_folder + "raw_pages", description)
+            self.save_validators(response.url, response.headers,
+                                 self.data_folder + "raw_pages", description)
 
-        self.feed_file_description(
-            self.data_folder + "raw_pages", description)
+        self.extract_and_store_csv(response, description.copy(), body, feed)
 
     # based on: https://github.com/steveeJ/python-wget/blob/master/wget.py
     def filetype_from_url(self, url: str) -> str:
@@ -464,77 +824,89 @@ class BaseSpider(scrapy.Spider):
 
         return self.filetype_from_url(url)
 
-    def convert_binary(self, url: str, filetype: str, filename: str):
+    def convert_binary(self, url: str, filetype: str, filename: str,
+                       callback):
+        """
+        Schedules the extraction of tables from a binary file in the
+        extraction pool. When it finishes, callback receives the list of
+        extracted files (None if the file type is not supported).
+        """
         if filetype != "pdf":
+            callback(None)
             return
-        
-        url_hash = crawling_utils.hash(url.encode())
-        source_file = f"{self.data_folder}files/{filename}"
 
-        success = False
-        results = None
-        try:
-            # single DataFrame or list of DataFrames
-            results = Extractor(source_file).extra().read()
-        except Exception as e:
-            print(
-                f"Could not extract csv files from {source_file} -",
-                f"message: {str(type(e))}-{e}"
-            )
-            return []
+        url_hash = crawling_utils.hash(url.encode(), self.hash_algorithm)
+        source_file = f"{self.data_folder}files/{filename}"
 
-        if type(results) == pandas.DataFrame:
-            results = [results]
+        def done(extracted, error):
+            if error is not None:
+                print(
+                    f"Could not extract csv files from {source_file} -",
+                    f"message: {str(type(error))}-{error}"
+                )
+                callback([])
+                return
 
-        extracted_files = []
-        for i in range(len(results)):
-            relative_path = f"{self.data_folder}csv/{url_hash}_{i}.csv"
-            results[i].to_csv(relative_path, encoding='utf-8', index=False)
+            extracted_files = []
+            for file_name, relative_path in extracted:
+                extracted_files.append(relative_path)
 
-            extracted_files.append(relative_path)
+                item_desc = {
+                    "file_name": file_name,
+                    "type": "csv",
+                    "extracted_from": source_file,
+                    "relative_path": relative_path
+                }
 
-            item_desc = {
-                "file_name": f"{url_hash}_{i}.csv",
-                "type": "csv",
-                "extracted_from": source_file,
-                "relative_path": relative_path
-            }
+                FileDescriptor.feed_description(f"{self.data_folder}csv/", item_desc)
 
-            FileDescriptor.feed_description(f"{self.data_folder}csv/", item_desc)
+            callback(extracted_files)
 
-        return extracted_files
+        self.extraction_pool.submit(
+            extract_binary_tables,
+            (source_file, f"{self.data_folder}csv/", url_hash),
+            done
+        )
 
     def get_download_filename_and_relative_path(self, url: str, extension: str) -> tuple:
-        url_hash = crawling_utils.hash(url.encode())
-        file_name = url_hash 
+        url_hash = crawling_utils.hash(url.encode(), self.hash_algorithm)
+        file_name = url_hash
         file_name += '.' + extension if extension else ''
 
         relative_path = f"{self.data_folder}files/{file_name}"
 
         return file_name, relative_path
 
-    def store_large_file(self, url: str, referer: str):
-        print(f"Saving large file {url}")
-        
-        # Head type request to obtain the mimetype and/or file name to be downloaded on the server
-        headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.66 Safari/537.36'}
-        response = requests.head(url, allow_redirects=True, headers=headers)
-        
-        content_type = response.headers.get("Content-type", "")
-        content_disposition = response.headers.get("Content-Disposition", "")
-
-        response.close()
-
+    def resolve_large_file_destination(self, url: str, content_type: str,
+                                       content_disposition: str) -> tuple:
+        """Returns file name, relative path and extension of a large file."""
         extension = self.detect_file_extension(url, content_type, content_disposition)
         file_name, relative_path = self.get_download_filename_and_relative_path(url, extension)
 
-        # The stream parameter is not to save in memory
-        with requests.get(url, stream=True, allow_redirects=True, headers=headers) as req:
-            with open(relative_path, "wb") as f:
-                for chunk in req.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        return file_name, relative_path, extension
+
+    def unseen_urls(self, urls) -> set:
+        """Returns the urls not seen yet, without adding them to the store."""
+        return {url for url in urls if url_key(url) not in self.seen_urls}
+
+    def report_seen_urls(self):
+        """Publishes the size of the store of seen URLs in the stats."""
+        crawler = getattr(self, "crawler", None)
+        if crawler is None or crawler.stats is None:
+            return
+        crawler.stats.set_value("seen_urls/count", len(self.seen_urls))
+        crawler.stats.set_value("seen_urls/memory",
+                                self.seen_urls.memory_usage())
+
+    def store_large_file(self, url: str, referer: str):
+        """Schedules the download of a large file in the background."""
+        if not self.seen_urls.add(url_key(url)):
+            print(f"Skipping large file already seen {url}")
+            return
+        self.report_seen_urls()
 
-        self.create_and_feed_file_description(url, file_name, referer, extension)
+        print(f"Scheduling large file {url}")
+        self.large_file_downloader.submit(url, referer)
 
     def store_small_file(self, response):
         print(f"Saving small file {response.url}")
@@ -545,10 +917,48 @@ class BaseSpider(scrapy.Spider):
         extension = self.detect_file_extension(response.url, content_type, content_disposition)
         file_name, relative_path = self.get_download_filename_and_relative_path(response.url, extension)
 
-        with open(relative_path, "wb") as f:
-            f.write(response.body)
+        self.content_store.put_bytes(response.body, relative_path, response.url)
 
-        self.create_and_feed_file_description(response.url, file_name, response.meta["referer"], extension)
+        self.create_and_feed_file_description(response.url, file_name, response.meta["referer"], extension, response.headers)
+
+    def store_large_file_content(self, url: str, file_name: str, referer: str, extension: str, headers=None):
+        """Moves a finished large file download into the content store."""
+        relative_path = f"{self.data_folder}files/{file_name}"
+        self.content_store.put_file(relative_path, url)
+
+        self.create_and_feed_file_description(url, file_name, referer, extension, headers)
+
+    def save_validators(self, url: str, headers, destination: str, description: dict):
+        """
+        Saves the validators of a stored response with its description, in
+        incremental crawls.
+        """
+        if self.validators is None or headers is None:
+            return
+        record = {"destination": destination, "description": description}
+        self.validators.put(url, headers, record)
+
+    def store_unchanged(self, url: str, referer: str):
+        """
+        Feeds the description of content not modified since it was stored by
+        a previous run, marked as unchanged. Returns the stored description,
+        or None if there is no previous content of url.
+        """
+        validators = self.validators.get(url)
+        if validators is None:
+            print(f"No previous content of {url} to reuse")
+            return None
+
+        record = validators["record"]
+        description = dict(record["description"])
+        description.update({
+            "instance_id": self.config["instance_id"],
+            "crawled_at_date": str(datetime.datetime.today()),
+            "referer": referer,
+            "unchanged": True,
+        })
+        self.feed_file_description(record["destination"], description)
+        return description
 
     def errback_httpbin(self, failure):
         # log all errback failures,
@@ -573,8 +983,11 @@ class BaseSpider(scrapy.Spider):
     def feed_file_description(self, destination: str, content: dict):        
         FileDescriptor.feed_description(destination, content)
 
-    def create_and_feed_file_description(self, url: str, file_name: str, referer: str, extension: str):
-        """Creates the description file of the downloaded files and saves them"""
+    def create_and_feed_file_description(self, url: str, file_name: str, referer: str, extension: str, headers=None):
+        """
+        Creates the description file of the downloaded files and saves them.
+        The headers of the response are used by incremental crawls.
+        """
 
         description = {
             "url": url,
@@ -586,10 +999,13 @@ class BaseSpider(scrapy.Spider):
             "type": extension,
         }
         
-        extracted_files = self.convert_binary(url, extension, file_name)
-        description["extracted_files"] = extracted_files
-        
-        self.feed_file_description(f"{self.data_folder}files/", description)
+        def feed(extracted_files):
+            description["extracted_files"] = extracted_files
+            self.feed_file_description(f"{self.data_folder}files/", description)
+            self.save_validators(url, headers, f"{self.data_folder}files/",
+                                 description)
+
+        self.convert_binary(url, extension, file_name, feed)
         
     def extra_config_parser(self, table_attrs):
         # get the json from extra_config and 
@@ -623,5 +1039,7 @@ class BaseSpider(scrapy.Spider):
         """
 
         # POST requests may access the same URL with different parameters, so
-        # we hash the URL with the response body
-        return crawling_utils.hash(response.url.encode() + response.body)
+        # we hash the URL with the response body. The hash is updated with
+        # each part, so the body is not copied into a new bytestring
+        return crawling_utils.hash_parts(
+            [response.url.encode(), response.body], self.hash_algorithm)
@@ -1,2 +1,148 @@
 # CURR_FOLDER_FROM_ROOT = "main/src"
 CURR_FOLDER_FROM_ROOT = "crawlers"
+
+# Kafka settings
+KAFKA_HOSTS = ["localhost:9092"]
+KAFKA_LINGER_MS = 50
+
+# Topic used to transport file descriptions from spiders to the consumer
+FILE_DESCRIPTOR_TOPIC = "crawlers.file_descriptions"
+
+# Maximum number of messages and seconds waited by a messenger source batch
+SOURCE_MAX_BATCH = 500
+SOURCE_TIMEOUT = 1
+
+# Buffering of file_description.jsonl writes: bytes per destination, seconds
+# between flushes, compression (None, "gzip" or "zstd"), segment size in
+# bytes (None keeps a single file) and number of files kept open
+DESCRIPTION_FLUSH_SIZE = 64 * 1024
+DESCRIPTION_FLUSH_INTERVAL = 5
+DESCRIPTION_COMPRESSION = None
+DESCRIPTION_SEGMENT_SIZE = None
+DESCRIPTION_MAX_HANDLES = 64
+
+# Minimum interval, in seconds, between two reads of a crawler's stop flag
+STOP_CHECK_INTERVAL = 0.5
+
+# Number of processes extracting tables from pages and files, the time in
+# seconds an extraction may take before its worker process is killed and how
+# those processes are started. They are not forked from the spider process,
+# whose reactor and downloader threads may hold locks at fork time
+EXTRACTION_WORKERS = 2
+EXTRACTION_TIMEOUT = 300
+EXTRACTION_START_METHOD = "forkserver"
+
+# Default algorithm used to name stored pages and files (see
+# crawling_utils.get_hasher)
+HASH_ALGORITHM = "md5"
+
+# Content-addressed storage of downloaded files: folders (inside the data
+# folder of the crawler) of the blobs and of the manifests of each instance
+CONTENT_STORE_FOLDER = "blobs"
+MANIFEST_FOLDER = "manifests"
+CONTENT_STORE_CHUNK_SIZE = 1024 * 1024
+MANIFEST_FLUSH_SIZE = 100
+
+# Maximum number of initial requests (templated URLs) in flight, and how many
+# of them must finish between saves of the cursor used to resume an instance
+INITIAL_REQUESTS_LOOKAHEAD = 64
+CURSOR_SAVE_INTERVAL = 100
+
+# Folder (inside the data path of the crawler) with the persisted state of
+# each instance: scheduler queue and seen requests
+JOB_FOLDER = "jobs"
+
+# Database (inside the data folder of the crawler) with the ETag and
+# Last-Modified of stored content, used by incremental crawls, how many
+# changes are committed at once and how long to wait for a locked database
+VALIDATORS_FILE = "validators.sqlite3"
+VALIDATORS_COMMIT_SIZE = 100
+VALIDATORS_LOCK_TIMEOUT = 30
+
+# Order in which links are visited ("bfs", "dfs" or "priority", by the score
+# of the URL patterns), and the Scrapy settings of each order. The frontier is
+# kept in disk queues inside the job folder of the instance
+FRONTIER_ORDER = "bfs"
+FRONTIER_SETTINGS = {
+    "bfs": {
+        "DEPTH_PRIORITY": 1,
+        "SCHEDULER_DISK_QUEUE": "scrapy.squeues.PickleFifoDiskQueue",
+        "SCHEDULER_MEMORY_QUEUE": "scrapy.squeues.FifoMemoryQueue",
+    },
+    "dfs": {
+        "DEPTH_PRIORITY": 0,
+        "SCHEDULER_DISK_QUEUE": "scrapy.squeues.PickleLifoDiskQueue",
+        "SCHEDULER_MEMORY_QUEUE": "scrapy.squeues.LifoMemoryQueue",
+    },
+    "priority": {
+        "DEPTH_PRIORITY": 0,
+        "SCHEDULER_DISK_QUEUE": "scrapy.squeues.PickleFifoDiskQueue",
+        "SCHEDULER_MEMORY_QUEUE": "scrapy.squeues.FifoMemoryQueue",
+    },
+}
+
+# Seconds between the metrics snapshots of a crawler process, and upper
+# bounds (in seconds) of the buckets of the download latency histograms
+METRICS_INTERVAL = 10
+METRICS_LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+# Store of the URLs seen by an instance ("set" or "bloom"), initial capacity
+# of the Bloom filter and probability of a new URL being considered seen
+SEEN_URLS_STORE = "set"
+SEEN_URLS_BLOOM_CAPACITY = 1000000
+SEEN_URLS_ERROR_RATE = 0.001
+# Number of URLs added to the "set" store between flushes of its file, so
+# they survive a crash of the instance
+SEEN_URLS_FLUSH_INTERVAL = 1000
+
+# Cache of the results of the probes of templated URLs ("memory", "disk" or
+# "none"), shared by the filtering of the ranges and the initial requests:
+# maximum number of results kept, seconds they are valid for and database
+# (inside the data folder of the crawler, one per set of response handlers)
+# of the disk cache
+PROBE_CACHE = "memory"
+PROBE_CACHE_SIZE = 100000
+PROBE_CACHE_TTL = 24 * 60 * 60
+PROBE_CACHE_FILE = "probe_cache_{}.sqlite3"
+
+# Range inference of templated URL parameters: number of entries probed
+# concurrently, and maximum number of entries probed in the search of each
+# range (None for no limit)
+RANGE_INFERENCE_PARALLEL = 10
+RANGE_INFERENCE_MAX_PROBES = None
+
+# Maximum number of crawlers running at the same time (others wait in a
+# queue), and modules imported once by the process crawlers are forked from
+CRAWLER_POOL_SIZE = 8
+CRAWLER_POOL_PRELOAD = [
+    "scrapy",
+    "scrapy.crawler",
+    "pandas",
+    "lxml.html",
+    "crawlers.crawler_manager",
+    "crawlers.page_spider",
+]
+
+# Distributed mode: Redis server shared by the workers, prefix of the keys of
+# each instance, seconds every worker must be idle before they finish and
+# number of domains sampled by a worker when looking for its next request
+REDIS_URL = "redis://localhost:6379/0"
+DISTRIBUTED_KEY_PREFIX = "crawlers"
+DISTRIBUTED_IDLE_TIMEOUT = 30
+DISTRIBUTED_DOMAIN_SAMPLE = 16
+
+# Adaptive concurrency (see AdaptiveConcurrencyMiddleware): default bounds of
+# the concurrency per domain, maximum delay, delay after the first 429/503,
+# statuses that mean the server is overloaded, weight of the last latency in
+# the average, how much slower than the fastest response the average may get
+# (relative and in seconds) and how the delay decreases after a round of
+# successful responses
+ADAPTIVE_MIN_CONCURRENCY = 1
+ADAPTIVE_MAX_CONCURRENCY = 16
+ADAPTIVE_MAX_DELAY = 60
+ADAPTIVE_BACKOFF_DELAY = 1
+ADAPTIVE_THROTTLE_STATUS = [429, 503]
+ADAPTIVE_LATENCY_WEIGHT = 0.2
+ADAPTIVE_LATENCY_TOLERANCE = 2
+ADAPTIVE_LATENCY_SLACK = 0.25
+ADAPTIVE_DELAY_DECAY = 0.75
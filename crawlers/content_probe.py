@@ -0,0 +1,77 @@
+# Scrapy and Twister libs
+import scrapy
+
+# Other external libs
+import collections
+import threading
+
+HEAD_HEADERS = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.66 Safari/537.36'}
+DEFAULT_CACHE_SIZE = 100000
+
+
+class ContentProbe:
+    """
+    Retrieves the Content-Type and Content-Length of URLs through HEAD
+    requests sent by Scrapy's downloader, so they run concurrently with the
+    rest of the crawl and respect its download delay per domain. The results
+    are memoized per URL for the lifetime of the object, keeping at most
+    max_size of them (the least recently used are evicted).
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Keyword arguments:
+        max_size -- int, maximum number of results kept
+        """
+        self.max_size = max_size
+        self.cache = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, url: str):
+        """
+        Returns the tuple (url, content_type, content_length) memoized for
+        url, or None if it was not probed yet.
+        """
+        with self.lock:
+            result = self.cache.get(url)
+            if result is not None:
+                self.cache.move_to_end(url)
+            return result
+
+    def put(self, url: str, headers=None) -> tuple:
+        """
+        Memoizes the result of probing url from the headers (dict-like, with
+        str or bytes values) of its HEAD response. Network errors (headers
+        None) are reported as an empty content type with length 0. Returns
+        the tuple (url, content_type, content_length).
+        """
+        def header(name):
+            value = headers.get(name) if headers is not None else None
+            if isinstance(value, bytes):
+                value = value.decode("latin-1")
+            return value or ""
+
+        content_type = header("Content-Type")
+        try:
+            content_length = int(header("Content-Length") or "0")
+        except ValueError:
+            content_length = 0
+
+        result = (url, content_type, content_length)
+        with self.lock:
+            self.cache[url] = result
+            self.cache.move_to_end(url)
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+
+        return result
+
+    def head_request(self, url: str, callback, errback, meta: dict):
+        """
+        Returns the HEAD request probing url. Every status reaches the
+        callback, as only the headers are used.
+        """
+        meta = dict(meta, probed_url=url, handle_httpstatus_all=True)
+        return scrapy.Request(url=url, method="HEAD", headers=HEAD_HEADERS,
+                              callback=callback, errback=errback,
+                              dont_filter=True, meta=meta)
@@ -0,0 +1,152 @@
+# Other external libs
+import json
+import os
+import shutil
+import threading
+
+# Project libs
+import crawling_utils
+from crawlers.constants import *
+
+
+class ContentStore:
+    """
+    Content-addressed storage of downloaded files, shared by every instance
+    of a crawler. Each distinct content is written once, as a blob named by
+    its hash, and the paths seen by the rest of the system (data/files/...)
+    are hard links to the blobs. Content that did not change since the last
+    run is not written again.
+
+    Every stored path is also recorded in a manifest of the instance
+    (manifests/<instance_id>.jsonl), pointing to the blob with its content.
+    """
+
+    def __init__(self, data_folder: str, instance_id,
+                 algorithm: str = HASH_ALGORITHM):
+        """
+        Keyword arguments:
+        data_folder -- str, data folder of the crawler, ending with "/"
+        instance_id -- id of the running instance, names its manifest
+        algorithm -- str, hash algorithm used to address the blobs
+        """
+        self.blob_folder = f"{data_folder}{CONTENT_STORE_FOLDER}/"
+        self.manifest_folder = f"{data_folder}{MANIFEST_FOLDER}/"
+        self.manifest_path = f"{self.manifest_folder}{instance_id}.jsonl"
+        self.algorithm = algorithm
+
+        self.manifest = []
+        self.lock = threading.Lock()
+
+        for folder in [self.blob_folder, self.manifest_folder]:
+            os.makedirs(folder, exist_ok=True)
+
+    def blob_path(self, digest: str) -> str:
+        return f"{self.blob_folder}{digest[:2]}/{digest}"
+
+    def hard_link(self, source: str, target: str):
+        """
+        Creates target as a hard link to source, or as a copy if the file
+        system does not support hard links.
+        """
+        try:
+            os.link(source, target)
+        except FileExistsError:
+            os.remove(target)
+            self.hard_link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+
+    def link(self, blob: str, path: str):
+        """Makes path point to blob, replacing it atomically."""
+        temp_path = f"{path}.link"
+        self.hard_link(blob, temp_path)
+        os.replace(temp_path, path)
+
+    def points_to(self, path: str, blob: str) -> bool:
+        try:
+            return os.path.samefile(path, blob)
+        except OSError:
+            return False
+
+    def store_blob(self, digest: str, write) -> bool:
+        """
+        Creates the blob of digest with write(temp_path), unless it already
+        exists. Returns True if the blob was created.
+        """
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            return False
+
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        temp_blob = f"{blob}.{threading.get_ident()}.part"
+        write(temp_blob)
+        os.replace(temp_blob, blob)
+        return True
+
+    def put_bytes(self, content: bytes, path: str, url: str) -> tuple:
+        """
+        Stores content at path. Returns a tuple (digest, new_content), where
+        new_content is False if the store already had this content, in which
+        case nothing is written.
+        """
+        digest = crawling_utils.hash(content, self.algorithm)
+
+        def write(temp_path):
+            with open(temp_path, "wb") as f:
+                f.write(content)
+
+        new_content = self.store_blob(digest, write)
+        blob = self.blob_path(digest)
+        if not self.points_to(path, blob):
+            self.link(blob, path)
+
+        self.record(url, path, digest, new_content)
+        return digest, new_content
+
+    def put_file(self, path: str, url: str) -> tuple:
+        """
+        Moves a file already written at path (e.g. a finished download) into
+        the store, leaving path pointing to its blob. Returns a tuple (digest,
+        new_content), like put_bytes.
+        """
+        hasher = crawling_utils.get_hasher(self.algorithm)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CONTENT_STORE_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+
+        new_content = self.store_blob(
+            digest, lambda temp_path: self.hard_link(path, temp_path))
+        blob = self.blob_path(digest)
+        if not self.points_to(path, blob):
+            # Same content as a stored blob, drop the duplicate copy
+            self.link(blob, path)
+
+        self.record(url, path, digest, new_content)
+        return digest, new_content
+
+    def record(self, url: str, path: str, digest: str, new_content: bool):
+        """Adds an entry to the manifest of the instance."""
+        entry = {
+            "url": url,
+            "relative_path": path,
+            "content_hash": digest,
+            "new_content": new_content,
+        }
+        with self.lock:
+            self.manifest.append(json.dumps(entry) + "\n")
+            if len(self.manifest) >= MANIFEST_FLUSH_SIZE:
+                self.flush_manifest()
+
+    def flush_manifest(self):
+        """Appends the pending entries to the manifest. Requires self.lock."""
+        if len(self.manifest) == 0:
+            return
+        with open(self.manifest_path, "a+") as f:
+            f.write("".join(self.manifest))
+        self.manifest = []
+
+    def close(self):
+        """Writes the pending manifest entries."""
+        with self.lock:
+            self.flush_manifest()
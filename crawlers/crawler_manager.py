@@ -9,14 +9,20 @@ import random
 import requests
 import shutil
 import sys
+import threading
 import time
-from multiprocessing import Process
 
 # Project libs
 import crawling_utils.crawling_utils as crawling_utils
 from crawlers.constants import *
+from crawlers.crawler_pool import CrawlerPool
 from crawlers.file_descriptor import FileDescriptor
 
+# Pool running the crawler processes, created on first use. The lock avoids
+# creating two pools when requests are handled by concurrent threads
+crawler_pool = None
+crawler_pool_lock = threading.Lock()
+
 
 # TODO: implement following antiblock options
 # antiblock_mask_type
@@ -51,6 +57,47 @@ def create_folders(data_path):
         crawling_utils.check_file_path(f)
 
 
+def get_job_dir(config):
+    """Returns the folder where the state of an instance is persisted."""
+    return f"{config['data_path']}/{JOB_FOLDER}/{config['instance_id']}"
+
+
+def has_pending_requests(config):
+    """
+    Checks if a stopped instance left requests to be resumed: in the queue
+    persisted in its JOBDIR or, in distributed mode, in the queue shared
+    through Redis. Instances which completed their crawl have none.
+    """
+    if config.get("distributed_workers"):
+        from crawlers.distributed import get_redis
+        settings = {"REDIS_URL": config.get("redis_url") or REDIS_URL}
+        domains_key = \
+            f"{DISTRIBUTED_KEY_PREFIX}:{config['instance_id']}:domains"
+        return get_redis(settings).scard(domains_key) > 0
+
+    # Written by Scrapy's scheduler when the spider closes, with the
+    # priorities (or slots) of its non-empty queues
+    queue_state = f"{get_job_dir(config)}/requests.queue/active.json"
+    try:
+        with open(queue_state) as f:
+            return bool(json.load(f))
+    except (OSError, ValueError):
+        return False
+
+
+def get_log_name(config):
+    """Returns the name of the log files of a worker of an instance."""
+    worker_index = config.get("worker_index", 0)
+    if worker_index > 0:
+        return f"{config['instance_id']}_{worker_index}"
+    return str(config["instance_id"])
+
+
+def get_metrics_path(config):
+    """Returns the file with the metrics snapshot of a worker."""
+    return f"{config['data_path']}/log/{get_log_name(config)}_metrics.json"
+
+
 def get_crawler_base_settings(config):
     """Returns scrapy base configurations."""
     autothrottle = "antiblock_autothrottle_"
@@ -64,11 +111,65 @@ def get_crawler_base_settings(config):
         "AUTOTHROTTLE_ENABLED": config[f"{autothrottle}enabled"],
         "AUTOTHROTTLE_START_DELAY": config[f"{autothrottle}start_delay"],
         "AUTOTHROTTLE_MAX_DELAY": config[f"{autothrottle}max_delay"],
-        "DEPTH_LIMIT": config["link_extractor_max_depth"]
+        "DEPTH_LIMIT": config["link_extractor_max_depth"],
+        # Scheduler queue and seen requests are kept on disk, so a stopped
+        # instance can be resumed
+        "JOBDIR": get_job_dir(config),
+        # Shares the store of seen URLs of the spider
+        "DUPEFILTER_CLASS": "crawlers.seen_urls.SeenUrlsDupeFilter",
+        # Snapshot of the metrics of the process, read by the interface
+        "EXTENSIONS": {"crawlers.metrics.MetricsExtension": 500},
+        "METRICS_PATH": get_metrics_path(config),
     }
 
+    frontier_order = config.get("link_extractor_frontier_order") or FRONTIER_ORDER
+    settings.update(FRONTIER_SETTINGS[frontier_order])
+
+    max_concurrency = config.get("antiblock_max_concurrency")
+    if max_concurrency:
+        settings["CONCURRENT_REQUESTS_PER_DOMAIN"] = max_concurrency
+        settings["CONCURRENT_REQUESTS"] = max(max_concurrency, 16)
+
+    if config.get("antiblock_adaptive_concurrency"):
+        # Replaces AutoThrottle, adjusting concurrency as well as delay
+        settings["AUTOTHROTTLE_ENABLED"] = False
+        settings["ADAPTIVE_CONCURRENCY_ENABLED"] = True
+        settings["ADAPTIVE_CONCURRENCY_MIN"] = \
+            config.get("antiblock_min_concurrency") or ADAPTIVE_MIN_CONCURRENCY
+        settings["ADAPTIVE_CONCURRENCY_MAX"] = \
+            max_concurrency or ADAPTIVE_MAX_CONCURRENCY
+        settings["ADAPTIVE_CONCURRENCY_MAX_DELAY"] = \
+            config.get(f"{autothrottle}max_delay") or ADAPTIVE_MAX_DELAY
+        settings["CONCURRENT_REQUESTS_PER_DOMAIN"] = \
+            settings["ADAPTIVE_CONCURRENCY_MAX"]
+        settings["CONCURRENT_REQUESTS"] = \
+            max(settings["ADAPTIVE_CONCURRENCY_MAX"], 16)
+        settings.setdefault("DOWNLOADER_MIDDLEWARES", {})[
+            "crawlers.adaptive_concurrency.AdaptiveConcurrencyMiddleware"] = 900
+
+    if config.get("incremental_crawl"):
+        # Content stored by previous runs is requested conditionally
+        settings["INCREMENTAL_CRAWL_ENABLED"] = True
+        settings.setdefault("DOWNLOADER_MIDDLEWARES", {})[
+            "crawlers.incremental.ConditionalRequestMiddleware"] = 550
+
     if config.get("dynamic_processing", False):
-        settings["DOWNLOADER_MIDDLEWARES"] = {'scrapy_puppeteer.PuppeteerMiddleware': 800}
+        settings.setdefault("DOWNLOADER_MIDDLEWARES", {})[
+            'scrapy_puppeteer.PuppeteerMiddleware'] = 800
+
+    if config.get("distributed_workers"):
+        # Queue and seen requests are shared by the workers through Redis,
+        # which also enforces the download delay for the whole cluster
+        del settings["JOBDIR"]
+        settings["SCHEDULER"] = "crawlers.distributed.RedisScheduler"
+        settings.setdefault("DOWNLOADER_MIDDLEWARES", {})[
+            "crawlers.distributed.GlobalPolitenessMiddleware"] = 50
+        settings["REDIS_URL"] = config.get("redis_url") or REDIS_URL
+        settings["DISTRIBUTED_KEY"] = \
+            f"{DISTRIBUTED_KEY_PREFIX}:{config['instance_id']}"
+        settings["DISTRIBUTED_DELAY"] = config["antiblock_download_delay"]
+        settings["DOWNLOAD_DELAY"] = 0
+
     return settings
 
 
@@ -79,10 +180,12 @@ def crawler_process(config):
     crawler_id = config["crawler_id"]
     instance_id = config["instance_id"]
     data_path = config["data_path"]
+    worker_index = config.get("worker_index", 0)
 
-    # Redirects process logs to files
-    sys.stdout = open(f"{data_path}/log/{instance_id}.out", "a", buffering=1)
-    sys.stderr = open(f"{data_path}/log/{instance_id}.err", "a", buffering=1)
+    # Redirects process logs to files, one pair per worker of the instance
+    log_name = get_log_name(config)
+    sys.stdout = open(f"{data_path}/log/{log_name}.out", "a", buffering=1)
+    sys.stderr = open(f"{data_path}/log/{log_name}.err", "a", buffering=1)
 
     process = CrawlerProcess(settings=get_crawler_base_settings(config))
     process.crawl(PageSpider, config=json.dumps(config))
@@ -93,24 +196,45 @@ def crawler_process(config):
         requests.get(
             f'http://localhost:{port}/detail/stop_crawl/{crawler_id}')
 
-    for crawler in process.crawlers:
-        crawler.signals.connect(
-            update_database, signal=scrapy.signals.spider_closed)
+    # In distributed mode, the instance is finished by its first worker
+    if worker_index == 0:
+        for crawler in process.crawlers:
+            crawler.signals.connect(
+                update_database, signal=scrapy.signals.spider_closed)
 
     process.start()
 
 
+def get_crawler_pool():
+    """Returns the pool of crawler processes, creating it if needed."""
+    global crawler_pool
+    with crawler_pool_lock:
+        if crawler_pool is None:
+            crawler_pool = CrawlerPool()
+        return crawler_pool
+
+
 def gen_key():
     """Generates a unique key based on time and a random seed."""
     return str(int(time.time() * 100)) + str((int(random.random() * 1000)))
 
 
-def start_crawler(config):
-    """Create and starts a crawler as a new process."""
+def start_crawler(config, instance_id=None):
+    """
+    Create and starts a crawler as a new process.
+
+    Keyword arguments:
+    config -- dict, crawler configuration
+    instance_id -- id of a stopped instance to be resumed from its persisted
+    state. A new instance is created if None (default None)
+    """
 
     config["crawler_id"] = config["id"]
     del config["id"]
-    config["instance_id"] = gen_key()
+    if instance_id is None:
+        config["instance_id"] = gen_key()
+    else:
+        config["instance_id"] = str(instance_id)
 
     data_path = config["data_path"]
     create_folders(data_path=data_path)
@@ -121,9 +245,13 @@ def start_crawler(config):
     with open(f"{data_path}/flags/{config['instance_id']}.json", "w+") as f:
         f.write(json.dumps({"stop": False}))
 
-    # starts new process
-    p = Process(target=crawler_process, args=(config,))
-    p.start()
+    # runs in processes of the crawler pool, one per worker in distributed
+    # mode
+    workers = max(config.get("distributed_workers") or 1, 1)
+    for worker_index in range(workers):
+        worker_config = dict(config, worker_index=worker_index)
+        get_crawler_pool().submit(f"{config['instance_id']}_{worker_index}",
+                                  crawler_process, (worker_config,))
 
     return config["instance_id"]
 
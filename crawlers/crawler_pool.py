@@ -0,0 +1,99 @@
+# Other external libs
+import multiprocessing
+import queue
+import threading
+from multiprocessing import forkserver
+
+# Project libs
+from crawlers.constants import *
+
+
+class CrawlerPool:
+    """
+    Runs crawler jobs with at most size of them at the same time. Jobs wait
+    in a queue for a free slot.
+
+    Each job runs in its own process, since the Twisted reactor used by Scrapy
+    can't be restarted, but processes are forked from a long-lived server
+    process that imported the heavy modules (Scrapy, pandas, the project
+    packages...) only once, so they start without paying for these imports.
+    Each job redirects its own logs and uses the data path of its
+    configuration.
+    """
+
+    def __init__(self, size: int = CRAWLER_POOL_SIZE,
+                 preload: list = CRAWLER_POOL_PRELOAD):
+        """
+        Keyword arguments:
+        size -- int, maximum number of jobs running at the same time
+        preload -- list of module names imported by the server process
+        """
+        self.size = size
+        self.context = multiprocessing.get_context("forkserver")
+        self.context.set_forkserver_preload(preload)
+
+        self.jobs = queue.Queue()
+        self.slots = threading.Semaphore(size)
+        self.running = {}
+        self.lock = threading.Lock()
+
+        # Starts the server process now, so jobs don't wait for the imports
+        forkserver.ensure_running()
+
+        self.dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def submit(self, job_id: str, target, args: tuple):
+        """
+        Schedules target(*args) to run in a process of the pool.
+
+        Keyword arguments:
+        job_id -- str, identifier of the job, e.g. the instance id
+        target -- picklable callable, e.g. a module level function
+        args -- tuple of picklable arguments
+        """
+        self.jobs.put((job_id, target, args))
+
+    def dispatch(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+
+            self.slots.acquire()
+            job_id, target, args = job
+            try:
+                process = self.context.Process(target=target, args=args)
+                process.start()
+            except Exception as e:
+                print(
+                    f"Could not start job {job_id} -",
+                    f"message: {str(type(e))}-{e}"
+                )
+                self.slots.release()
+                continue
+
+            with self.lock:
+                self.running[job_id] = process
+            threading.Thread(target=self.wait, args=(job_id, process),
+                             daemon=True).start()
+
+    def wait(self, job_id: str, process):
+        process.join()
+        with self.lock:
+            self.running.pop(job_id, None)
+        self.slots.release()
+
+    def get_status(self) -> dict:
+        """Returns the number of running and queued jobs."""
+        with self.lock:
+            running = list(self.running)
+        return {
+            "size": self.size,
+            "running": running,
+            "queued": self.jobs.qsize(),
+        }
+
+    def close(self):
+        """Stops accepting jobs. Running jobs are not interrupted."""
+        self.jobs.put(None)
@@ -0,0 +1,174 @@
+# Other external libs
+import collections
+import glob
+import gzip
+import json
+import os
+import re
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Project libs
+from crawlers.constants import *
+
+DESCRIPTION_FILE = "file_description"
+COMPRESSION_EXTENSIONS = {
+    None: "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+
+class DescriptionWriter:
+    """
+    Writes descriptions into file_description.jsonl files keeping one buffer
+    per destination folder, and open handles for the max_handles most
+    recently written destinations (the least recently used handle is closed
+    when another one is needed). Buffers are written when they reach
+    flush_size bytes, when flush_interval seconds passed since the last
+    write, and when the writer is closed.
+
+    If compression or segment_size are set, descriptions are written to
+    numbered segments (file_description.<n>.jsonl[.gz|.zst]), and a new
+    segment is started whenever the current one reaches segment_size bytes of
+    uncompressed content.
+    """
+
+    def __init__(self, flush_size: int = DESCRIPTION_FLUSH_SIZE,
+                 flush_interval: float = DESCRIPTION_FLUSH_INTERVAL,
+                 compression: str = DESCRIPTION_COMPRESSION,
+                 segment_size: int = DESCRIPTION_SEGMENT_SIZE,
+                 max_handles: int = DESCRIPTION_MAX_HANDLES):
+        """
+        Keyword arguments:
+        flush_size -- int, bytes buffered per destination before writing
+        flush_interval -- float, maximum seconds a description stays buffered
+        compression -- None, "gzip" or "zstd"
+        segment_size -- int, uncompressed bytes per segment, None disables
+        rotation
+        max_handles -- int, maximum number of files kept open
+        """
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Invalid compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.compression = compression
+        self.segment_size = segment_size
+        self.segmented = compression is not None or segment_size is not None
+        self.max_handles = max(max_handles, 1)
+
+        self.buffers = {}
+        self.buffered_bytes = {}
+        # From the least to the most recently used
+        self.handles = collections.OrderedDict()
+        self.segment_index = {}
+        self.segment_bytes = {}
+        self.last_flush = time.monotonic()
+
+    def segment_path(self, destination: str, index: int) -> str:
+        extension = COMPRESSION_EXTENSIONS[self.compression]
+        return f"{destination}{DESCRIPTION_FILE}.{index}.jsonl{extension}"
+
+    def next_segment_index(self, destination: str) -> int:
+        """Returns the index following the last segment in destination."""
+        pattern = re.compile(re.escape(DESCRIPTION_FILE) + r"\.(\d+)\.jsonl")
+        indexes = [-1]
+        for path in glob.glob(f"{destination}{DESCRIPTION_FILE}.*.jsonl*"):
+            match = pattern.match(os.path.basename(path))
+            if match:
+                indexes.append(int(match.group(1)))
+        return max(indexes) + 1
+
+    def open_handle(self, destination: str):
+        if not self.segmented:
+            return open(f"{destination}{DESCRIPTION_FILE}.jsonl", "a+")
+
+        if destination not in self.segment_index:
+            self.segment_index[destination] = self.next_segment_index(destination)
+            self.segment_bytes[destination] = 0
+        # A segment reopened after its handle was closed is appended to (as
+        # a new gzip member or zstd frame)
+        path = self.segment_path(destination, self.segment_index[destination])
+
+        if self.compression == "gzip":
+            return gzip.open(path, "at")
+        if self.compression == "zstd":
+            compressor = zstandard.ZstdCompressor()
+            return zstandard.open(path, "at", cctx=compressor)
+        return open(path, "a+")
+
+    def get_handle(self, destination: str):
+        if destination in self.handles:
+            self.handles.move_to_end(destination)
+            return self.handles[destination]
+
+        while len(self.handles) >= self.max_handles:
+            _, f = self.handles.popitem(last=False)
+            f.close()
+        self.handles[destination] = self.open_handle(destination)
+        return self.handles[destination]
+
+    def rotate(self, destination: str):
+        """Closes the current segment of destination and starts a new one."""
+        self.handles.pop(destination).close()
+        self.segment_index[destination] += 1
+        self.segment_bytes[destination] = 0
+
+    def write(self, destination: str, description: dict):
+        """Buffers a description to be written in destination."""
+        if destination[-1] != "/":
+            destination = destination + "/"
+
+        line = json.dumps(description) + "\n"
+        self.buffers.setdefault(destination, []).append(line)
+        self.buffered_bytes[destination] = \
+            self.buffered_bytes.get(destination, 0) + len(line)
+
+        if self.buffered_bytes[destination] >= self.flush_size:
+            self.flush_destination(destination)
+
+    def flush_destination(self, destination: str):
+        lines = self.buffers.pop(destination, [])
+        self.buffered_bytes.pop(destination, None)
+        if len(lines) == 0:
+            return
+
+        content = "".join(lines)
+        f = self.get_handle(destination)
+        f.write(content)
+        f.flush()
+
+        if self.segment_size is not None:
+            self.segment_bytes[destination] += len(content)
+            if self.segment_bytes[destination] >= self.segment_size:
+                self.rotate(destination)
+
+    def flush(self):
+        """Writes the buffers of every destination."""
+        for destination in list(self.buffers):
+            self.flush_destination(destination)
+        self.last_flush = time.monotonic()
+
+    def flush_if_due(self) -> bool:
+        """
+        Writes every buffer if flush_interval has passed since the last
+        flush. Returns True if the buffers were written.
+        """
+        if time.monotonic() - self.last_flush < self.flush_interval:
+            return False
+        self.flush()
+        return True
+
+    def close(self):
+        """Writes pending descriptions and closes every handle."""
+        self.flush()
+        for f in self.handles.values():
+            f.close()
+        self.handles = collections.OrderedDict()
@@ -0,0 +1,296 @@
+"""
+Distributed execution of a crawl: the request queue and the seen requests of
+an instance are kept in Redis and shared by several workers, in one or many
+machines. Politeness is enforced globally: a domain receives at most one
+request every DISTRIBUTED_DELAY seconds, whichever worker sends it (worker
+clocks are assumed to be synchronized).
+
+Enabled by crawler_manager when distributed_workers is set. Additional
+workers for a running instance can be started in other machines (sharing the
+data path of the crawler) with:
+
+    python -m crawlers.distributed <config file> <worker index>
+"""
+
+# Scrapy and Twister libs
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.dupefilters import BaseDupeFilter
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.request import request_from_dict
+from twisted.internet.task import deferLater
+
+# Other external libs
+import json
+import os
+import pickle
+import random
+import socket
+import sys
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Project libs
+import crawling_utils
+from crawlers.constants import *
+
+
+# Connection used instead of REDIS_URL, see set_redis
+redis_connection = None
+
+# Reserves the next free slot of a domain (KEYS[1]) atomically, given the
+# current time and the delay (ARGV), returning the seconds to wait until it.
+# Returned as a string, as Redis truncates Lua numbers to integers
+RESERVE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local delay = tonumber(ARGV[2])
+local slot = math.max(tonumber(redis.call('GET', KEYS[1]) or 0), now)
+local ttl = math.floor((slot + delay - now) * 1000) + 1000
+redis.call('SET', KEYS[1], string.format('%.6f', slot + delay), 'PX', ttl)
+return string.format('%.6f', slot - now)
+"""
+
+
+def set_redis(connection):
+    """
+    Replaces the Redis connection of the workers of this process, e.g. by a
+    local stand-in (such as fakeredis) in tests.
+
+    Keyword arguments:
+    connection -- Redis client, or None to connect to REDIS_URL
+    """
+    global redis_connection
+    redis_connection = connection
+
+
+def get_redis(settings):
+    """Returns the connection set by set_redis, or one to REDIS_URL."""
+    if redis_connection is not None:
+        return redis_connection
+
+    if redis is None:
+        raise ValueError("distributed mode requires the redis package")
+    return redis.Redis.from_url(settings.get("REDIS_URL", REDIS_URL))
+
+
+class RedisDupeFilter(BaseDupeFilter):
+    """Keeps the fingerprints of seen requests in a Redis set."""
+
+    def __init__(self, server, key: str, fingerprinter):
+        """
+        Keyword arguments:
+        server -- Redis connection
+        key -- str, key of the set of fingerprints
+        fingerprinter -- Scrapy request fingerprinter
+        """
+        self.server = server
+        self.key = key
+        self.fingerprinter = fingerprinter
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        key = f"{crawler.settings.get('DISTRIBUTED_KEY')}:seen"
+        return cls(get_redis(crawler.settings), key,
+                   crawler.request_fingerprinter)
+
+    def request_seen(self, request) -> bool:
+        fingerprint = self.fingerprinter.fingerprint(request)
+        return self.server.sadd(self.key, fingerprint) == 0
+
+
+class RedisScheduler(BaseScheduler):
+    """
+    Scheduler sharing its queue with the other workers of the instance.
+    Requests are kept in one priority queue per domain, and domains are
+    visited in random order, so workers spread over them. Only domains with
+    queued requests are kept in the set of domains.
+
+    A worker only finishes after every worker was idle for
+    DISTRIBUTED_IDLE_TIMEOUT seconds, as the others may still add requests to
+    the queue.
+    """
+
+    def __init__(self, server, key: str, dupefilter,
+                 idle_timeout: float = DISTRIBUTED_IDLE_TIMEOUT, stats=None):
+        """
+        Keyword arguments:
+        server -- Redis connection
+        key -- str, prefix of the keys of the instance
+        dupefilter -- filter of seen requests
+        idle_timeout -- float, seconds without requests before the workers
+        finish
+        stats -- Scrapy stats collector
+        """
+        self.server = server
+        self.key = key
+        self.df = dupefilter
+        self.idle_timeout = idle_timeout
+        self.stats = stats
+        self.spider = None
+
+        self.domains_key = f"{key}:domains"
+        self.workers_key = f"{key}:workers"
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            server=get_redis(settings),
+            key=settings.get("DISTRIBUTED_KEY"),
+            dupefilter=RedisDupeFilter.from_crawler(crawler),
+            idle_timeout=settings.getfloat(
+                "DISTRIBUTED_IDLE_TIMEOUT", DISTRIBUTED_IDLE_TIMEOUT),
+            stats=crawler.stats,
+        )
+
+    def queue_key(self, domain: str) -> str:
+        return f"{self.key}:queue:{domain}"
+
+    def open(self, spider):
+        self.spider = spider
+        self.touch()
+
+    def close(self, reason):
+        self.server.zrem(self.workers_key, self.worker_id)
+
+    def touch(self):
+        """Registers that this worker is active now."""
+        self.server.zadd(self.workers_key, {self.worker_id: time.time()})
+
+    def workers_active(self) -> bool:
+        """Checks if a worker was active within idle_timeout."""
+        since = time.time() - self.idle_timeout
+        return self.server.zcount(self.workers_key, since, "+inf") > 0
+
+    def decode_domains(self, domains) -> list:
+        return [d.decode() if isinstance(d, bytes) else d for d in domains]
+
+    def __len__(self) -> int:
+        pipe = self.server.pipeline()
+        for domain in self.decode_domains(
+                self.server.smembers(self.domains_key)):
+            pipe.zcard(self.queue_key(domain))
+        return sum(pipe.execute())
+
+    def has_pending_requests(self) -> bool:
+        # Only domains with queued requests are in the set
+        return self.server.scard(self.domains_key) > 0 or \
+            self.workers_active()
+
+    def enqueue_request(self, request) -> bool:
+        if not request.dont_filter and self.df.request_seen(request):
+            self.df.log(request, self.spider)
+            return False
+
+        domain = crawling_utils.get_url_domain(request.url)
+        data = pickle.dumps(request.to_dict(spider=self.spider),
+                            protocol=pickle.HIGHEST_PROTOCOL)
+
+        pipe = self.server.pipeline()
+        pipe.zadd(self.queue_key(domain), {data: -request.priority})
+        pipe.sadd(self.domains_key, domain)
+        pipe.execute()
+
+        if self.stats is not None:
+            self.stats.inc_value("scheduler/enqueued/redis")
+        return True
+
+    def remove_domain(self, domain: str):
+        """
+        Removes a domain whose queue was emptied from the set of domains.
+        It is added back if another worker enqueued a request meanwhile, as
+        its sadd may have run before the srem.
+        """
+        self.server.srem(self.domains_key, domain)
+        if self.server.zcard(self.queue_key(domain)) > 0:
+            self.server.sadd(self.domains_key, domain)
+
+    def next_request(self):
+        # A random sample of the domains, instead of all of them
+        domains = self.decode_domains(self.server.srandmember(
+            self.domains_key, DISTRIBUTED_DOMAIN_SAMPLE))
+        random.shuffle(domains)
+
+        for domain in domains:
+            pipe = self.server.pipeline()
+            pipe.zpopmin(self.queue_key(domain))
+            pipe.zcard(self.queue_key(domain))
+            popped, remaining = pipe.execute()
+            if remaining == 0:
+                self.remove_domain(domain)
+            if len(popped) == 0:
+                continue
+
+            self.touch()
+            if self.stats is not None:
+                self.stats.inc_value("scheduler/dequeued/redis")
+
+            data, _ = popped[0]
+            return request_from_dict(pickle.loads(data), spider=self.spider)
+
+        return None
+
+
+class GlobalPolitenessMiddleware:
+    """
+    Downloader middleware delaying requests so that each domain receives at
+    most one request every DISTRIBUTED_DELAY seconds from all the workers.
+    The time of the next free slot of each domain is kept in Redis, and each
+    request reserves one before being sent, in a single call to a Lua script
+    run atomically by Redis, and waits for it without blocking the worker.
+    """
+
+    def __init__(self, server, key: str, delay: float):
+        """
+        Keyword arguments:
+        server -- Redis connection
+        key -- str, prefix of the keys of the instance
+        delay -- float, minimum seconds between requests to a domain
+        """
+        self.server = server
+        self.key = key
+        self.delay = delay
+        self.reserve_script = server.register_script(RESERVE_SLOT_SCRIPT)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(get_redis(settings), settings.get("DISTRIBUTED_KEY"),
+                   settings.getfloat("DISTRIBUTED_DELAY", 0))
+
+    def reserve_slot(self, domain: str) -> float:
+        """
+        Reserves the next free slot of the domain, returning the seconds to
+        wait until it.
+        """
+        slot_key = f"{self.key}:slot:{domain}"
+        wait = self.reserve_script(keys=[slot_key],
+                                   args=[repr(time.time()), repr(self.delay)])
+        return float(wait)
+
+    async def process_request(self, request, spider):
+        if self.delay <= 0:
+            return None
+
+        # Imported here, so importing this module doesn't install a reactor
+        from twisted.internet import reactor
+
+        wait = self.reserve_slot(crawling_utils.get_url_domain(request.url))
+        if wait > 0:
+            await maybe_deferred_to_future(
+                deferLater(reactor, wait, lambda: None))
+        return None
+
+
+if __name__ == "__main__":
+    from crawlers.crawler_manager import crawler_process
+
+    with open(sys.argv[1]) as f:
+        config = json.loads(f.read())
+    config["worker_index"] = int(sys.argv[2])
+
+    crawler_process(config)
@@ -0,0 +1,264 @@
+# Other external libs
+import multiprocessing
+import queue
+import threading
+import time
+
+import lxml.html
+import pandas
+
+# Project libs
+import parsing_html
+from binary import Extractor
+from crawlers.constants import *
+
+
+class ExtractionTimeout(Exception):
+    """Raised when an extraction job exceeds its time."""
+    pass
+
+
+class ExtractionWorkerDied(Exception):
+    """Raised when the worker process died while running a job."""
+    pass
+
+
+def worker_loop(connection):
+    """
+    Main loop of a worker process: runs the jobs (function, args) received
+    through connection, sending back ("result", value) or ("error",
+    exception), until it receives None.
+    """
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        function, args = job
+        try:
+            outcome = ("result", function(*args))
+        except Exception as e:
+            outcome = ("error", e)
+
+        try:
+            connection.send(outcome)
+        except Exception as e:
+            # The result or the exception could not be pickled
+            connection.send(("error", RuntimeError(repr(e))))
+
+
+def extract_html_content(html: str, output_filename: str, to_csv: bool,
+                         detect_kwargs: dict):
+    """
+    Extraction job: parses a stored page and writes its tables and divs to
+    output_filename.
+    """
+    tree = lxml.html.document_fromstring(html)
+    parsing_html.content.tree_detect_content(
+        tree, output_file=output_filename, to_csv=to_csv, **detect_kwargs)
+    return output_filename
+
+
+def extract_binary_tables(source_file: str, csv_folder: str, url_hash: str):
+    """
+    Extraction job: extracts the tables of a binary file into csv files.
+    Returns a list of tuples (file_name, relative_path) of the csv files.
+    """
+    # single DataFrame or list of DataFrames
+    results = Extractor(source_file).extra().read()
+
+    if type(results) == pandas.DataFrame:
+        results = [results]
+
+    extracted = []
+    for i in range(len(results)):
+        file_name = f"{url_hash}_{i}.csv"
+        relative_path = f"{csv_folder}{file_name}"
+        results[i].to_csv(relative_path, encoding='utf-8', index=False)
+        extracted.append((file_name, relative_path))
+
+    return extracted
+
+
+class ExtractionWorker:
+    """
+    A worker process running one extraction job at a time. The timeout of a
+    job is enforced from the spider process: the worker is killed and
+    replaced when it is exceeded, so long calls into C extensions (lxml,
+    pandas) or the JVM (tabula) can't hold it.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.process = None
+        self.connection = None
+
+    def start(self):
+        self.connection, child_connection = self.context.Pipe()
+        self.process = self.context.Process(
+            target=worker_loop, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def run(self, function, args: tuple, timeout: float):
+        """
+        Runs function(*args) in the worker process, returning its result or
+        raising its exception. Raises ExtractionTimeout after timeout
+        seconds (no limit if timeout is None).
+        """
+        if self.process is None or not self.process.is_alive():
+            self.start()
+
+        try:
+            self.connection.send((function, args))
+            finished = self.connection.poll(timeout or None)
+            if not finished:
+                self.kill()
+                raise ExtractionTimeout("Extraction took too long.")
+
+            status, value = self.connection.recv()
+        except (EOFError, OSError) as e:
+            # The process was killed (e.g. by the OS) during the job
+            self.kill()
+            raise ExtractionWorkerDied(f"Extraction worker died: {e}")
+
+        if status == "error":
+            raise value
+        return value
+
+    def kill(self):
+        if self.process is None:
+            return
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+    def stop(self):
+        """Lets the process finish after its current job."""
+        if self.process is None:
+            return
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+
+class ExtractionPool:
+    """
+    Runs extraction jobs in worker processes, so slow documents don't block
+    the spider. Each worker process is driven by a thread of the spider
+    process, which kills and replaces it when a job exceeds the timeout.
+    The callback of a job receives (result, error) and is called from that
+    thread when the job finishes. With workers set to 0, jobs run
+    synchronously in the calling thread.
+    """
+
+    def __init__(self, workers: int = EXTRACTION_WORKERS,
+                 timeout: float = EXTRACTION_TIMEOUT,
+                 start_method: str = EXTRACTION_START_METHOD):
+        """
+        Keyword arguments:
+        workers -- int, number of worker processes
+        timeout -- float, seconds a job may run before its worker is killed
+        start_method -- str, how worker processes are started ("forkserver"
+        or "spawn"; "spawn" is used where "forkserver" is not available)
+        """
+        self.workers = workers
+        self.timeout = timeout
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = "spawn"
+        self.context = multiprocessing.get_context(start_method)
+        self.jobs = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+
+        # Finished jobs, failed jobs, jobs stopped by the timeout and seconds
+        # from submission to the end
+        self.stats = {"jobs": 0, "errors": 0, "timeouts": 0, "time": 0.0,
+                      "max_time": 0.0}
+
+    def start_workers(self):
+        with self.lock:
+            if len(self.threads) > 0:
+                return
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self.worker, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def worker(self):
+        """Runs the queued jobs in a worker process until receiving None."""
+        process = ExtractionWorker(self.context)
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+
+            function, args, callback, started_at = job
+            try:
+                result = process.run(function, args, self.timeout)
+            except Exception as e:
+                self.record(started_at, e)
+                callback(None, e)
+            else:
+                self.record(started_at, None)
+                callback(result, None)
+
+        process.stop()
+
+    def record(self, started_at: float, error):
+        elapsed = time.monotonic() - started_at
+        with self.lock:
+            self.stats["jobs"] += 1
+            self.stats["errors"] += error is not None
+            self.stats["timeouts"] += isinstance(error, ExtractionTimeout)
+            self.stats["time"] += elapsed
+            self.stats["max_time"] = max(self.stats["max_time"], elapsed)
+
+    def get_stats(self) -> dict:
+        """
+        Returns the number of finished, failed and timed out jobs, and their
+        total, mean and maximum time in seconds.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        stats["mean_time"] = stats["time"] / stats["jobs"] if stats["jobs"] else 0
+        return stats
+
+    def submit(self, function, args: tuple, callback):
+        """Schedules function(*args), calling callback with its outcome."""
+        started_at = time.monotonic()
+        if self.workers <= 0:
+            try:
+                result = function(*args)
+            except Exception as e:
+                self.record(started_at, e)
+                callback(None, e)
+            else:
+                self.record(started_at, None)
+                callback(result, None)
+            return
+
+        self.start_workers()
+        self.jobs.put((function, args, callback, started_at))
+
+    def close(self, wait: bool = True):
+        """Stops the workers, waiting for pending jobs if wait is set."""
+        # The threads take the lock to record the stats of their jobs, so
+        # they are joined after releasing it
+        with self.lock:
+            threads, self.threads = self.threads, []
+        for _ in threads:
+            self.jobs.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
@@ -3,72 +3,138 @@ import datetime
 import json
 
 # Project libs
-from crawlers.base_messenger import BaseMessenger
+from crawlers.base_messenger import KafkaMessenger
+from crawlers.constants import *
+from crawlers.description_writer import DescriptionWriter
 
-class FileDescriptor(BaseMessenger):
-    TEMP_DESCRIPTION_FOLDER = "temp_description_folder"
+
+class FileDescriptor:
+    # Transport of descriptions, replaced by a LocalMessenger in tests
+    messenger = None
+
+    @staticmethod
+    def get_messenger():
+        """Returns the messenger in use, creating the Kafka one if needed."""
+        if FileDescriptor.messenger is None:
+            FileDescriptor.messenger = KafkaMessenger(FILE_DESCRIPTOR_TOPIC)
+        return FileDescriptor.messenger
+
+    @staticmethod
+    def set_messenger(messenger):
+        """
+        Replaces the transport of descriptions.
+
+        Keyword arguments:
+        messenger -- BaseMessenger instance
+        """
+        FileDescriptor.messenger = messenger
 
     @staticmethod
     def feed_description(destination, description):
         """
-        File source 'gambiarra'.
-        BaseMessenger.feed must be changed to a kafka producer when
-        integrations with Kafka and SC are complete.
+        Sends a description to be written by the description consumer.
 
         Keyword arguments:
         destination -- str, address of the folder that will containt the file
         description -- dict, dictionary of item descriptions
         """
-        BaseMessenger.feed(
-            FileDescriptor.TEMP_DESCRIPTION_FOLDER,
+        FileDescriptor.get_messenger().feed(
             {"destination": destination, "description": description}
         )
 
+    @staticmethod
+    def flush_descriptions():
+        """Blocks until every description fed was sent."""
+        FileDescriptor.get_messenger().flush()
+
     @staticmethod
     def stop_description_source():
         """
         Signals that the source should stop checking for new descriptions.
         """
-        BaseMessenger.stop_source(FileDescriptor.TEMP_DESCRIPTION_FOLDER)
+        FileDescriptor.get_messenger().stop_source()
 
     @staticmethod
-    def description_source(testing=False):
+    def description_source(testing=False, auto_commit=True):
         """
-        Description source 'gambiarra'.
-        BaseMessenger.source must be changed to a kafka producer when
-        integrations with Kafka and SC are complete.
-        
+        Yields batches of descriptions received by the messenger. Batches may
+        be empty when no description arrived for a while.
+
         Keyword arguments:
         testing -- do not use this argument. It is used to stop process if any
         error occurs during tests. (default False)
+        auto_commit -- bool, see BaseMessenger.source (default True)
         """
-        source = BaseMessenger.source(
-            FileDescriptor.TEMP_DESCRIPTION_FOLDER, testing)
-        for item in source:
-            yield item
+        source = FileDescriptor.get_messenger().source(
+            auto_commit=auto_commit, testing=testing)
+        for batch in source:
+            yield batch
 
     @staticmethod
-    def description_consumer(testing=False):
+    def description_consumer(testing=False, writer=None):
         """
         Writes description of items from FileDescriptor.description_source.
-        Items must be json strings of dictionaries containing the following
-        keys:
+        Items must be dictionaries containing the following keys:
         - destination: str, address of the folder that contains the file
           file_description.jsonl
-        - description: str, file description
+        - description: dict, file description
+
+        Descriptions are buffered by a DescriptionWriter, and only
+        acknowledged to the messenger after they were written to disk. If
+        writing fails, nothing more is acknowledged, so the descriptions of
+        the failed batch are received again by the next consumer.
 
         Keyword arguments:
         testing -- do not use this argument. It is used to stop process if any
         error occurs during tests. (default False)
+        writer -- DescriptionWriter to use (default: one with the settings in
+        crawlers.constants)
         """
         print(
             "==============================================================\n",
-            f"Starting file decription consumer at", 
+            f"Starting file decription consumer at",
             datetime.datetime.now().isoformat()
         )
-        for item_json in FileDescriptor.description_source(testing):
-            item = json.loads(item_json)
-            FileDescriptor.write_description(item)
+        if writer is None:
+            writer = DescriptionWriter()
+
+        messenger = FileDescriptor.get_messenger()
+        try:
+            source = FileDescriptor.description_source(testing, auto_commit=False)
+            for batch in source:
+                for item in batch:
+                    writer.write(item["destination"], item["description"])
+
+                if writer.flush_if_due():
+                    messenger.commit()
+
+            # Every batch received was fully written
+            writer.close()
+            messenger.commit()
+        finally:
+            writer.close()
+            messenger.close_source()
+
+    @staticmethod
+    def write_descriptions(items):
+        """
+        Writes a batch of descriptions, with a single append per destination.
+        Keyword arguments:
+        items -- a list of dicts, in the format expected by write_description
+        """
+        lines_by_file = {}
+        for item in items:
+            destination = item["destination"]
+            if destination[-1] != "/":
+                destination = destination + "/"
+            file_address = destination + "file_description.jsonl"
+
+            lines = lines_by_file.setdefault(file_address, [])
+            lines.append(json.dumps(item["description"]) + "\n")
+
+        for file_address, lines in lines_by_file.items():
+            with open(file_address, "a+") as f:
+                f.write("".join(lines))
 
     @staticmethod
     def write_description(item):
@@ -80,10 +146,4 @@ class FileDescriptor(BaseMessenger):
           file_description.jsonl
         - description: a dict with file description
         """
-        if item["destination"][-1] != "/":
-            item["destination"] = item["destination"] + "/"
-        file_address = item["destination"] + "file_description.jsonl"
-        
-        with open(file_address, "a+") as f:
-            f.write(json.dumps(item["description"]))
-            f.write("\n")
+        FileDescriptor.write_descriptions([item])
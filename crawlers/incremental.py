@@ -0,0 +1,142 @@
+"""
+Incremental crawls: the ETag and Last-Modified headers of the pages and files
+stored are kept per URL, shared by every instance of a crawler, and sent back
+as If-None-Match and If-Modified-Since in the next runs. Servers answer 304
+(Not Modified) for content that did not change, which is then neither
+downloaded nor processed again.
+"""
+
+# Scrapy and Twister libs
+from scrapy.exceptions import NotConfigured
+
+# Other external libs
+import json
+import sqlite3
+import threading
+
+# Project libs
+from crawlers.constants import *
+
+
+class ValidatorStore:
+    """
+    Keeps, for each URL, the validators (ETag and Last-Modified) of its last
+    stored response and a record of what was stored. Kept in a SQLite
+    database, so it can be shared by the processes of a crawler.
+    """
+
+    def __init__(self, path: str):
+        """
+        Keyword arguments:
+        path -- str, path of the database file
+        """
+        self.lock = threading.Lock()
+        self.pending = 0
+
+        self.connection = sqlite3.connect(path, check_same_thread=False,
+                                          timeout=VALIDATORS_LOCK_TIMEOUT)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS validators ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "record TEXT)"
+        )
+        self.connection.commit()
+
+    def get(self, url: str):
+        """
+        Returns a dict with the etag, last_modified and record of url, or
+        None if it was never stored.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, record FROM validators "
+                "WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+
+        etag, last_modified, record = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "record": json.loads(record),
+        }
+
+    def conditional_headers(self, url: str) -> dict:
+        """Returns the headers of a conditional request for url."""
+        validators = self.get(url)
+        if validators is None:
+            return {}
+
+        headers = {}
+        if validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def put(self, url: str, headers, record: dict):
+        """
+        Saves the validators in the headers (dict-like, with str or bytes
+        values) of the response of url, with a record (JSON serializable) of
+        the stored content. Responses without validators are not saved.
+        """
+        def header(name):
+            value = headers.get(name)
+            if isinstance(value, bytes):
+                value = value.decode("latin-1")
+            return value
+
+        etag = header("ETag")
+        last_modified = header("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(record)))
+            self.pending += 1
+            if self.pending >= VALIDATORS_COMMIT_SIZE:
+                self.connection.commit()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
+
+
+class ConditionalRequestMiddleware:
+    """
+    Downloader middleware adding the validators of the previous runs to the
+    GET requests of the spider (its validators attribute, a ValidatorStore),
+    and letting 304 responses reach the callbacks. Requests that handle every
+    status themselves (probing requests) are sent unchanged.
+    """
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("INCREMENTAL_CRAWL_ENABLED"):
+            raise NotConfigured
+        return cls()
+
+    def process_request(self, request, spider):
+        validators = getattr(spider, "validators", None)
+        if (
+            validators is None or
+            request.method != "GET" or
+            request.meta.get("handle_httpstatus_all")
+        ):
+            return None
+
+        headers = validators.conditional_headers(request.url)
+        if len(headers) == 0:
+            return None
+
+        for name, value in headers.items():
+            request.headers.setdefault(name, value)
+
+        handled = request.meta.get("handle_httpstatus_list", [])
+        if 304 not in handled:
+            request.meta["handle_httpstatus_list"] = list(handled) + [304]
+        return None
@@ -0,0 +1,260 @@
+# Other external libs
+import os
+import queue
+import threading
+
+import requests
+
+# Project libs
+from crawlers.content_probe import HEAD_HEADERS
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 0
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_RETRIES = 3
+PARTIAL_SUFFIX = ".part"
+# Seconds close waits for cancelled transfers to stop
+CANCEL_TIMEOUT = 10
+
+
+class DownloadCancelled(Exception):
+    """Raised in the workers when the transfers are cancelled by close."""
+    pass
+
+
+class LargeFileDownloader:
+    """
+    Downloads large files in background threads, so the spider keeps crawling
+    while they are transferred. Files are streamed to a partial file and
+    moved to their final path when complete; an interrupted transfer is
+    resumed with an HTTP Range request. Partial files of cancelled transfers
+    are kept, so they are resumed by the next run of the instance.
+    """
+
+    def __init__(self, resolve_destination, on_complete,
+                 conditional_headers=None, on_unchanged=None, delay: float = 0,
+                 workers: int = DEFAULT_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        """
+        Keyword arguments:
+        resolve_destination -- callable receiving (url, content_type,
+        content_disposition) and returning (file_name, relative_path,
+        extension)
+        on_complete -- callable receiving (url, file_name, referer,
+        extension, headers), called after a file is completely stored, with
+        the headers of the response
+        conditional_headers -- callable receiving url and returning the
+        headers of a conditional request for it, or None
+        on_unchanged -- callable receiving (url, referer), called instead of
+        downloading files the server reports as not modified
+        delay -- float, seconds each worker waits between downloads
+        workers -- int, number of concurrent downloads
+        queue_size -- int, maximum number of pending downloads, 0 for no
+        limit; submit never blocks, downloads submitted when the queue is
+        full are dropped
+        chunk_size -- int, size in bytes of the chunks read and written
+        max_retries -- int, attempts to resume a failed transfer
+        """
+        self.resolve_destination = resolve_destination
+        self.on_complete = on_complete
+        self.conditional_headers = conditional_headers
+        self.on_unchanged = on_unchanged
+        self.delay = delay if delay else 0
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+
+        self.lock = threading.Lock()
+        self.progress = {}
+        self.dropped = 0
+        self.cancelled = threading.Event()
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        for _ in range(workers):
+            thread = threading.Thread(target=self.worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, url: str, referer: str):
+        """
+        Schedules the download of url. Called from the reactor thread, so it
+        must not block.
+        """
+        with self.lock:
+            self.progress[url] = (0, None)
+
+        try:
+            self.queue.put_nowait((url, referer))
+        except queue.Full:
+            with self.lock:
+                self.progress.pop(url, None)
+                self.dropped += 1
+            print(f"Download queue full, dropping large file {url}")
+
+    def get_progress(self) -> dict:
+        """
+        Returns a dict mapping each pending URL to a tuple (bytes downloaded,
+        total bytes), where total is None if unknown.
+        """
+        with self.lock:
+            return dict(self.progress)
+
+    def get_stats(self) -> dict:
+        """
+        Returns the number of pending downloads (queued or in progress) and
+        of downloads dropped because the queue was full.
+        """
+        with self.lock:
+            return {"pending": len(self.progress), "dropped": self.dropped}
+
+    def worker(self):
+        # requests.Session is not thread safe, each worker has its own
+        session = requests.Session()
+        session.headers.update(HEAD_HEADERS)
+
+        while True:
+            job = self.queue.get()
+            if job is None:
+                self.queue.task_done()
+                break
+
+            url, referer = job
+            try:
+                self.download(session, url, referer)
+            except DownloadCancelled:
+                print(f"Download of large file {url} cancelled")
+            except Exception as e:
+                print(
+                    f"Could not download large file {url} -",
+                    f"message: {str(type(e))}-{e}"
+                )
+            finally:
+                with self.lock:
+                    self.progress.pop(url, None)
+                self.queue.task_done()
+
+            if self.delay:
+                self.cancelled.wait(self.delay)
+
+        session.close()
+
+    def update_progress(self, url: str, downloaded: int, total):
+        with self.lock:
+            self.progress[url] = (downloaded, total)
+
+    def download(self, session: requests.Session, url: str, referer: str):
+        """
+        Downloads url with the session of the worker, resuming a previous
+        partial transfer if any.
+        """
+        print(f"Saving large file {url}")
+
+        headers = {}
+        if self.conditional_headers is not None:
+            headers = self.conditional_headers(url)
+
+        # Head type request to obtain the mimetype and/or file name to be
+        # downloaded on the server
+        with session.head(url, allow_redirects=True,
+                               headers=headers) as response:
+            if response.status_code == 304 and self.on_unchanged is not None:
+                print(f"Large file {url} not modified since the previous run")
+                self.on_unchanged(url, referer)
+                return
+
+            response_headers = response.headers
+            content_type = response.headers.get("Content-type", "")
+            content_disposition = response.headers.get("Content-Disposition", "")
+
+        if self.cancelled.is_set():
+            raise DownloadCancelled()
+
+        file_name, relative_path, extension = self.resolve_destination(
+            url, content_type, content_disposition)
+        partial_path = relative_path + PARTIAL_SUFFIX
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.stream_to_file(session, url, partial_path)
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"Download of {url} interrupted ({e}), resuming...")
+
+        os.replace(partial_path, relative_path)
+        print(f"Large file {url} stored at {relative_path}")
+
+        self.on_complete(url, file_name, referer, extension, response_headers)
+
+    def stream_to_file(self, session: requests.Session, url: str,
+                       partial_path: str):
+        """Streams url to partial_path, appending to existing content."""
+        offset = 0
+        if os.path.exists(partial_path):
+            offset = os.path.getsize(partial_path)
+
+        headers = {}
+        if offset > 0:
+            headers["Range"] = f"bytes={offset}-"
+
+        # The stream parameter is not to save in memory
+        with session.get(url, stream=True, allow_redirects=True,
+                              headers=headers) as req:
+            if req.status_code == 416:
+                # The partial file already has all the content
+                return
+
+            req.raise_for_status()
+
+            mode = "ab"
+            if req.status_code != 206:
+                # Server ignored the Range header, start over
+                offset = 0
+                mode = "wb"
+
+            total = req.headers.get("Content-Length")
+            if total is not None:
+                total = int(total) + offset
+
+            downloaded = offset
+            last_report = 0
+            with open(partial_path, mode, buffering=self.chunk_size) as f:
+                for chunk in req.iter_content(chunk_size=self.chunk_size):
+                    if self.cancelled.is_set():
+                        raise DownloadCancelled()
+
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    self.update_progress(url, downloaded, total)
+
+                    if total and downloaded - last_report >= total / 10:
+                        last_report = downloaded
+                        print(f"Downloading {url}: {100 * downloaded // total}%")
+
+    def close(self, wait: bool = True):
+        """
+        Stops the workers. If wait is set, pending downloads are finished
+        before returning. Otherwise the queued downloads are discarded and
+        the active transfers are cancelled after their current chunk,
+        keeping their partial files.
+        """
+        if not wait:
+            self.cancelled.set()
+            while True:
+                try:
+                    job = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    with self.lock:
+                        self.progress.pop(job[0], None)
+                self.queue.task_done()
+
+        for _ in self.threads:
+            self.queue.put(None)
+
+        for thread in self.threads:
+            thread.join(None if wait else CANCEL_TIMEOUT)
@@ -0,0 +1,211 @@
+"""
+Structured metrics of a crawler process, written periodically as a JSON
+snapshot next to its logs (see crawler_manager.get_metrics_path), where the
+interface reads them without touching the crawler process.
+"""
+
+# Scrapy and Twister libs
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet.task import LoopingCall
+
+# Other external libs
+import json
+import os
+import time
+
+# Project libs
+import crawling_utils
+from crawlers.constants import *
+
+# Prefixes of the Scrapy stats counting errors, by type
+ERROR_STATS = {
+    "download": "downloader/exception_type_count/",
+    "spider": "spider_exceptions/",
+}
+
+
+class MetricsExtension:
+    """
+    Scrapy extension collecting throughput (pages and bytes per second),
+    queue size, download latency histograms per domain, extraction time and
+    errors by type, and writing them to METRICS_PATH every METRICS_INTERVAL
+    seconds and when the spider closes.
+    """
+
+    def __init__(self, crawler, path: str, interval: float):
+        """
+        Keyword arguments:
+        crawler -- Scrapy crawler
+        path -- str, file where snapshots are written
+        interval -- float, seconds between snapshots
+        """
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.path = path
+        self.interval = interval
+
+        self.spider = None
+        self.started_at = None
+        self.last_snapshot = None
+        self.latency = {}
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("METRICS_PATH")
+        if not path:
+            raise NotConfigured
+
+        extension = cls(crawler, path, crawler.settings.getfloat(
+            "METRICS_INTERVAL", METRICS_INTERVAL))
+        crawler.signals.connect(extension.spider_opened,
+                                signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed,
+                                signal=signals.spider_closed)
+        crawler.signals.connect(extension.response_received,
+                                signal=signals.response_received)
+        return extension
+
+    def spider_opened(self, spider):
+        self.spider = spider
+        self.started_at = time.time()
+        self.last_snapshot = (self.started_at, 0, 0)
+
+        self.task = LoopingCall(self.write_snapshot)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.write_snapshot(reason)
+
+    def response_received(self, response, request, spider):
+        latency = request.meta.get("download_latency")
+        if latency is None:
+            return
+
+        domain = crawling_utils.get_url_domain(request.url)
+        if domain not in self.latency:
+            self.latency[domain] = {
+                "count": 0,
+                "total": 0,
+                "buckets": [0] * (len(METRICS_LATENCY_BUCKETS) + 1),
+            }
+
+        histogram = self.latency[domain]
+        histogram["count"] += 1
+        histogram["total"] += latency
+        for i, bound in enumerate(METRICS_LATENCY_BUCKETS):
+            if latency <= bound:
+                histogram["buckets"][i] += 1
+                break
+        else:
+            histogram["buckets"][-1] += 1
+
+    def get_latency(self) -> dict:
+        """Returns the latency histogram of each domain, in seconds."""
+        labels = [str(bound) for bound in METRICS_LATENCY_BUCKETS] + ["+Inf"]
+        return {
+            domain: {
+                "count": histogram["count"],
+                "mean": histogram["total"] / histogram["count"],
+                "histogram": dict(zip(labels, histogram["buckets"])),
+            }
+            for domain, histogram in self.latency.items()
+        }
+
+    def get_errors(self, stats: dict) -> dict:
+        """Returns the number of errors of each type, by origin."""
+        errors = {}
+        for origin, prefix in ERROR_STATS.items():
+            errors[origin] = {
+                key[len(prefix):]: value
+                for key, value in stats.items()
+                if key.startswith(prefix) and "/" not in key[len(prefix):]
+            }
+
+        prefix = "downloader/response_status_count/"
+        errors["http_status"] = {
+            key[len(prefix):]: value
+            for key, value in stats.items()
+            if key.startswith(prefix) and int(key[len(prefix):]) >= 400
+        }
+        return errors
+
+    def get_metrics(self, reason: str = None) -> dict:
+        """Returns the current metrics of the process."""
+        stats = self.stats.get_stats()
+        now = time.time()
+
+        pages = stats.get("response_received_count", 0)
+        response_bytes = stats.get("downloader/response_bytes", 0)
+        last_time, last_pages, last_bytes = self.last_snapshot
+        interval = max(now - last_time, 1e-6)
+        self.last_snapshot = (now, pages, response_bytes)
+
+        enqueued = stats.get("scheduler/enqueued",
+                             stats.get("scheduler/enqueued/redis", 0))
+        dequeued = stats.get("scheduler/dequeued",
+                             stats.get("scheduler/dequeued/redis", 0))
+
+        metrics = {
+            "instance_id": self.spider.config["instance_id"],
+            "worker_index": self.spider.config.get("worker_index", 0),
+            "pid": os.getpid(),
+            "time": now,
+            "elapsed": now - self.started_at,
+            "finish_reason": reason,
+            "pages": {
+                "total": pages,
+                "per_second": (pages - last_pages) / interval,
+            },
+            "bytes": {
+                "total": response_bytes,
+                "per_second": (response_bytes - last_bytes) / interval,
+            },
+            "queue": {
+                "size": enqueued - dequeued,
+                "enqueued": enqueued,
+                "dequeued": dequeued,
+            },
+            "latency": self.get_latency(),
+            "errors": self.get_errors(stats),
+            "adaptive_concurrency": {
+                key[len("adaptive_concurrency/"):]: value
+                for key, value in stats.items()
+                if key.startswith("adaptive_concurrency/")
+            },
+            "seen_urls": {
+                "count": stats.get("seen_urls/count", 0),
+                "memory": stats.get("seen_urls/memory", 0),
+            },
+            "probe_cache": {
+                key[len("probe_cache/"):]: value
+                for key, value in stats.items()
+                if key.startswith("probe_cache/")
+            },
+        }
+
+        extraction_pool = getattr(self.spider, "extraction_pool", None)
+        if extraction_pool is not None:
+            metrics["extraction"] = extraction_pool.get_stats()
+
+        downloader = getattr(self.spider, "large_file_downloader", None)
+        if downloader is not None:
+            metrics["large_files"] = downloader.get_stats()
+
+        return metrics
+
+    def write_snapshot(self, reason: str = None):
+        """Writes the current metrics, replacing the previous snapshot."""
+        try:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.get_metrics(reason), f, default=str)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(
+                f"Could not write metrics to {self.path} -",
+                f"message: {str(type(e))}-{e}"
+            )
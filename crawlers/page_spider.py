@@ -3,18 +3,18 @@ from scrapy_puppeteer import PuppeteerRequest
 
 # Scrapy and Twister libs
 import scrapy
-from scrapy.linkextractors import LinkExtractor
 from scrapy.http import HtmlResponse
 
 # Other external libs
 import logging
 import re
 import json
-import requests
-import time
 
 # Project libs
 from crawlers.base_spider import BaseSpider
+from crawlers.constants import *
+from crawlers.content_probe import ContentProbe
+from crawlers.url_extractor import UrlExtractor, UrlScorer, FILE_URL_PATTERN
 import crawling_utils
 
 LARGE_CONTENT_LENGTH = 1e9
@@ -23,36 +23,72 @@ LARGE_CONTENT_LENGTH = 1e9
 class PageSpider(BaseSpider):
     name = 'page_spider'
 
+    def __init__(self, config, *a, **kw):
+        super().__init__(config, *a, **kw)
+
+        # Results of the HEAD requests classifying links and files, shared
+        # by all pages
+        self.content_probe = ContentProbe()
+
+        # Extraction rules are compiled once and reused for every page. The
+        # configuration is copied, as it is also sent in the requests meta
+        self.links_extractor = UrlExtractor.from_config(
+            self.preprocess_link_configs(dict(self.config)), "link_extractor")
+        self.files_extractor = None
+        if self.config.get("download_files"):
+            self.files_extractor = UrlExtractor.from_config(
+                self.preprocess_download_configs(dict(self.config)),
+                "download_files")
+
+        # Requests of links matching higher scored patterns are sent first
+        self.url_scorer = None
+        frontier_order = self.config.get("link_extractor_frontier_order")
+        if (frontier_order or FRONTIER_ORDER) == "priority":
+            self.url_scorer = UrlScorer.from_text(
+                self.config.get("link_extractor_priority_patterns"))
+        self.max_depth = self.config.get("link_extractor_max_depth")
+
     def start_requests(self):
         print("At StaticPageSpider.start_requests")
 
-        for req in self.generate_initial_requests():
-            if self.config.get("dynamic_processing", False):
-                steps = json.loads(self.config["steps"])
-
-                yield PuppeteerRequest(url=req['url'],
-                    callback=self.dynamic_parse,
-                    dont_filter=True,
-                    meta={
-                        "referer": "start_requests",
-                        "config": self.config
-                    },
-                    steps=steps)
-            else:
-                # Don't send an empty dict, may cause spider to be blocked
-                body_contents = None
-                if bool(req['body']):
-                    body_contents = json.dumps(req['body'])
-
-                yield scrapy.Request(url=req['url'],
-                    method=req['method'],
-                    body=body_contents,
-                    callback=self.parse,
-                    meta={
-                        "referer": "start_requests",
-                        "config": self.config
-                },
-                    errback=self.errback_httpbin)
+        for request in self.start_initial_requests():
+            yield request
+
+    def make_initial_request(self, req):
+        meta = {
+            "referer": "start_requests",
+            "config": self.config,
+            "initial_request": req,
+        }
+        if req['probe']:
+            # The response handlers decide which status codes are valid
+            meta["handle_httpstatus_all"] = True
+
+        # Initial requests go through the dupefilter, so those already sent
+        # before an instance was resumed are not repeated (see
+        # BaseSpider.initial_request_dropped)
+        if self.config.get("dynamic_processing", False):
+            steps = json.loads(self.config["steps"])
+            req["callback"] = "dynamic_parse"
+
+            return PuppeteerRequest(url=req['url'],
+                callback=self.parse_initial_request,
+                errback=self.errback_initial_request,
+                meta=meta,
+                steps=steps)
+
+        # Don't send an empty dict, may cause spider to be blocked
+        body_contents = None
+        if bool(req['body']):
+            body_contents = json.dumps(req['body'])
+        req["callback"] = "parse"
+
+        return scrapy.Request(url=req['url'],
+            method=req['method'],
+            body=body_contents,
+            callback=self.parse_initial_request,
+            meta=meta,
+            errback=self.errback_initial_request)
 
     def convert_allow_extesions(self, config):
         """Converts 'allow_extesions' configuration into 'deny_extesions'."""
@@ -71,24 +107,12 @@ class PageSpider(BaseSpider):
             ]
         return config
 
-    def get_url_content_type_and_lenght(self, url) -> tuple:
-        """Retrieves the type of URL content and its size"""
-        
-        # TODO: Use antiblock mechanisms here 
-        headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.66 Safari/537.36'}
-        response = requests.head(url, allow_redirects=True, headers=headers)
-
-        content_type = response.headers.get('Content-Type')
-        content_lenght = int(response.headers.get('Content-Length', '0'))
-
-        response.close()
-
-        return url, content_type, content_lenght
-
     def filter_list_of_urls(self, url_list, pattern):
-        """Filter a list of urls according to a regex pattern."""
+        """Filter a list of urls according to a regex pattern (str or compiled)."""
+        search = re.compile(pattern).search
+
         def allow(url):
-            if (re.search(pattern, url) is not None):
+            if (search(url) is not None):
                 # print(f"ADDING link (passed regex filter) - {url}")
                 return True
             # print(f"DISCARDING link (filtered by regex) - {url}")
@@ -98,41 +122,32 @@ class PageSpider(BaseSpider):
 
         return urls_filtered
 
-    def filter_type_of_urls_and_split_small_content(self, url_list, page_flag, split_large_content=True):
-        """Filter a list of urls according to the Content-Type and split urls with small content (avoiding send too many requests
-        to the server to verify if the content is large or not)
+    def classify_probed_url(self, url, content_type, content_length, purposes) -> tuple:
         """
-        def allow_type(url_with_type_and_lenght):
-            req_head = url_with_type_and_lenght[1]
-            if (('html' in req_head) and page_flag) or (('html' not in req_head) and not page_flag):
-                return True
-            return False
-
-        urls_with_type_and_lenght = [self.get_url_content_type_and_lenght(url) for url in url_list]
-        urls_with_type_and_lenght_filtered = set(filter(allow_type, urls_with_type_and_lenght))
-
-        urls = set(url_type_lenght[0] for url_type_lenght in urls_with_type_and_lenght_filtered)         
-        if split_large_content:
-            urls_with_small_content = set(url_type_lenght[0] 
-                                            for url_type_lenght in urls_with_type_and_lenght
-                                            if url_type_lenght[2] < LARGE_CONTENT_LENGTH)
-
-            return urls_with_small_content, urls.difference(urls_with_small_content)
+        Decides what to do with a probed url, from its Content-Type and
+        Content-Length and the reasons it was probed (see parse). Returns a
+        tuple (request, large_file): whether to request the url, or to
+        download it as a large file.
+        """
+        is_html = 'html' in content_type
+        small = content_length < LARGE_CONTENT_LENGTH
 
-        return urls
+        request = large_file = False
+        if "page" in purposes and is_html:
+            request = True
 
-    def split_urls_in_small_content(self, url_list):
-        def is_small_content(url):
-            # TODO: Use antiblock mechanisms here 
-            headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.66 Safari/537.36'}
-            response = requests.head(url, allow_redirects=True, headers=headers)
-            content_lenght = int(response.headers.get('Content-Length', '0'))
-            response.close()
+        # Files found with the type check: pages are only files if their URL
+        # has a file extension
+        is_file = "file" in purposes
+        if "typed_file" in purposes:
+            is_file = is_file or not is_html or \
+                FILE_URL_PATTERN.search(url) is not None
 
-            return content_lenght < LARGE_CONTENT_LENGTH
+        if is_file:
+            request = request or small
+            large_file = not small
 
-        urls_small_content = set(url for url in url_list if is_small_content(url))
-        return urls_small_content, set(url_list).difference(urls_small_content)
+        return request, large_file
 
     def preprocess_listify(self, value, default):
         """Converts a string of ',' separaded values into a list."""
@@ -144,40 +159,24 @@ class PageSpider(BaseSpider):
 
     def preprocess_link_configs(self, config):
         """Process link_extractor configurations."""
-        if "link_extractor_processed" in config:
-            return config
-
         defaults = [
             ("link_extractor_tags", ('a', 'area')),
             ("link_extractor_allow_domains", None),
             ("link_extractor_attrs", ('href',))
         ]
         for attr, default in defaults:
-            config[attr] = self.preprocess_listify(config[attr], default)
-
-        config["link_extractor_processed"] = True
+            config[attr] = self.preprocess_listify(config.get(attr), default)
 
         return config
 
     def extract_links(self, response):
-        """Filter and return a set with links found in this response."""
-        config = self.preprocess_link_configs(response.meta["config"])
-
-        links_extractor = LinkExtractor(
-            allow_domains=config["link_extractor_allow_domains"],
-            tags=config["link_extractor_tags"],
-            attrs=config["link_extractor_attrs"],
-            process_value=config["link_extractor_process_value"],
-        )
-
-        urls_found = {i.url for i in links_extractor.extract_links(response)}
-
-        pattern = config["link_extractor_allow_url"]
-        if pattern is not None and pattern != "":
-            urls_found = self.filter_list_of_urls(urls_found, pattern)
-
-        if config["link_extractor_check_type"]:
-            urls_found = self.filter_type_of_urls_and_split_small_content(urls_found, True, False)
+        """
+        Filter and return a set with links found in this response. If their
+        type must be checked, they are only followed if probing shows they
+        are pages, see parse.
+        """
+        # Seen links are dropped before being probed
+        urls_found = self.unseen_urls(self.links_extractor.extract(response))
 
         print("Links kept: ", urls_found)
 
@@ -185,67 +184,33 @@ class PageSpider(BaseSpider):
 
     def preprocess_download_configs(self, config):
         """Process download_files configurations."""
-        if "download_files_processed" in config:
-            return config
-
         defaults = [
             ("download_files_tags", ('a', 'area')),
             ("download_files_allow_domains", None),
             ("download_files_attrs", ('href',))
         ]
         for attr, default in defaults:
-            config[attr] = self.preprocess_listify(config[attr], default)
-
-        config = self.convert_allow_extesions(config)
+            config[attr] = self.preprocess_listify(config.get(attr), default)
 
-        attr = "download_files_process_value"
-        if config[attr] is not None and len(config[attr]) > 0 and type(config[attr]) is str:
-            config[attr] = eval(config[attr])
-
-        config["download_files_processed"] = True
-
-        return config
+        return self.convert_allow_extesions(config)
 
     def extract_files(self, response):
-        """Filter and return a set with links found in this response."""
-        config = self.preprocess_download_configs(response.meta["config"])
-
-        links_extractor = LinkExtractor(
-            allow_domains=config["download_files_allow_domains"],
-            tags=config["download_files_tags"],
-            attrs=config["download_files_attrs"],
-            process_value=config["download_files_process_value"],
-            deny_extensions=config["download_files_deny_extensions"]
-        )
-        urls_found = {i.url for i in links_extractor.extract_links(response)}
-
-        pattern = config["download_files_allow_url"]
-
-        if pattern is not None and pattern != "":
-            urls_found = self.filter_list_of_urls(urls_found, pattern)
-
-        
-        urls_small_content = set()
-        urls_large_content = set()
-        
-        if config["download_files_check_type"]:
-            urls_small_content, urls_large_content = self.filter_type_of_urls_and_split_small_content(urls_found, False)
-
-        urls_files = self.filter_list_of_urls(
-            urls_found, r"(.*\.[a-z]{3,4}$)(.*(?<!\.html)$)(.*(?<!\.php)$)")
-
-        urls_files = urls_files.difference(urls_small_content)
-        urls_files = urls_files.difference(urls_large_content)
+        """
+        Filter and return a set with the files found in this response. Their
+        size (and type, if it must be checked) is known after probing them,
+        see parse.
+        """
+        config = response.meta["config"]
 
-        urls_small_content_b, urls_large_content_b = self.split_urls_in_small_content(urls_files)
+        urls_found = self.unseen_urls(self.files_extractor.extract(response))
 
-        urls_small_content = urls_small_content.union(urls_small_content_b)
-        urls_large_content = urls_large_content.union(urls_large_content_b)
+        if not config["download_files_check_type"]:
+            # Only URLs with file extensions are files
+            urls_found = self.filter_list_of_urls(urls_found, FILE_URL_PATTERN)
 
-        print(f"+{len(urls_small_content)} small files detected: ", urls_small_content)
-        print(f"+{len(urls_large_content)} large files detected: ", urls_large_content)
+        print(f"+{len(urls_found)} files detected: ", urls_found)
 
-        return urls_small_content, urls_large_content
+        return urls_found
 
     def extract_imgs(self, response):
         url_domain = crawling_utils.get_url_domain(response.url)
@@ -275,56 +240,179 @@ class PageSpider(BaseSpider):
             for request in self.parse(dynamic_response):
                 yield request
 
+    def load_stored_page(self, response, description):
+        """
+        Rebuilds the response of a page not modified since a previous run
+        from its stored copy. Returns None if the content is not a stored
+        page (e.g. a small file) or the copy is gone.
+        """
+        if description is None or "text/html" not in description.get("type", ""):
+            return None
+
+        try:
+            with open(description["relative_path"], "rb") as f:
+                body = f.read()
+        except (KeyError, OSError):
+            print(f"No stored copy of {response.url} to follow links from")
+            return None
+
+        return HtmlResponse(
+            response.url,
+            status=200,
+            body=body,
+            request=response.request
+        )
+
     def parse(self, response):
         """
         Parse responses of static pages.
         Will try to follow links if config["explore_links"] is set.
         """
-        response_type = response.headers['Content-type']
-        print(f"Parsing {response.url}, type: {response_type}")
+        if response.status == 304:
+            # Incremental crawl, the page was stored by a previous run. It is
+            # not stored again, but its links are still followed from the
+            # stored copy, as the pages they point to may have changed
+            print(f"Not modified since the previous run: {response.url}")
+            description = self.store_unchanged(
+                response.url, response.meta["referer"])
+            response = self.load_stored_page(response, description)
+            if response is None:
+                return
 
-        config = response.request.meta['config']
+            config = response.request.meta['config']
+            if self.stop():
+                return
 
-        if self.stop():
-            return
+        else:
+            response_type = response.headers['Content-type']
+            print(f"Parsing {response.url}, type: {response_type}")
 
-        if b'text/html' not in response_type:
-            self.store_small_file(response)
-            return
+            config = response.request.meta['config']
 
-        self.store_html(response)
+            if self.stop():
+                return
+
+            if b'text/html' not in response_type:
+                self.store_small_file(response)
+                return
+
+            self.store_html(response)
 
         urls = set()
-        urls_large_file_content = []
-        if "explore_links" in config and config["explore_links"]:
-            this_url = response.url
-            urls = self.extract_links(response)
+        # Reasons to probe each URL: "page" for links followed only if they
+        # are pages, "file" for files to be split by size and "typed_file"
+        # for files whose type must also be checked
+        purposes = {}
+        # Links of pages at the maximum depth would be dropped by Scrapy, so
+        # they are not extracted (nor probed)
+        depth = response.meta.get("depth", 0)
+        at_max_depth = bool(self.max_depth) and depth >= self.max_depth
+
+        if "explore_links" in config and config["explore_links"] and not at_max_depth:
+            links = self.extract_links(response)
+            if config["link_extractor_check_type"]:
+                for url in links:
+                    purposes.setdefault(url, set()).add("page")
+            else:
+                urls = links
 
         if "download_files" in self.config and self.config["download_files"]:
-            urls_small_file_content, urls_large_file_content = self.extract_files(response)
-            urls = urls.union(urls_small_file_content)
+            purpose = "file"
+            if config["download_files_check_type"]:
+                purpose = "typed_file"
+            for url in self.extract_files(response):
+                purposes.setdefault(url, set()).add(purpose)
 
         if "download_imgs" in self.config and self.config["download_imgs"]:
             urls = self.extract_imgs(response).union(urls)
 
-        if len(urls_large_file_content) > 0:
-            size = len(urls_large_file_content)
-            for idx, url in enumerate(urls_large_file_content, 1):
-                print(f"Downloading large file {url} {idx} of {size}")
-                self.store_large_file(url, response.meta["referer"])
+        for request in self.follow_urls(urls, response.url, config):
+            yield request
+
+        # URLs already probed are classified right away, the others after
+        # their HEAD request, without blocking the crawl
+        for url, url_purposes in purposes.items():
+            meta = {
+                "referer": response.url,
+                "page_referer": response.meta["referer"],
+                "config": config,
+                "probe_purposes": sorted(url_purposes),
+            }
+            probed = self.content_probe.get(url)
+            if probed is None:
+                yield self.content_probe.head_request(
+                    url, self.parse_head, self.errback_head, meta)
+            else:
+                for request in self.follow_probed_url(probed, meta):
+                    yield request
 
-                # So that the interval between requests is concise between Scrapy and downloading large files
-                if self.config["antiblock_download_delay"]:
-                    print(f"Waiting {self.config['antiblock_download_delay']}s for the next download...")
-                    time.sleep(self.config["antiblock_download_delay"])
+    def follow_urls(self, urls, referer: str, config: dict, depth=None):
+        """
+        Yields the requests of the unseen urls found in a page. Their depth
+        is set by Scrapy, unless given (for requests yielded by errbacks).
+        """
+        # Requests are added to the store of seen URLs by the dupefilter
+        for url in self.unseen_urls(urls):
+            priority = 0
+            if self.url_scorer is not None:
+                priority = self.url_scorer.score(url)
+
+            meta = {
+                "referer": referer,
+                "config": config
+            }
+            if depth is not None:
+                meta["depth"] = depth
 
-        for url in urls:
             yield scrapy.Request(
                 url=url,
                 callback=self.parse,
-                meta={
-                    "referer": response.url,
-                    "config": config
-                },
+                priority=priority,
+                meta=meta,
                 errback=self.errback_httpbin
-            )
\ No newline at end of file
+            )
+
+    def follow_probed_url(self, probed: tuple, meta: dict, depth=None):
+        """
+        Requests or downloads a probed url, given the tuple (url,
+        content_type, content_length) of its HEAD request and the meta of
+        the request. See follow_urls for depth.
+        """
+        url, content_type, content_length = probed
+        request, large_file = self.classify_probed_url(
+            url, content_type, content_length, meta["probe_purposes"])
+
+        if large_file:
+            self.store_large_file(url, meta["page_referer"])
+        elif request:
+            for follow_request in self.follow_urls(
+                    [url], meta["referer"], meta["config"], depth):
+                yield follow_request
+
+    def parse_head(self, response):
+        """Callback of the HEAD requests probing links and files."""
+        url = response.meta["probed_url"]
+        probed = self.content_probe.put(url, response.headers)
+
+        # The requests found by the page are one level deeper than it, not
+        # than the HEAD request
+        response.meta["depth"] = response.meta.get("depth", 1) - 1
+
+        for request in self.follow_probed_url(probed, response.meta):
+            yield request
+
+    def errback_head(self, failure):
+        """
+        Errback of the HEAD requests: the url is classified with an empty
+        content type and length 0.
+        """
+        meta = failure.request.meta
+        url = meta["probed_url"]
+        print(f"Could not probe {url} - message: {failure.getErrorMessage()}")
+
+        # The output of errbacks doesn't go through the depth middleware, the
+        # HEAD request is already one level deeper than its page
+        probed = self.content_probe.put(url)
+        for request in self.follow_probed_url(probed, meta,
+                                              meta.get("depth", 1)):
+            yield request
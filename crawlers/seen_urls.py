@@ -0,0 +1,251 @@
+"""
+Store of the URLs already seen by an instance, shared by the spider (before
+probing the links of a page, before yielding requests and before
+downloading large files) and by the scheduler, through SeenUrlsDupeFilter.
+
+Two backends are available, chosen by the seen_urls_store configuration:
+
+- "set": exact, keeps a digest of each URL in memory, and appends it to a
+  file so a stopped instance can be resumed;
+- "bloom": scalable Bloom filter kept in memory-mapped files, for crawls with
+  millions of URLs. A small fraction of new URLs (SEEN_URLS_ERROR_RATE) is
+  wrongly considered seen.
+"""
+
+# Scrapy and Twister libs
+from scrapy.dupefilters import BaseDupeFilter
+from w3lib.url import canonicalize_url
+
+# Other external libs
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+
+# Project libs
+from crawlers.constants import *
+
+
+def url_key(url: str) -> bytes:
+    """Returns the key of url in the stores, ignoring fragments and order of
+    query arguments, as Scrapy does for request fingerprints."""
+    return canonicalize_url(url).encode()
+
+
+def digest(key: bytes) -> bytes:
+    return hashlib.blake2b(key, digest_size=16).digest()
+
+
+class SetSeenUrls:
+    """Exact store, with the digests of the seen URLs in a set."""
+
+    def __init__(self, path: str = None,
+                 flush_interval: int = SEEN_URLS_FLUSH_INTERVAL):
+        """
+        Keyword arguments:
+        path -- str, file where digests are persisted, None to keep them in
+        memory only
+        flush_interval -- int, number of digests written between flushes of
+        the file
+        """
+        self.digests = set()
+        self.key_size = sys.getsizeof(digest(b""))
+        self.file = None
+        self.flush_interval = flush_interval
+        self.unflushed = 0
+
+        if path is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.file = open(f"{path}.set", "a+")
+            self.file.seek(0)
+            self.digests.update(bytes.fromhex(line.rstrip())
+                                for line in self.file)
+
+    def __contains__(self, key: bytes) -> bool:
+        return digest(key) in self.digests
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def add(self, key: bytes) -> bool:
+        """Adds key to the store, returning False if it was already seen."""
+        key = digest(key)
+        if key in self.digests:
+            return False
+
+        self.digests.add(key)
+        if self.file is not None:
+            self.file.write(key.hex() + "\n")
+            self.unflushed += 1
+            if self.unflushed >= self.flush_interval:
+                self.flush()
+        return True
+
+    def flush(self):
+        """Writes the buffered digests to the file."""
+        if self.file is not None:
+            self.file.flush()
+        self.unflushed = 0
+
+    def memory_usage(self) -> int:
+        """Returns the approximate memory used, in bytes."""
+        return sys.getsizeof(self.digests) + len(self.digests) * self.key_size
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+
+
+class BloomFilter:
+    """
+    Bloom filter of fixed capacity in a memory-mapped file. The file starts
+    with the number of keys added, followed by the bits.
+    """
+
+    HEADER = struct.Struct("<Q")
+
+    def __init__(self, path: str, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+
+        size = self.HEADER.size + (self.bits + 7) // 8
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), size)
+
+    @property
+    def count(self) -> int:
+        return self.HEADER.unpack_from(self.map, 0)[0]
+
+    def positions(self, key: bytes):
+        # Double hashing over two 64 bits halves of the digest
+        h1, h2 = struct.unpack("<QQ", digest(key))
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def __contains__(self, key: bytes) -> bool:
+        offset = self.HEADER.size
+        return all(self.map[offset + p // 8] & (1 << p % 8)
+                   for p in self.positions(key))
+
+    def add(self, key: bytes):
+        offset = self.HEADER.size
+        for p in self.positions(key):
+            self.map[offset + p // 8] |= 1 << p % 8
+        self.HEADER.pack_into(self.map, 0, self.count + 1)
+
+    def memory_usage(self) -> int:
+        return len(self.map)
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+
+class BloomSeenUrls:
+    """
+    Scalable Bloom filter: when a filter is full, a new one with twice the
+    capacity and half the error rate is added, keeping the overall error
+    rate below error_rate.
+    """
+
+    def __init__(self, path: str, capacity: int = SEEN_URLS_BLOOM_CAPACITY,
+                 error_rate: float = SEEN_URLS_ERROR_RATE):
+        """
+        Keyword arguments:
+        path -- str, prefix of the files of the filters
+        capacity -- int, number of keys of the first filter
+        error_rate -- float, probability of a new key being considered seen
+        """
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.filters = [self.open_filter(0)]
+        while os.path.exists(self.filter_path(len(self.filters))):
+            self.filters.append(self.open_filter(len(self.filters)))
+
+    def filter_path(self, index: int) -> str:
+        return f"{self.path}.bloom.{index}"
+
+    def open_filter(self, index: int) -> BloomFilter:
+        return BloomFilter(self.filter_path(index),
+                           self.capacity * 2 ** index,
+                           self.error_rate / 2 ** (index + 1))
+
+    def __contains__(self, key: bytes) -> bool:
+        return any(key in f for f in reversed(self.filters))
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+
+    def add(self, key: bytes) -> bool:
+        """Adds key to the store, returning False if it was already seen."""
+        if key in self:
+            return False
+
+        if self.filters[-1].count >= self.filters[-1].capacity:
+            self.filters.append(self.open_filter(len(self.filters)))
+        self.filters[-1].add(key)
+        return True
+
+    def memory_usage(self) -> int:
+        """Returns the size of the filters, in bytes."""
+        return sum(f.memory_usage() for f in self.filters)
+
+    def close(self):
+        for f in self.filters:
+            f.close()
+
+
+def create_seen_urls(store: str, path: str = None):
+    """
+    Returns the store of seen URLs of the given type ("set" or "bloom"),
+    persisted with the path prefix.
+    """
+    if store == "set":
+        return SetSeenUrls(path)
+    if store == "bloom":
+        if path is None:
+            raise ValueError("the bloom store of seen URLs requires a path")
+        return BloomSeenUrls(path)
+    raise ValueError(f"Unknown store of seen URLs: {store}")
+
+
+class SeenUrlsDupeFilter(BaseDupeFilter):
+    """
+    Filters requests already seen by the spider, using the store of the
+    spider (its seen_urls attribute). Requests other than GET without body
+    are keyed by their fingerprint.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.fingerprinter = crawler.request_fingerprinter
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def request_key(self, request) -> bytes:
+        if request.method == "GET" and not request.body:
+            return url_key(request.url)
+        return self.fingerprinter.fingerprint(request)
+
+    def request_seen(self, request) -> bool:
+        spider = self.crawler.spider
+        new = spider.seen_urls.add(self.request_key(request))
+        if new:
+            spider.report_seen_urls()
+        return not new
+
+    def log(self, request, spider):
+        self.crawler.stats.inc_value("dupefilter/filtered", spider=spider)
@@ -0,0 +1,139 @@
+# Scrapy and Twister libs
+from scrapy.linkextractors import IGNORED_EXTENSIONS, LinkExtractor
+
+# Other external libs
+import re
+from urllib.parse import urlparse
+
+# Urls ending with a 3 or 4 letters extension, other than html and php
+FILE_URL_PATTERN = re.compile(r"(.*\.[a-z]{3,4}$)(.*(?<!\.html)$)(.*(?<!\.php)$)")
+
+
+class UrlExtractor:
+    """
+    Extraction rules of a crawl (link extractor, allowed urls regex and
+    processing of values), built once when the spider starts and reused for
+    every response, instead of rebuilding the link extractor and compiling
+    the rules on each page.
+
+    Denied extensions are checked here, with a single endswith call per url:
+    the link extractor tries each extension in turn, which took most of the
+    extraction time with the default list of extensions.
+    """
+
+    def __init__(self, allow_domains=None, tags=('a', 'area'),
+                 attrs=('href',), process_value=None, allow_url=None,
+                 deny_extensions=None):
+        """
+        Keyword arguments:
+        allow_domains -- iterable of str, domains of the urls kept
+        tags -- iterable of str, tags where urls are searched
+        attrs -- iterable of str, attributes where urls are searched
+        process_value -- callable applied to each url found, or the source of
+        a lambda, as in the crawler configuration
+        allow_url -- str, regex the urls kept must match
+        deny_extensions -- iterable of str, extensions of the urls ignored
+        """
+        if type(process_value) is str:
+            process_value = eval(process_value) if len(process_value) > 0 else None
+
+        if deny_extensions is None:
+            deny_extensions = IGNORED_EXTENSIONS
+        self.deny_suffixes = tuple(f".{e}" for e in deny_extensions)
+
+        self.link_extractor = LinkExtractor(
+            allow_domains=allow_domains,
+            tags=tags,
+            attrs=attrs,
+            process_value=process_value,
+            deny_extensions=[],
+        )
+
+        self.allow_url = None
+        if allow_url is not None and allow_url != "":
+            self.allow_url = re.compile(allow_url)
+
+    @classmethod
+    def from_config(cls, config: dict, prefix: str):
+        """
+        Builds the extractor from the preprocessed configuration of a
+        crawler, e.g. with prefix "link_extractor" or "download_files".
+        """
+        return cls(
+            allow_domains=config[f"{prefix}_allow_domains"],
+            tags=config[f"{prefix}_tags"],
+            attrs=config[f"{prefix}_attrs"],
+            process_value=config.get(f"{prefix}_process_value"),
+            allow_url=config.get(f"{prefix}_allow_url"),
+            deny_extensions=config.get(f"{prefix}_deny_extensions"),
+        )
+
+    def filter(self, urls) -> set:
+        """
+        Returns the urls matching the allowed urls regex and not ending with
+        a denied extension.
+        """
+        if self.allow_url is not None:
+            search = self.allow_url.search
+            urls = (url for url in urls if search(url) is not None)
+        if len(self.deny_suffixes) > 0:
+            deny_suffixes = self.deny_suffixes
+            urls = (url for url in urls
+                    if not urlparse(url).path.lower().endswith(deny_suffixes))
+        return set(urls)
+
+    def extract(self, response) -> set:
+        """Returns the set of allowed urls found in the response."""
+        return self.filter(
+            link.url for link in self.link_extractor.extract_links(response))
+
+
+class InvalidPriorityPattern(ValueError):
+    """
+    Raised by UrlScorer.from_text for a line which isn't "<score> <regex>".
+    """
+
+    def __init__(self, line_number: int, line: str):
+        super().__init__(f"Invalid priority pattern at line {line_number}: "
+                         f"{line}")
+        self.line_number = line_number
+        self.line = line
+
+
+class UrlScorer:
+    """
+    Scores urls by the patterns they match, to set the priority of their
+    requests. Patterns are compiled once, like the extraction rules.
+    """
+
+    def __init__(self, patterns: list):
+        """
+        Keyword arguments:
+        patterns -- list of tuples (score, regex)
+        """
+        self.patterns = [(score, re.compile(regex)) for score, regex in patterns]
+
+    @classmethod
+    def from_text(cls, text: str):
+        """
+        Builds the scorer from lines "<score> <regex>", as in the
+        link_extractor_priority_patterns configuration. Raises
+        InvalidPriorityPattern for the first invalid line (numbered from 1).
+        """
+        patterns = []
+        for line_number, line in enumerate((text or "").splitlines(), 1):
+            line = line.strip()
+            if line == "":
+                continue
+            try:
+                score, regex = line.split(maxsplit=1)
+                patterns.append((int(score), re.compile(regex)))
+            except (ValueError, re.error):
+                raise InvalidPriorityPattern(line_number, line) from None
+        return cls(patterns)
+
+    def score(self, url: str) -> int:
+        """Returns the highest score of the patterns url matches, or 0."""
+        scores = [score for score, regex in self.patterns
+                  if regex.search(url) is not None]
+        return max(scores, default=0)
@@ -5,6 +5,8 @@ from django.core.validators import RegexValidator
 
 import re
 
+from crawlers.url_extractor import InvalidPriorityPattern, UrlScorer
+
 
 class CrawlRequestForm(forms.ModelForm):
     class Meta:
@@ -29,6 +31,9 @@ class CrawlRequestForm(forms.ModelForm):
             'antiblock_autothrottle_enabled',
             'antiblock_autothrottle_start_delay',
             'antiblock_autothrottle_max_delay',
+            'antiblock_adaptive_concurrency',
+            'antiblock_min_concurrency',
+            'antiblock_max_concurrency',
             'antiblock_mask_type',
             'antiblock_ip_rotation_type',
             'antiblock_max_reqs_per_ip',
@@ -53,6 +58,8 @@ class CrawlRequestForm(forms.ModelForm):
             'link_extractor_attrs',
             'link_extractor_check_type',
             'link_extractor_process_value',
+            'link_extractor_frontier_order',
+            'link_extractor_priority_patterns',
 
             'download_files',
             'download_files_allow_url',
@@ -67,11 +74,32 @@ class CrawlRequestForm(forms.ModelForm):
             'steps',
             'save_csv',
             'table_attrs',
+            'clean_html',
+            'incremental_crawl',
+            'hash_algorithm',
             'data_path',
+            'distributed_workers',
+            'seen_urls_store',
+            'probe_cache',
         ]
 
         widgets = {'table_attrs': forms.HiddenInput()}
 
+    def clean_link_extractor_priority_patterns(self):
+        """
+        Checks that every line of the priority patterns is in the format
+        '<score> <regex>', as the spider fails to start otherwise
+        """
+        patterns = self.cleaned_data.get('link_extractor_priority_patterns')
+        try:
+            UrlScorer.from_text(patterns)
+        except InvalidPriorityPattern as e:
+            raise ValidationError(
+                f"Linha {e.line_number} inválida: '{e.line}'. Use o formato "
+                "'<pontuação> <regex>', com a pontuação inteira e uma "
+                "expressão regular válida.")
+        return patterns
+
 
 class RawCrawlRequestForm(CrawlRequestForm):
 
@@ -97,6 +125,18 @@ class RawCrawlRequestForm(CrawlRequestForm):
             attrs={'placeholder': '/home/user/Documents/<crawler_name>'}),
         validators=[CrawlRequest.pathValid]
     )
+    distributed_workers = forms.IntegerField(
+        required=False, min_value=0, initial=0,
+        label="Número de workers distribuídos (0 para executar localmente)"
+    )
+    seen_urls_store = forms.ChoiceField(
+        required=False, choices=CrawlRequest.SEEN_URLS_STORES, initial='set',
+        label="Armazenamento das URLs já visitadas"
+    )
+    probe_cache = forms.ChoiceField(
+        required=False, choices=CrawlRequest.PROBE_CACHES, initial='memory',
+        label="Cache dos resultados das sondagens das URLs parametrizadas"
+    )
 
     # ANTIBLOCK ###############################################################
     # Options for Delay
@@ -128,6 +168,20 @@ class RawCrawlRequestForm(CrawlRequestForm):
         label="Intervalo máximo",
         initial=10,
     )
+    antiblock_adaptive_concurrency = forms.BooleanField(
+        required=False,
+        label="Habilitar ajuste de requisições simultâneas por domínio",
+    )
+    antiblock_min_concurrency = forms.IntegerField(
+        required=False, min_value=1,
+        label="Mínimo de requisições simultâneas por domínio",
+        initial=1,
+    )
+    antiblock_max_concurrency = forms.IntegerField(
+        required=False, min_value=1,
+        label="Máximo de requisições simultâneas por domínio",
+        initial=8,
+    )
 
     # Options for mask type
     antiblock_mask_type = forms.ChoiceField(
@@ -288,6 +342,20 @@ class RawCrawlRequestForm(CrawlRequestForm):
         widget=forms.Textarea(
             attrs={'placeholder': 'lambda x: x'})
     )
+    link_extractor_frontier_order = forms.ChoiceField(
+        required=False, choices=CrawlRequest.FRONTIER_ORDERS, initial='bfs',
+        label="Ordem de visita dos links"
+    )
+    link_extractor_priority_patterns = forms.CharField(
+        required=False, max_length=2000,
+        label=(
+            "Prioridade dos links: (um padrão por linha, no formato "
+            "'<pontuação> <regex>', links com maior pontuação são visitados "
+            "primeiro)"
+        ),
+        widget=forms.Textarea(
+            attrs={'placeholder': '10 /noticias/\n-5 /arquivo/'})
+    )
 
     download_files = forms.BooleanField(
         required=False, label="Baixar arquivos"
@@ -363,6 +431,20 @@ class RawCrawlRequestForm(CrawlRequestForm):
         widget=forms.HiddenInput(attrs={'id': 'table_attrs_hidden'})
     )
 
+    # STORAGE #################################################################
+    clean_html = forms.BooleanField(
+        required=False, initial=True,
+        label="Remover scripts, estilos e comentários das páginas salvas"
+    )
+    incremental_crawl = forms.BooleanField(
+        required=False, initial=False,
+        label="Coleta incremental (não baixar novamente páginas e arquivos não modificados)"
+    )
+    hash_algorithm = forms.ChoiceField(
+        required=False, choices=CrawlRequest.HASH_ALGORITHMS, initial='md5',
+        label="Algoritmo de hash para nomear os arquivos salvos"
+    )
+
 
 class ResponseHandlerForm(forms.ModelForm):
     """
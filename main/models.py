@@ -40,6 +40,28 @@ class CrawlRequest(TimeStamped):
                                     choices=REQUEST_TYPES,
                                     default='GET')
 
+    # Number of workers sharing the crawl through Redis (0 runs locally)
+    distributed_workers = models.PositiveIntegerField(default=0, blank=True,
+                                                      null=True)
+
+    SEEN_URLS_STORES = [
+        ('set', 'Exato (em memória)'),
+        ('bloom', 'Filtro de Bloom (em disco)'),
+    ]
+    # Store of the URLs already seen by the instances
+    seen_urls_store = models.CharField(max_length=15,
+                                       choices=SEEN_URLS_STORES,
+                                       default='set', blank=True, null=True)
+
+    PROBE_CACHES = [
+        ('memory', 'Em memória'),
+        ('disk', 'Em disco (compartilhado entre as execuções)'),
+        ('none', 'Desativado'),
+    ]
+    # Cache of the results of the probes of templated URLs
+    probe_cache = models.CharField(max_length=15, choices=PROBE_CACHES,
+                                   default='memory', blank=True, null=True)
+
     # ANTIBLOCK ###############################################################
     # Options for Delay
     antiblock_download_delay = models.IntegerField(blank=True, null=True)
@@ -49,6 +71,11 @@ class CrawlRequest(TimeStamped):
     antiblock_autothrottle_max_delay = models.IntegerField(
         blank=True, null=True)
 
+    # Options for concurrency per domain
+    antiblock_adaptive_concurrency = models.BooleanField(blank=True, null=True)
+    antiblock_min_concurrency = models.IntegerField(blank=True, null=True)
+    antiblock_max_concurrency = models.IntegerField(blank=True, null=True)
+
     # Options for antiblock masks
     ANTIBLOCK_MASK_TYPE = [
         ('none', 'None'),
@@ -124,6 +151,21 @@ class CrawlRequest(TimeStamped):
         max_length=1000, blank=True, null=True
     )
 
+    FRONTIER_ORDERS = [
+        ('bfs', 'Em largura'),
+        ('dfs', 'Em profundidade'),
+        ('priority', 'Por prioridade dos padrões de URL'),
+    ]
+    # Order in which the links found are visited
+    link_extractor_frontier_order = models.CharField(
+        max_length=15, choices=FRONTIER_ORDERS, default='bfs',
+        blank=True, null=True
+    )
+    # Lines "<score> <regex>", links matching higher scores are visited first
+    link_extractor_priority_patterns = models.TextField(
+        max_length=2000, blank=True, null=True
+    )
+
     download_files = models.BooleanField(blank=True, null=True)
     download_files_allow_url = models.CharField(
         max_length=1000, blank=True, null=True)
@@ -204,6 +246,24 @@ class CrawlRequest(TimeStamped):
     save_csv = models.BooleanField(blank=True, null=True)
     table_attrs = models.CharField(max_length=20000, blank=True, null=True)
 
+    # STORAGE #########################################################
+    # Remove scripts, styles and comments from stored pages
+    clean_html = models.BooleanField(default=True)
+    # Request content stored by previous runs conditionally (ETag and
+    # Last-Modified), skipping what did not change
+    incremental_crawl = models.BooleanField(default=False, blank=True,
+                                            null=True)
+
+    HASH_ALGORITHMS = [
+        ('md5', 'MD5'),
+        ('blake2b', 'BLAKE2b'),
+        ('xxhash', 'xxHash'),
+    ]
+    # Algorithm used to name stored pages and files
+    hash_algorithm = models.CharField(max_length=15,
+                                      choices=HASH_ALGORITHMS,
+                                      default='md5', blank=True, null=True)
+
 
     @property
     def running(self):
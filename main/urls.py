@@ -20,6 +20,7 @@ urlpatterns = [
     path("monitoring/", views.monitoring, name="monitoring"),
     path("detail/run_crawl/<int:crawler_id>", views.run_crawl, name="run_crawl"),
     path("detail/stop_crawl/<int:crawler_id>", views.stop_crawl, name="stop_crawl"),
+    path("detail/resume_crawl/<int:crawler_id>", views.resume_crawl, name="resume_crawl"),
     path("tail_log_file/<str:instance_id>", views.tail_log_file, name="tail_log_file"),
 
     # Includes the API endpoints in the URLs
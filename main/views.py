@@ -15,6 +15,7 @@ from .serializers import CrawlRequestSerializer, CrawlerInstanceSerializer
 
 from crawlers.constants import *
 
+import json
 import subprocess
 from datetime import datetime
 import time
@@ -27,7 +28,12 @@ from rest_framework.parsers import JSONParser
 # Helper methods
 
 
-def process_run_crawl(crawler_id):
+def process_run_crawl(crawler_id, resume=False):
+    """
+    Starts an instance of the crawler. If resume is set, the last stopped
+    instance continues from its persisted state instead, as long as it was
+    stopped before completing its crawl.
+    """
     instance = None
     instance_id = None
     instance_info = dict()
@@ -44,9 +50,28 @@ def process_run_crawl(crawler_id):
                              f"({instance_id})")
 
         data = CrawlRequest.process_config_data(crawler_entry.get(), data)
-        instance_id = crawler_manager.start_crawler(data.copy())
-        instance = create_instance(data['id'], instance_id)
 
+        if resume:
+            instance = crawler_entry.get().instances.filter(running=False)\
+                .order_by('-creation_date').first()
+            if instance is None:
+                raise ValueError("No stopped instance to resume")
+
+            job_config = dict(data, instance_id=str(instance.instance_id))
+            if not crawler_manager.has_pending_requests(job_config):
+                raise ValueError("The last instance completed its crawl or "
+                                 "has no persisted state "
+                                 f"({instance.instance_id})")
+
+            crawler_manager.start_crawler(data.copy(), instance.instance_id)
+            instance.running = True
+            instance.finished_at = None
+            instance.save()
+        else:
+            instance_id = crawler_manager.start_crawler(data.copy())
+            instance = create_instance(data['id'], instance_id)
+
+    instance_id = instance.instance_id
     instance_info["started_at"] = str(instance.creation_date)
     instance_info["finished_at"] = None
 
@@ -212,6 +237,11 @@ def run_crawl(request, crawler_id):
     return redirect(detail_crawler, id=crawler_id)
 
 
+def resume_crawl(request, crawler_id):
+    process_run_crawl(crawler_id, resume=True)
+    return redirect(detail_crawler, id=crawler_id)
+
+
 def tail_log_file(request, instance_id):
     crawler_id = CrawlerInstance.objects.filter(
         instance_id=instance_id
@@ -256,8 +286,10 @@ PATCH     /api/crawlers/<id>        partially update crawler data
 DELETE    /api/crawlers/<id>        delete crawler
 GET       /api/crawlers/<id>/run    run crawler instance
 GET       /api/crawlers/<id>/stop   stop crawler instance
+GET       /api/crawlers/<id>/resume resume last stopped crawler instance
 GET       /api/instances/           list crawler instances
 GET       /api/instances/<id>       crawler instance detail
+GET       /api/instances/<id>/metrics metrics of the processes of an instance
 GET       /api/downloads/<id>       return details about download itens
 GET       /api/downloads/           return list of download itens
 POST      /api/downloads/           create a download item
@@ -293,6 +325,24 @@ class CrawlerViewSet(viewsets.ModelViewSet):
         }
         return JsonResponse(data)
 
+    @action(detail=True, methods=['get'])
+    def resume(self, request, pk):
+        instance = None
+        try:
+            instance = process_run_crawl(pk, resume=True)
+        except Exception as e:
+            data = {
+                'status': settings.API_ERROR,
+                'message': str(e)
+            }
+            return JsonResponse(data)
+
+        data = {
+            'status': settings.API_SUCCESS,
+            'instance': CrawlerInstanceSerializer(instance).data
+        }
+        return JsonResponse(data)
+
     @action(detail=True, methods=['get'])
     def stop(self, request, pk):
         instance = None
@@ -317,4 +367,40 @@ class CrawlerInstanceViewSet(viewsets.ReadOnlyModelViewSet):
     A simple ViewSet for viewing and listing instances
     """
     queryset = CrawlerInstance.objects.all()
-    serializer_class = CrawlerInstanceSerializer
\ No newline at end of file
+    serializer_class = CrawlerInstanceSerializer
+
+    @action(detail=True, methods=['get'])
+    def metrics(self, request, pk):
+        """
+        Returns the last metrics snapshot written by each process (worker)
+        of the instance.
+        """
+        instance = self.get_object()
+        crawler_entry = CrawlRequest.objects.filter(id=instance.crawler_id_id)
+        # Resolves the default data path the same way as when running
+        config = CrawlRequest.process_config_data(
+            crawler_entry.get(), crawler_entry.values()[0])
+
+        metrics = []
+        workers = max(config["distributed_workers"] or 0, 1)
+        for worker_index in range(workers):
+            path = crawler_manager.get_metrics_path({
+                "data_path": config["data_path"],
+                "instance_id": instance.instance_id,
+                "worker_index": worker_index,
+            })
+            try:
+                with open(path) as f:
+                    metrics.append(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                # Worker not started yet, or snapshot being replaced
+                continue
+
+        data = {
+            'status': settings.API_SUCCESS,
+            'running': instance.running,
+            'metrics': metrics,
+        }
+        if crawler_manager.crawler_pool is not None:
+            data['pool'] = crawler_manager.crawler_pool.get_status()
+        return JsonResponse(data)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from binary.extractor import Extractor
+from binary.extractor import Extractor, extract_many
 from binary.excel_extractor import ExcelExtractor
 from binary.texts_extractor import TextsExtractor
 from binary.tabula_extractor import TabulaExtractor
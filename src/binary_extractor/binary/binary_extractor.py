@@ -3,14 +3,11 @@ This module extracts contents from binary files.
 
 """
 
-from tika import parser
+from .jvm import tika_parse
 from .texts_processor import columns_to_dataframe
 from pathlib import Path
 import abc
 
-import tika
-tika.initVM()
-
 
 class BinaryExtractor():
     """
@@ -25,9 +22,10 @@ class BinaryExtractor():
         content(None/dict/pd.DataFrame): Main content of the document.
         name (str): File name, without its extension.
         directory (Path): Created directory for saving the outputs.
+        open (dict): Tika output for the file, parsed on first access.
 
     Raises:
-        TypeError: The file can't be parsed.
+        TypeError: The file can't be parsed (raised on first access to open).
 
     """
     __metaclass__ = abc.ABCMeta
@@ -43,11 +41,22 @@ class BinaryExtractor():
         pure = Path(self.path)
         self.name = pure.stem
         self.directory = pure.parents[1].joinpath('csv/' + self.name)
-        # file parsing
-        try:
-            self.open = parser.from_file(self.path)
-        except:
-            raise TypeError('The file content could not be extracted.')
+        # file parsing is only done when the content or metadata is needed
+        self.parsed = None
+
+    @property
+    def open(self):
+        """
+        dict: Tika output for the file, parsed by the shared Tika server.
+
+        """
+
+        if self.parsed is None:
+            try:
+                self.parsed = tika_parse(self.path)
+            except:
+                raise TypeError('The file content could not be extracted.')
+        return self.parsed
 
     @abc.abstractmethod
     def read(self):
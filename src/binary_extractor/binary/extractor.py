@@ -87,3 +87,32 @@ class Extractor():
 
         if extra is not None:
             extra.output()
+
+
+def extract_many(paths):
+    """
+    This function extracts the extra contents of many files at once.
+
+    Note:
+        The Tika server and the tabula JVM are started at most once, and
+        shared by every file.
+
+    Args:
+        paths (list): Absolute file paths.
+
+    Returns:
+        dict: The keys are the paths; the values are the list of extracted
+            tables, None if the file has no extra extractor, or the exception
+            raised while extracting it.
+
+    """
+
+    results = {}
+    for path in paths:
+        try:
+            extra = Extractor(path).extra()
+            results[path] = extra.read() if extra is not None else None
+        except Exception as e:
+            results[path] = e
+
+    return results
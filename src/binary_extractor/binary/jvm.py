@@ -0,0 +1,51 @@
+"""
+This module keeps the Java services used by the extractors alive.
+
+Tika runs as a single server, which is checked (and started, if needed) only
+on the first parse of the process. Tabula (2.8+) runs in-process through
+jpype when it is installed, so the same JVM is reused by every table
+extraction instead of launching tabula-java for each call.
+
+"""
+
+import tika
+from tika import parser
+from tabula import read_pdf
+
+TIKA_SERVER_ENDPOINT = tika.tika.ServerEndpoint
+
+
+def tika_parse(path):
+    """
+    This function parses a file with the shared Tika server.
+
+    Args:
+        path (str): File path.
+
+    Returns:
+        dict: Tika output, with the 'content' and 'metadata' keys.
+
+    """
+
+    parsed = parser.from_file(path, serverEndpoint=TIKA_SERVER_ENDPOINT)
+
+    # The server is up, skip the jar and process checks from now on
+    tika.tika.TikaClientOnly = True
+
+    return parsed
+
+
+def tabula_read(path, **kwargs):
+    """
+    This function reads the tables of a pdf file with the shared tabula JVM.
+
+    Args:
+        path (str): File path.
+        **kwargs: Options accepted by tabula.read_pdf.
+
+    Returns:
+        list: List of pd.DataFrame, each item is a extracted table.
+
+    """
+
+    return read_pdf(path, **kwargs)
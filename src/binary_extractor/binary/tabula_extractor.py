@@ -3,8 +3,10 @@ This module extracts tables from pdf files, using tabula-java.
 
 """
 
-from tabula import read_pdf
 from .binary_extractor import BinaryExtractor
+from .jvm import tabula_read
+
+PDF_SIGNATURE = b'%PDF'
 
 class TabulaExtractor(BinaryExtractor):
     """
@@ -14,7 +16,7 @@ class TabulaExtractor(BinaryExtractor):
         extra (None/list/pd.DataFrame): Extra contents of the document.
 
     Raises:
-        TypeError: The tabula-java couldn't work in this file.
+        TypeError: The file is not a pdf, or tabula-java couldn't work in it.
 
     """
 
@@ -23,8 +25,12 @@ class TabulaExtractor(BinaryExtractor):
         self.extra = None
 
         try:
-            read_pdf(self.path, pages=1, silent=True)
-        except:
+            with open(self.path, 'rb') as f:
+                is_pdf = f.read(len(PDF_SIGNATURE)) == PDF_SIGNATURE
+        except OSError:
+            is_pdf = False
+
+        if not is_pdf:
             raise TypeError('As tabelas não puderam ser acessadas.')
 
     def read(self):
@@ -36,8 +42,11 @@ class TabulaExtractor(BinaryExtractor):
 
         """
 
-        content = read_pdf(self.path, pages='all', multiple_tables=True,
-                           silent=True)
+        try:
+            content = tabula_read(self.path, pages='all',
+                                  multiple_tables=True, silent=True)
+        except:
+            raise TypeError('As tabelas não puderam ser acessadas.')
 
         return content
 
@@ -12,5 +12,5 @@ setuptools.setup(
     description="binary files content and metadata extractor and parser",
     classifiers=["Programming Language :: Python :: 3"],
     packages=setuptools.find_packages(),
-    install_requires=['tika', 'tabula-py', 'pandas', 'pathlib', 'xlrd', 'filetype']
+    install_requires=['tika', 'tabula-py', 'jpype1', 'pandas', 'pathlib', 'xlrd', 'filetype']
 )
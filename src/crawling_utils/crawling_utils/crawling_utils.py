@@ -6,25 +6,44 @@ import os
 from urllib.parse import urlparse
 import requests
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 
 class StopDownload(Exception):
     """Used in func file_larger_than_giga"""
     pass
 
 
-def file_larger_than_giga(url):
-    # Mudar user-agent para evitar ser bloqueado por usar a biblioteca requests
-    headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.66 Safari/537.36'}
-    
-    # requisição apenas para obter o cabeçalho do conteúdo a ser baixado
-    response = requests.head(url, allow_redirects=True, headers=headers)
+# Sessão compartilhada pelas requisições HEAD, reaproveitando as conexões
+head_session = requests.Session()
+head_session.headers.update({'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.66 Safari/537.36'})
+
+
+def file_larger_than_giga(url, content_length=None, timeout=30):
+    """
+    Checks if the content of url is larger than 1 GB. If the Content-Length
+    is already known (e.g. from a HEAD request sent by the crawler), no
+    request is made. Otherwise a HEAD request is sent, through a session
+    shared by the calls (keep-alive). It blocks, so it shouldn't be called
+    from the Twisted reactor thread.
+    """
+    if content_length is None:
+        # requisição apenas para obter o cabeçalho do conteúdo a ser baixado
+        with head_session.head(url, allow_redirects=True,
+                               timeout=timeout) as response:
+            content_length = response.headers.get('Content-Length')
 
-    # obtem o tamanho do arquivo e converte para inteiro
-    content_length = response.headers.get('Content-Length')
     if content_length is None:
         return True
 
-    content_length = int(content_length)
+    # obtem o tamanho do arquivo e converte para inteiro
+    try:
+        content_length = int(content_length)
+    except ValueError:
+        return True
 
     return content_length > 1e9
 
@@ -35,9 +54,39 @@ def get_url_domain(url):
     return result
 
 
-def hash(byte_content):
-    """Returns the md5 hash of a bytestring."""
-    return hashlib.md5(byte_content).hexdigest()
+def get_hasher(algorithm="md5"):
+    """
+    Returns a new hash object of the algorithm. blake2b and xxhash produce
+    128 bits digests, like md5. xxhash requires the xxhash package.
+    """
+    if algorithm == "md5":
+        return hashlib.md5()
+    if algorithm == "sha1":
+        return hashlib.sha1()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == "xxhash":
+        if xxhash is None:
+            raise ValueError("xxhash algorithm requires the xxhash package")
+        return xxhash.xxh3_128()
+    raise ValueError(f"Invalid hash algorithm: {algorithm}")
+
+
+def hash(byte_content, algorithm="md5"):
+    """Returns the hash of a bytestring (md5 by default)."""
+    return hash_parts([byte_content], algorithm)
+
+
+def hash_parts(parts, algorithm="md5"):
+    """
+    Returns the hash of the concatenation of bytestrings, updating the hash
+    with each part instead of concatenating them.
+    """
+    hasher = get_hasher(algorithm)
+    for part in parts:
+        hasher.update(part)
+    return hasher.hexdigest()
+
 
 # leave as 'chromedriver' if driver is on path
 CHROME_WEBDRIVER_PATH = 'chromedriver'
@@ -4,8 +4,11 @@ website using different request methods and response handling mechanisms.
 """
 from entry_probing.entry_probing import EntryProbing
 from entry_probing.entry_probing_request import HTTPProbingRequest,\
+                                                AsyncHTTPProbingRequest,\
                                                 PyppeteerProbingRequest
 from entry_probing.entry_probing_response import ResponseData,\
                                                  HTTPStatusProbingResponse,\
                                                  TextMatchProbingResponse,\
                                                  BinaryFormatProbingResponse
+from entry_probing.probe_cache import ProbeCache, MemoryProbeCache,\
+                                     DiskProbeCache
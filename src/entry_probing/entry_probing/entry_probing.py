@@ -4,28 +4,44 @@ existence
 """
 from typing import Any, Dict, Hashable, List, Optional
 
-from .entry_probing_request import ProbingRequest
-from .entry_probing_response import ProbingResponse, ResponseData
+import asyncio
+
+from .entry_probing_request import AsyncHTTPProbingRequest, ProbingRequest
+from .entry_probing_response import ProbingResponse, ResponseData, \
+    BODY_NONE, BODY_STREAM, BODY_FULL
+from .probe_cache import ProbeCache
 
 
 class EntryProbing():
     """
     General wrapper for both a ProbingRequest and a ProbingResponse. The
     check_entry method uses these handlers to check if a given entry in a
-    website has been hit or not
+    website has been hit or not.
+    The handlers which don't need the body run first, and the checks stop at
+    the first one failing. The body is only downloaded if a handler needs it,
+    and streamed when every such handler can validate it incrementally, in
+    which case reading stops as soon as the outcome is known.
+    With a cache, the results of the entries are kept by the key of their
+    requests, and entries already checked are not requested again.
     """
 
-    def __init__(self, req_handler: ProbingRequest):
+    def __init__(self, req_handler: ProbingRequest,
+                 cache: ProbeCache = None):
         """
         Initializes the class with the request handler
         :param req_handler: Handler describing how to execute the request
+        :param cache:       cache of the results of the entries, if any
         """
         if not isinstance(req_handler, ProbingRequest):
             raise TypeError("Request handler must be a subclass of " +
                             "ProbingRequest")
 
+        if cache is not None and not isinstance(cache, ProbeCache):
+            raise TypeError("Cache must be a subclass of ProbeCache")
+
         self.__req_handler = req_handler
         self.__resp_handlers = []
+        self.__cache = cache
         # Property where the generated response is stored
         self.__response_obj = None
 
@@ -39,6 +55,29 @@ class EntryProbing():
         return self.__response_obj
 
 
+    @property
+    def cache(self) -> Optional[ProbeCache]:
+        """
+        Returns the cache of the results of the entries, if any
+        """
+        return self.__cache
+
+
+    @property
+    def body_mode(self) -> str:
+        """
+        Returns how the response handlers need the body to be read: BODY_NONE
+        if none uses it, BODY_STREAM if they can scan it as it is read, and
+        BODY_FULL otherwise
+        """
+        body_handlers = [h for h in self.__resp_handlers if h.needs_body]
+        if len(body_handlers) == 0:
+            return BODY_NONE
+        if all(h.scanner() is not None for h in body_handlers):
+            return BODY_STREAM
+        return BODY_FULL
+
+
     def add_response_handler(self, resp_handler: ProbingResponse
                              ) -> 'EntryProbing':
         """
@@ -66,10 +105,141 @@ class EntryProbing():
         :returns: True if entry is valid, False otherwise
         """
 
+        if isinstance(self.__req_handler, AsyncHTTPProbingRequest):
+            return self.check_entries([url_entries], req_entries)[0]
+
+        key = self.__cache_key(url_entries, req_entries)
+        if key is not None:
+            valid = self.__cache.get(key)
+            if valid is not None:
+                return valid
+
         response = self.__req_handler.process(url_entries=url_entries,
-                                              req_entries=req_entries)
+                                              req_entries=req_entries,
+                                              body=self.body_mode)
+        self.__response_obj = response
+        valid = self.__validate(response)
+
+        self.__cache_verdict(key, response, valid)
+        return valid
+
+    def cached_result(self,
+                      url_entries=[],
+                      req_entries={}) -> Optional[bool]:
+        """
+        Returns the result of an entry from the cache, without requesting it
+        :param url_entries: entry parameters to be inserted in the URL in the
+                            request
+        :param req_entries: entry parameters to be inserted in the request body
+        :returns: the cached result, or None if the entry wasn't checked yet
+                  (or there is no cache)
+        """
+        key = self.__cache_key(url_entries, req_entries)
+        if key is None:
+            return None
+        return self.__cache.get(key)
+
+    def check_entries(self,
+                      batch: List[List[Any]],
+                      req_entries: Dict[Hashable, Any] = {}) -> List[bool]:
+        """
+        Checks many entries at once. With an AsyncHTTPProbingRequest, their
+        requests are sent concurrently, otherwise they are checked one at a
+        time. After checking, the response property has the response to the
+        last entry of the batch which was requested (not found in the cache)
+        :param batch:       list of entries, each one a list of parameters to
+                            be inserted in the URL, as in check_entry
+        :param req_entries: entry parameters to be inserted in the request
+                            body of every entry
+        :returns: list with True for each valid entry, False otherwise
+        """
+
+        if isinstance(self.__req_handler, AsyncHTTPProbingRequest):
+            return self.__req_handler.run(
+                self.async_check_entries(batch, req_entries))
+
+        return [self.check_entry(url_entries, req_entries)
+                for url_entries in batch]
+
+    async def async_check_entries(self,
+                                  batch: List[List[Any]],
+                                  req_entries: Dict[Hashable, Any] = {}
+                                  ) -> List[bool]:
+        """
+        Async version of the check_entries() method: the requests of all the
+        entries are awaited concurrently
+        :param batch:       list of entries, each one a list of parameters to
+                            be inserted in the URL, as in check_entry
+        :param req_entries: entry parameters to be inserted in the request
+                            body of every entry
+        :returns: list with True for each valid entry, False otherwise
+        """
+
+        if isinstance(self.__req_handler, AsyncHTTPProbingRequest):
+            # Streamed responses are read in the loop of the requests
+            return await self.__req_handler.run_async(
+                self.__async_check_batch(batch, req_entries))
+        return await self.__async_check_batch(batch, req_entries)
+
+    async def __async_check_batch(self,
+                                  batch: List[List[Any]],
+                                  req_entries: Dict[Hashable, Any]
+                                  ) -> List[bool]:
+        """
+        Requests and validates each entry of the batch concurrently, except
+        for the ones found in the cache
+        """
+        body = self.body_mode
+
+        keys = [self.__cache_key(url_entries, req_entries)
+                for url_entries in batch]
+        results = [self.__cache.get(key) if key is not None else None
+                   for key in keys]
+        pending = [i for i, valid in enumerate(results) if valid is None]
+
+        async def check(url_entries):
+            response = await self.__req_handler.process(
+                url_entries=url_entries, req_entries=req_entries, body=body)
+            return response, await self.__async_validate(response)
+
+        checks = await asyncio.gather(*[check(batch[i]) for i in pending])
+
+        for i, (response, valid) in zip(pending, checks):
+            results[i] = valid
+            self.__cache_verdict(keys[i], response, valid)
+
+        if len(checks) > 0:
+            self.__response_obj = checks[-1][0]
+        return results
+
+    def check_response(self,
+                       response: ResponseData,
+                       url_entries=None,
+                       req_entries={}) -> bool:
+        """
+        Uses the response handlers to check a response obtained elsewhere,
+        e.g.: by a Scrapy request to the entry
+        :param response:    response to the request for the entry
+        :param url_entries: entry parameters inserted in the URL of the
+                            request, to cache the result (if supplied)
+        :param req_entries: entry parameters inserted in the request body
+        :returns: True if entry is valid, False otherwise
+        """
+
         self.__response_obj = response
-        return all([h.process(response) for h in self.__resp_handlers])
+        valid = self.__validate(response)
+
+        if url_entries is not None:
+            key = self.__cache_key(url_entries, req_entries)
+            self.__cache_verdict(key, response, valid)
+        return valid
+
+    def close(self):
+        """
+        Releases the connections kept by the request handler, if any
+        """
+        if isinstance(self.__req_handler, AsyncHTTPProbingRequest):
+            self.__req_handler.close()
 
     async def async_check_entry(self, entry=None) -> bool:
         """
@@ -81,4 +251,110 @@ class EntryProbing():
 
         response = await self.__req_handler.process(entry)
         self.__response_obj = response
-        return all([h.process(response) for h in self.__resp_handlers])
+        return await self.__async_validate(response)
+
+    def __cache_key(self, url_entries, req_entries) -> Optional[str]:
+        """
+        Returns the key of the request for the entries in the cache, or None
+        if there is no cache or the request handler doesn't support it
+        """
+        if self.__cache is None:
+            return None
+        return self.__req_handler.request_key(url_entries, req_entries)
+
+    def __cache_verdict(self, key: Optional[str], response: ResponseData,
+                        valid: bool):
+        """
+        Caches the verdict of a response, unless there is no key or it is a
+        server error (5xx), which is usually transient and should be
+        requested again
+        """
+        if key is None:
+            return
+        if response.status_code is not None and response.status_code >= 500:
+            return
+        self.__cache.put(key, valid)
+
+    def __check_headers(self, response: ResponseData) -> bool:
+        """
+        Runs the handlers which don't need the body, stopping at the first
+        failure
+        :param response: response to be validated
+        :returns: True if every such handler succeeded, False otherwise
+        """
+        return all(h.process(response) for h in self.__resp_handlers
+                   if not h.needs_body)
+
+    def __check_body(self, response: ResponseData) -> bool:
+        """
+        Runs the handlers which need the whole body, stopping at the first
+        failure
+        :param response: response to be validated
+        :returns: True if every such handler succeeded, False otherwise
+        """
+        return all(h.process(response) for h in self.__resp_handlers
+                   if h.needs_body)
+
+    def __scanners(self) -> List:
+        """
+        Returns a (handler, scanner) pair for each handler which needs the
+        body, to validate a streamed response as it is read
+        """
+        return [(h, h.scanner()) for h in self.__resp_handlers
+                if h.needs_body]
+
+    def __scan(self, scanners: List, chunk: str) -> bool:
+        """
+        Feeds the next chunk of the body to the scanners that still need it
+        :param scanners: list of (handler, scanner) pairs
+        :param chunk:    next chunk of the response text
+        :returns: True if the outcome is known, and reading can stop
+        """
+        done = True
+        for handler, scanner in scanners:
+            if scanner.feed(chunk):
+                if not handler.result(scanner.valid):
+                    return True
+            else:
+                done = False
+        return done
+
+    def __validate(self, response: ResponseData) -> bool:
+        """
+        Runs the response handlers on the response, releasing it afterwards
+        :param response: response to be validated
+        :returns: True if every handler succeeded, False otherwise
+        """
+        try:
+            if not self.__check_headers(response):
+                return False
+            if not response.streamed:
+                return self.__check_body(response)
+
+            scanners = self.__scanners()
+            for chunk in response.iter_text():
+                if self.__scan(scanners, chunk):
+                    break
+            return all(h.result(s.valid) for h, s in scanners)
+        finally:
+            response.close()
+
+    async def __async_validate(self, response: ResponseData) -> bool:
+        """
+        Async version of __validate, which can read asynchronous streams
+        :param response: response to be validated
+        :returns: True if every handler succeeded, False otherwise
+        """
+        try:
+            if not self.__check_headers(response):
+                return False
+            if not response.streamed:
+                return self.__check_body(response)
+
+            scanners = self.__scanners()
+            async for chunk in response.aiter_text():
+                if self.__scan(scanners, chunk):
+                    break
+            return all(h.result(s.valid) for h, s in scanners)
+        finally:
+            await response.aclose()
@@ -10,8 +10,15 @@ import asyncio
 import abc
 import pyppeteer
 import requests
+import threading
 
-from .entry_probing_response import ResponseData
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .entry_probing_response import ResponseData, BODY_FULL
+from .probe_cache import request_key
 
 
 class ProbingRequest():
@@ -20,22 +27,39 @@ class ProbingRequest():
     process method, which can receive an entry identifier. It should send an
     appropriate request to the target's URL and return the response, as a
     ResponseData object.
+    Handlers which can avoid reading the body of the response accept the body
+    parameter, telling how much of it the response handlers need.
     """
     __metaclass__ = abc.ABCMeta
 
     @abc.abstractmethod
     def process(self,
                 url_entries: List[Any] = [],
-                req_entries: Dict[Hashable, Any] = {}) -> ResponseData:
+                req_entries: Dict[Hashable, Any] = {},
+                body: str = BODY_FULL) -> ResponseData:
         """
         Abstract method: sends a request to the desired URL and returns the
         response
         :param url_entries: list of parameters to be inserted in the URL
         :param req_entries: dictionary of parameters to be inserted in the
                             request body
+        :param body:        how the body of the response should be read
+                            (BODY_NONE, BODY_STREAM or BODY_FULL)
         """
         pass
 
+    def request_key(self,
+                    url_entries: List[Any] = [],
+                    req_entries: Dict[Hashable, Any] = {}) -> Optional[str]:
+        """
+        Returns the key identifying the request for the given entries in the
+        probing caches, or None if its results can't be cached
+        :param url_entries: list of parameters to be inserted in the URL
+        :param req_entries: dictionary of parameters to be inserted in the
+                            request body
+        """
+        return None
+
 
 class HTTPProbingRequest(ProbingRequest):
     """
@@ -83,16 +107,40 @@ class HTTPProbingRequest(ProbingRequest):
         self.REQUEST_METHODS[method] = function
 
 
+    def request_key(self,
+                    url_entries: List[Any] = [],
+                    req_entries: Dict[Hashable, Any] = {}) -> str:
+        """
+        Returns the key identifying the request for the given entries in the
+        probing caches: its method, URL and body
+        :param url_entries: list of parameters to be inserted in the URL
+        :param req_entries: dictionary of parameters to be inserted in the
+                            request body
+        """
+        formatted_url = self.__url
+        if url_entries is not None and len(url_entries) > 0:
+            formatted_url = self.__url.format(*url_entries)
+
+        request_data = dict(self.__req_data)
+        request_data.update(req_entries)
+        return request_key(self.__method, formatted_url, request_data)
+
+
     def process(self,
                 url_entries: List[Any] = [],
-                req_entries: Dict[Hashable, Any] = {}) -> ResponseData:
+                req_entries: Dict[Hashable, Any] = {},
+                body: str = BODY_FULL) -> ResponseData:
         """
         Sends an HTTP request to the desired URL, formmated according to the
         url_entries parameter. The entries in req_entries are included in the
         request body. Returns the response to this request.
+        Unless the whole body is needed, the response is streamed: its body is
+        only read as requested, and the connection is dropped when closed.
         :param url_entries: list of parameters to be inserted in the URL
         :param req_entries: dictionary of parameters to be inserted in the
                             request body
+        :param body:        how the body of the response should be read
+                            (BODY_NONE, BODY_STREAM or BODY_FULL)
         :returns: Response obtained from the HTTP request
         """
 
@@ -110,10 +158,211 @@ class HTTPProbingRequest(ProbingRequest):
             request_data = self.__req_data
 
         # Sends the request with the supplied method
-        resp = self.REQUEST_METHODS[self.__method](formatted_url,
-                                                   data=request_data)
+        kwargs = {'data': request_data}
+        if body != BODY_FULL:
+            kwargs['stream'] = True
+        resp = self.REQUEST_METHODS[self.__method](formatted_url, **kwargs)
+
+        return ResponseData.create_from_requests(resp, body)
+
+
+class AsyncHTTPProbingRequest(ProbingRequest):
+    """
+    Asynchronous version of HTTPProbingRequest, built on aiohttp. All requests
+    share a pool of keep-alive connections, limited in total and per host, so
+    many entries can be probed concurrently (see EntryProbing.check_entries).
+    Requests run in an event loop kept in a background thread, so the class
+    can be used from synchronous code through the run method, as well as
+    from any event loop.
+    """
+
+    REQUEST_METHODS = ["GET", "POST"]
+
+    def __init__(self, url: str, method: str, req_data: dict = None,
+                 limit: int = 100, limit_per_host: int = 10,
+                 timeout: float = 30):
+        """
+        Constructor for the asynchronous HTTP request handler.
+        :param url:            URL to be requested, with possible placeholders
+                               for entry parameters
+        :param method:         HTTP method to use for the request
+        :param req_data:       dictionary of extra data to be sent in the
+                               request body, if necessary
+        :param limit:          maximum number of simultaneous connections
+        :param limit_per_host: maximum number of simultaneous connections to
+                               the same host
+        :param timeout:        maximum time in seconds for each request
+        """
+        super().__init__()
+        self.__url = url
+        self.__method = method.upper()
+        self.__req_data = req_data if req_data is not None else {}
+        self.__limit = limit
+        self.__limit_per_host = limit_per_host
+        self.__timeout = timeout
+
+        if req_data is not None and not isinstance(req_data, dict):
+            raise TypeError("Request data to be sent must be a dictionary")
+
+        if self.__method not in self.REQUEST_METHODS:
+            raise ValueError(f"HTTP method not supported: {method}")
+
+        if aiohttp is None:
+            raise ValueError("AsyncHTTPProbingRequest requires the aiohttp " +
+                             "package")
+
+        self.__loop = None
+        self.__thread = None
+        self.__session = None
+        self.__lock = threading.Lock()
+
+
+    def __get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Returns the event loop where requests are sent, starting its thread
+        on first use
+        """
+        with self.__lock:
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+                self.__thread = threading.Thread(
+                    target=self.__loop.run_forever, daemon=True)
+                self.__thread.start()
+            return self.__loop
+
+
+    def __get_session(self) -> 'aiohttp.ClientSession':
+        """
+        Returns the session holding the connection pool, creating it on first
+        use. Must be called from the loop of the requests.
+        """
+        if self.__session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.__limit, limit_per_host=self.__limit_per_host)
+            self.__session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.__timeout))
+        return self.__session
+
+
+    def run(self, coroutine) -> Any:
+        """
+        Runs a coroutine in the loop of the requests, waiting for its result.
+        Used to call the asynchronous methods from synchronous code.
+        :param coroutine: coroutine to be run
+        :returns: the result of the coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine,
+                                                self.__get_loop()).result()
+
+
+    async def run_async(self, coroutine) -> Any:
+        """
+        Awaits a coroutine in the loop of the requests, from any event loop.
+        Streamed responses must be read in that loop.
+        :param coroutine: coroutine to be run
+        :returns: the result of the coroutine
+        """
+        loop = self.__get_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coroutine
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        return await asyncio.wrap_future(future)
+
+
+    async def __request(self,
+                        url_entries: List[Any],
+                        req_entries: Dict[Hashable, Any],
+                        body: str) -> ResponseData:
+        """
+        Sends the request, in the loop of the requests
+        """
+
+        # Formats the URL with the url_entries list
+        formatted_url = self.__url
+        if url_entries is not None and len(url_entries) > 0:
+            formatted_url = self.__url.format(*url_entries)
+
+        # Inserts required values in the request body, without changing the
+        # data shared by concurrent requests
+        request_data = dict(self.__req_data)
+        for key in req_entries:
+            request_data[key] = req_entries[key]
+
+        if not bool(request_data):
+            request_data = None
+
+        session = self.__get_session()
+        resp = await session.request(self.__method, formatted_url,
+                                     data=request_data)
+        try:
+            return await ResponseData.create_from_aiohttp(resp, body)
+        except BaseException:
+            resp.close()
+            raise
+
+
+    def request_key(self,
+                    url_entries: List[Any] = [],
+                    req_entries: Dict[Hashable, Any] = {}) -> str:
+        """
+        Returns the key identifying the request for the given entries in the
+        probing caches: its method, URL and body
+        :param url_entries: list of parameters to be inserted in the URL
+        :param req_entries: dictionary of parameters to be inserted in the
+                            request body
+        """
+        formatted_url = self.__url
+        if url_entries is not None and len(url_entries) > 0:
+            formatted_url = self.__url.format(*url_entries)
+
+        request_data = dict(self.__req_data)
+        request_data.update(req_entries)
+        return request_key(self.__method, formatted_url, request_data)
+
+
+    async def process(self,
+                      url_entries: List[Any] = [],
+                      req_entries: Dict[Hashable, Any] = {},
+                      body: str = BODY_FULL) -> ResponseData:
+        """
+        Sends an HTTP request to the desired URL, formmated according to the
+        url_entries parameter. The entries in req_entries are included in the
+        request body. Returns the response to this request. Defined as a
+        coroutine, which can be awaited from any event loop.
+        Streamed responses (body set to BODY_STREAM) must be read and closed
+        in the loop of the requests (see run_async).
+        :param url_entries: list of parameters to be inserted in the URL
+        :param req_entries: dictionary of parameters to be inserted in the
+                            request body
+        :param body:        how the body of the response should be read
+                            (BODY_NONE, BODY_STREAM or BODY_FULL)
+        :returns: Response obtained from the HTTP request
+        """
+
+        return await self.run_async(
+            self.__request(url_entries, req_entries, body))
+
+
+    def close(self):
+        """
+        Closes the connections and stops the loop of the requests
+        """
+        with self.__lock:
+            loop, self.__loop = self.__loop, None
+        if loop is None:
+            return
+
+        async def close_session():
+            if self.__session is not None:
+                await self.__session.close()
+                self.__session = None
 
-        return ResponseData.create_from_requests(resp)
+        asyncio.run_coroutine_threadsafe(close_session(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self.__thread.join()
+        loop.close()
 
 
 class PyppeteerProbingRequest(ProbingRequest):
@@ -158,7 +407,7 @@ class PyppeteerProbingRequest(ProbingRequest):
 
         page.on('response', self.__intercept_response)
 
-    async def process(self, *_) -> ResponseData:
+    async def process(self, *_, **__) -> ResponseData:
         """
         Returns the received response data from a request done using Pyppeteer,
         overwriting the text property to get the current contents of the page
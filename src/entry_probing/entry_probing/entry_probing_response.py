@@ -4,9 +4,74 @@ for the entry probing process
 """
 
 import abc
+import codecs
+import re
 import requests
 import pyppeteer
-from typing import Any, Dict, Hashable, List, Optional
+from typing import Any, Dict, Hashable, List, Optional, Union
+
+# How the body of a response is read: not at all (only the status and headers
+# are used), as a stream of text chunks which can be abandoned at any point,
+# or completely, before the response is returned
+BODY_NONE = "none"
+BODY_STREAM = "stream"
+BODY_FULL = "full"
+
+# Unneeded bodies up to this size (by their Content-Length) are still read, so
+# the connection is released for reuse (keep-alive) instead of being dropped
+MAX_DRAINED_BODY = 64 * 1024
+
+# Helper functions
+
+def decode_chunks(chunks, encoding: str = None):
+    """
+    Decodes an iterator of bytes into an iterator of text, handling
+    characters split between chunks
+    :param chunks:   iterator over the bytes of a body
+    :param encoding: encoding of the body (UTF-8 if not supplied)
+    :returns: generator of the decoded text chunks
+    """
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(
+        errors='replace')
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+async def async_decode_chunks(chunks, encoding: str = None):
+    """
+    Async version of decode_chunks, for an async iterator of bytes
+    :param chunks:   async iterator over the bytes of a body
+    :param encoding: encoding of the body (UTF-8 if not supplied)
+    :returns: async generator of the decoded text chunks
+    """
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(
+        errors='replace')
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def drainable(headers) -> bool:
+    """
+    Checks if an unneeded body is small enough to be read anyway, keeping the
+    connection alive
+    :param headers: headers of the response
+    :returns: True if the body has a Content-Length of at most
+              MAX_DRAINED_BODY bytes
+    """
+    try:
+        return int(headers.get('Content-Length')) <= MAX_DRAINED_BODY
+    except (TypeError, ValueError):
+        return False
 
 # Helper class
 
@@ -16,38 +81,211 @@ class ResponseData():
     Data class to store the response to a request in a more general form.
     Contains class methods to generate a correct instance from another
     library's response format.
+    The body of a streamed response is read as its text is requested, either
+    in chunks (iter_text and aiter_text) or at once (the text property), and
+    the connection must be released with close (or aclose) afterwards.
     """
 
+    # Size in bytes of the chunks read from streamed responses
+    CHUNK_SIZE = 16 * 1024
+
     def __init__(self,
                  headers: dict = None,
                  status_code: int = None,
-                 text: str = None):
+                 text: str = None,
+                 chunks=None,
+                 close=None):
         """
         Response constructor. Should be called from the create_from_* methods.
         :param headers:     HTTP headers for the response
         :param status_code: HTTP status code for the response
         :param text:        text data received
+        :param chunks:      iterator (or async iterator) over the text of a
+                            streamed response, which wasn't read yet
+        :param close:       function (or coroutine function) releasing the
+                            connection of a streamed response
         """
         self.headers = headers
         self.status_code = status_code
-        self.text = text
+        self.__text = text
+        self.__chunks = chunks
+        self.__close = close
+
+    @property
+    def text(self) -> str:
+        """
+        Text data received. For streamed responses, the rest of the body is
+        read on first access (only possible for synchronous streams)
+        """
+        if self.__text is None and self.streamed:
+            if hasattr(self.__chunks, '__aiter__'):
+                raise ValueError("The text of an asynchronous stream must " +
+                                 "be read with aiter_text")
+            self.__text = "".join(self.__chunks)
+            self.__chunks = None
+        return self.__text
+
+    @text.setter
+    def text(self, value: str):
+        self.__text = value
+        self.__chunks = None
+
+    @property
+    def streamed(self) -> bool:
+        """
+        True if the body of the response still has to be read
+        """
+        return self.__chunks is not None
+
+    def iter_text(self):
+        """
+        Yields the text of the response in chunks, reading the body of
+        streamed responses as the chunks are consumed. Chunks are not kept, so
+        a streamed body can only be iterated once
+        :returns: generator of text chunks
+        """
+        if not self.streamed:
+            if self.text:
+                yield self.text
+            return
+
+        for chunk in self.__chunks:
+            yield chunk
+
+    async def aiter_text(self):
+        """
+        Async version of iter_text, which also reads asynchronous streams
+        :returns: async generator of text chunks
+        """
+        if self.streamed and hasattr(self.__chunks, '__aiter__'):
+            async for chunk in self.__chunks:
+                yield chunk
+            return
+
+        for chunk in self.iter_text():
+            yield chunk
+
+    def close(self):
+        """
+        Releases the connection of a streamed response, abandoning the rest of
+        its body
+        """
+        close, self.__close = self.__close, None
+        self.__chunks = None
+        if close is not None:
+            close()
+
+    async def aclose(self):
+        """
+        Async version of close, which also awaits asynchronous releases
+        """
+        close, self.__close = self.__close, None
+        self.__chunks = None
+        if close is not None:
+            result = close()
+            if hasattr(result, '__await__'):
+                await result
 
     @classmethod
     def create_from_requests(cls,
-                             resp: requests.models.Response) -> 'ResponseData':
+                             resp: requests.models.Response,
+                             body: str = BODY_FULL) -> 'ResponseData':
         """
         Create an appropriate object from a requests.models.Response object
         :param resp: response received from the use of the requests library
+                     (requested with stream=True, unless body is BODY_FULL)
+        :param body: how the body should be read (BODY_NONE, BODY_STREAM or
+                     BODY_FULL)
         :returns: an instance of ResponseData with the information in resp
         """
-        text = ""
-        if 'text' in resp.headers['Content-Type'].split('/')[0]:
-            text = resp.text
+        is_text = 'text' in resp.headers['Content-Type'].split('/')[0]
+
+        if body == BODY_FULL:
+            text = resp.text if is_text else ""
+            return cls(headers=resp.headers,
+                       status_code=resp.status_code,
+                       text=text)
 
+        if body == BODY_STREAM and is_text:
+            chunks = decode_chunks(resp.iter_content(cls.CHUNK_SIZE),
+                                   resp.encoding)
+            return cls(headers=resp.headers,
+                       status_code=resp.status_code,
+                       chunks=chunks,
+                       close=resp.close)
+
+        # The body is not needed. Small ones are read, so closing the
+        # response returns the connection to the pool, others are aborted
+        if drainable(resp.headers):
+            resp.content
+        resp.close()
         return cls(headers=resp.headers,
                    status_code=resp.status_code,
+                   text="")
+
+    @classmethod
+    def create_from_scrapy(cls, resp, body: str = BODY_FULL) -> 'ResponseData':
+        """
+        Create an appropriate object from a scrapy.http.Response object
+        :param resp: response received by a Scrapy spider
+        :param body: BODY_NONE to skip decoding the text of the body, when it
+                     is not needed
+        :returns: an instance of ResponseData with the information in resp
+        """
+        headers = requests.structures.CaseInsensitiveDict()
+        for key, values in resp.headers.items():
+            headers[key.decode()] = b','.join(values).decode('latin-1')
+
+        text = ""
+        content_type = headers.get('Content-Type', '')
+        if body != BODY_NONE and 'text' in content_type.split('/')[0]:
+            text = resp.text
+
+        return cls(headers=headers,
+                   status_code=resp.status,
                    text=text)
 
+    @classmethod
+    async def create_from_aiohttp(cls, resp,
+                                  body: str = BODY_FULL) -> 'ResponseData':
+        """
+        Create an appropriate object from an aiohttp.ClientResponse object.
+        Defined as a coroutine, since the body is read asynchronously
+        :param resp: response received from the use of the aiohttp library
+        :param body: how the body should be read (BODY_NONE, BODY_STREAM or
+                     BODY_FULL)
+        :returns: an instance of ResponseData with the information in resp
+        """
+        is_text = 'text' in resp.headers.get('Content-Type', '').split('/')[0]
+
+        if body == BODY_FULL:
+            text = ""
+            if is_text:
+                text = await resp.text(errors='replace')
+            resp.release()
+            return cls(headers=resp.headers,
+                       status_code=resp.status,
+                       text=text)
+
+        if body == BODY_STREAM and is_text:
+            chunks = async_decode_chunks(
+                resp.content.iter_chunked(cls.CHUNK_SIZE), resp.charset)
+            return cls(headers=resp.headers,
+                       status_code=resp.status,
+                       chunks=chunks,
+                       close=resp.close)
+
+        # The body is not needed. Small ones are read and the connection
+        # released for reuse, others are aborted with it
+        if drainable(resp.headers):
+            await resp.read()
+            resp.release()
+        else:
+            resp.close()
+        return cls(headers=resp.headers,
+                   status_code=resp.status,
+                   text="")
+
     @classmethod
     async def create_from_pyppeteer(cls,
                                     resp: pyppeteer.network_manager.Response
@@ -83,9 +321,15 @@ class ProbingResponse():
     ResponseData object and return a boolean indicating if the desired
     condition is met. The process method should be called externally, and
     accounts for the possible negation of the result.
+    Handlers which use the body of the response set needs_body, so that
+    requests can skip reading it when no handler does. They may also return a
+    scanner, which validates the body incrementally as it is read.
     """
     __metaclass__ = abc.ABCMeta
 
+    # Whether the handler uses the text of the response
+    needs_body = False
+
     def __init__(self, opposite: bool = False):
         """
         Constructor for a response handler
@@ -113,9 +357,26 @@ class ProbingResponse():
         :returns: a boolean indicating if the specified condition was met,
                   taking the opposite flag into consideration
         """
-        valid = self._validate_resp(response)
+        return self.result(self._validate_resp(response))
+
+    def result(self, valid: bool) -> bool:
+        """
+        Applies the opposite flag to a validation result
+        :param valid: whether the response meets the desired condition
+        :returns: the result of the handler
+        """
         return valid if not self.opposite else (not valid)
 
+    def scanner(self):
+        """
+        Returns an object validating the body as it is read, or None if the
+        handler needs the whole response. Scanners have a feed method, which
+        receives the next text chunk and returns True once the outcome is
+        known, and a valid attribute with the validation result (before the
+        opposite flag is applied)
+        """
+        return None
+
 
 class HTTPStatusProbingResponse(ProbingResponse):
     """
@@ -140,19 +401,89 @@ class HTTPStatusProbingResponse(ProbingResponse):
         return response.status_code == self.status_code
 
 
+class TextMatchScanner():
+    """
+    Incremental case-insensitive search of strings in text chunks. Each chunk
+    is lowercased on its own, and only the end of the previous one is kept,
+    to find matches split between chunks
+    """
+
+    def __init__(self, text_matches: List[str]):
+        """
+        Constructor for the scanner
+        :param text_matches: lowercase strings to be found (any of them)
+        """
+        self.text_matches = text_matches
+        self.valid = False
+        self.__keep = max(len(t) for t in text_matches) - 1
+        self.__tail = ""
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Searches the strings in the next chunk of text
+        :param chunk: next chunk of the response text
+        :returns: True if a string was found (the outcome is known)
+        """
+        if self.valid:
+            return True
+
+        chunk = chunk.lower()
+        if any(t in chunk for t in self.text_matches):
+            self.valid = True
+            return True
+
+        # Matches starting in the previous chunk
+        if self.__tail:
+            border = self.__tail + chunk[:self.__keep]
+            if any(t in border for t in self.text_matches):
+                self.valid = True
+                return True
+
+        if len(chunk) < self.__keep:
+            chunk = self.__tail + chunk
+        self.__tail = chunk[max(0, len(chunk) - self.__keep):]
+        return False
+
+
 class TextMatchProbingResponse(ProbingResponse):
     """
     Response handler which checks for the presence of a specified string within
-    the response body
+    the response body. Many strings (or regular expressions) may be supplied,
+    in which case any of them must be present. The search is case-insensitive
+    and never copies the whole body: strings are searched in lowercased
+    windows of the text, and regular expressions are compiled once into a
+    single case-insensitive pattern
     """
 
-    def __init__(self, text_match: str, *args, **kwargs):
+    needs_body = True
+
+    # Size of the windows of the text lowercased at a time
+    WINDOW_SIZE = 64 * 1024
+
+    def __init__(self, text_match: Union[str, List[str]], *args,
+                 regex: bool = False, **kwargs):
         """
         Text matching response constructor
-        :param text_match: string to be found within the response body
+        :param text_match: string to be found within the response body, or
+                           list of strings, any of which must be found
+        :param regex:      if True, the strings are regular expressions
         """
         super().__init__(*args, **kwargs)
+
+        text_matches = [text_match] if isinstance(text_match, str) else \
+            list(text_match)
+        if len(text_matches) == 0 or \
+                not all(isinstance(t, str) for t in text_matches):
+            raise TypeError("Text to match must be a string or a list of " +
+                            "strings")
+
         self.text_match = text_match
+        self.regex = regex
+        self.pattern = None
+        if regex:
+            self.pattern = re.compile(
+                "|".join(f"(?:{t})" for t in text_matches), re.IGNORECASE)
+        self.__text_matches = [t.lower() for t in text_matches]
 
     def _validate_resp(self, response: ResponseData) -> bool:
         """
@@ -162,7 +493,25 @@ class TextMatchProbingResponse(ProbingResponse):
         :returns: True if the response contains the specified string, false
                   otherwise
         """
-        return self.text_match.lower() in response.text.lower()
+        text = response.text
+        if self.pattern is not None:
+            return self.pattern.search(text) is not None
+
+        scanner = self.scanner()
+        for start in range(0, len(text), self.WINDOW_SIZE):
+            if scanner.feed(text[start:start + self.WINDOW_SIZE]):
+                break
+        return scanner.valid
+
+    def scanner(self) -> Optional[TextMatchScanner]:
+        """
+        Returns a scanner searching the strings in the response body as it is
+        read, stopping as soon as one of them is found. Regular expressions
+        may match text of any length, so they need the whole body
+        """
+        if self.pattern is not None:
+            return None
+        return TextMatchScanner(self.__text_matches)
 
 
 class BinaryFormatProbingResponse(ProbingResponse):
@@ -0,0 +1,265 @@
+"""
+This module contains caches of probing results, so entries already checked
+(e.g.: by a range inference pass) are not requested again
+"""
+from typing import Any, Dict, Optional
+
+import abc
+import collections
+import json
+import sqlite3
+import threading
+import time
+
+
+def request_key(method: str, url: str, data: Dict[str, Any] = None) -> str:
+    """
+    Returns the key of a request in the probing caches
+    :param method: HTTP method of the request
+    :param url:    URL requested, with the entries already inserted
+    :param data:   data sent in the request body, if any
+    :returns: a string identifying the request
+    """
+    return json.dumps([method.upper(), url, data or None], sort_keys=True,
+                      default=str)
+
+
+class ProbeCache():
+    """
+    Abstract parent class for caches of probing results. Maps the key of a
+    request (see request_key) to the verdict of the response handlers, for at
+    most max_size requests, evicting the least recently used ones. Verdicts
+    expire after ttl seconds, if supplied. Child classes implement the storage
+    of the verdicts. The verdicts depend on the response handlers, so a cache
+    should only be shared by probes with the same handlers.
+    """
+    __metaclass__ = abc.ABCMeta
+
+    def __init__(self, max_size: int = 100000, ttl: float = None):
+        """
+        Constructor for the cache
+        :param max_size: maximum number of verdicts kept
+        :param ttl:      seconds a verdict is valid for (None keeps them until
+                         evicted)
+        """
+        if max_size < 1:
+            raise ValueError("The cache must hold at least one verdict")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _expired(self, created: float) -> bool:
+        """
+        Checks if a verdict stored at the given time has expired
+        """
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key: str) -> Optional[bool]:
+        """
+        Returns the verdict cached for a request
+        :param key: key of the request
+        :returns: the cached verdict, or None if there is none (or it expired)
+        """
+        with self._lock:
+            verdict = self._get(key)
+            if verdict is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return verdict
+
+    def put(self, key: str, verdict: bool):
+        """
+        Caches the verdict of a request, evicting the least recently used
+        ones if the cache is full
+        :param key:     key of the request
+        :param verdict: result of the response handlers
+        """
+        with self._lock:
+            self._put(key, bool(verdict))
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of hits, misses and cached verdicts
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self)}
+
+    @abc.abstractmethod
+    def _get(self, key: str) -> Optional[bool]:
+        """
+        Abstract method: returns the verdict stored for the key, if it didn't
+        expire, marking it as recently used
+        """
+        pass
+
+    @abc.abstractmethod
+    def _put(self, key: str, verdict: bool):
+        """
+        Abstract method: stores the verdict, keeping at most max_size of them
+        """
+        pass
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def close(self):
+        """
+        Releases the resources used by the cache
+        """
+        pass
+
+
+class MemoryProbeCache(ProbeCache):
+    """
+    Cache of probing results kept in memory, shared by the checks of a single
+    process
+    """
+
+    def __init__(self, max_size: int = 100000, ttl: float = None):
+        """
+        Constructor for the cache
+        :param max_size: maximum number of verdicts kept
+        :param ttl:      seconds a verdict is valid for (None keeps them until
+                         evicted)
+        """
+        super().__init__(max_size, ttl)
+        # Maps each key to its verdict and creation time, from the least to
+        # the most recently used
+        self.__entries = collections.OrderedDict()
+
+    def _get(self, key: str) -> Optional[bool]:
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+
+        verdict, created = entry
+        if self._expired(created):
+            del self.__entries[key]
+            return None
+
+        self.__entries.move_to_end(key)
+        return verdict
+
+    def _put(self, key: str, verdict: bool):
+        self.__entries[key] = (verdict, time.time())
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+class DiskProbeCache(ProbeCache):
+    """
+    Cache of probing results kept in a SQLite database, which persists between
+    runs and can be shared by many processes. The number of stored verdicts is
+    tracked in memory, so inserting doesn't count the table; it is recounted
+    only when it passes max_size, as other processes may have changed it.
+    Hits don't write to the database: their usage times are kept in memory
+    and written in batches of used_batch_size, before evicting and on close
+    """
+
+    def __init__(self, path: str, max_size: int = 100000, ttl: float = None,
+                 used_batch_size: int = 1000):
+        """
+        Constructor for the cache
+        :param path:            path of the database file
+        :param max_size:        maximum number of verdicts kept
+        :param ttl:             seconds a verdict is valid for (None keeps
+                                them until evicted)
+        :param used_batch_size: number of usage times kept in memory before
+                                writing them
+        """
+        super().__init__(max_size, ttl)
+        self.used_batch_size = used_batch_size
+        # Maps the keys of the verdicts hit to the time of their last use
+        self.__used = {}
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS probes (key TEXT PRIMARY KEY, "
+            "verdict INTEGER, created REAL, used REAL)")
+        self.__connection.execute(
+            "CREATE INDEX IF NOT EXISTS probes_used ON probes (used)")
+        self.__connection.commit()
+        self.__size = self.__count()
+
+    def _get(self, key: str) -> Optional[bool]:
+        row = self.__connection.execute(
+            "SELECT verdict, created FROM probes WHERE key = ?",
+            (key,)).fetchone()
+        if row is None:
+            return None
+
+        verdict, created = row
+        if self._expired(created):
+            deleted = self.__connection.execute(
+                "DELETE FROM probes WHERE key = ?", (key,)).rowcount
+            self.__connection.commit()
+            self.__size -= deleted
+            self.__used.pop(key, None)
+            return None
+
+        self.__used[key] = time.time()
+        if len(self.__used) >= self.used_batch_size:
+            self.__write_used()
+            self.__connection.commit()
+        return bool(verdict)
+
+    def __write_used(self):
+        """
+        Writes the usage times kept in memory to the database, without
+        committing
+        """
+        if self.__used:
+            self.__connection.executemany(
+                "UPDATE probes SET used = ? WHERE key = ?",
+                [(used, key) for key, used in self.__used.items()])
+            self.__used.clear()
+
+    def _put(self, key: str, verdict: bool):
+        now = time.time()
+        updated = self.__connection.execute(
+            "UPDATE probes SET verdict = ?, created = ?, used = ? "
+            "WHERE key = ?", (int(verdict), now, now, key)).rowcount
+        if updated == 0:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)",
+                (key, int(verdict), now, now))
+            self.__size += 1
+        self.__used.pop(key, None)
+
+        if self.__size > self.max_size:
+            # The least recently used are evicted, so the usage times must
+            # be up to date
+            self.__write_used()
+            self.__size = self.__count()
+            excess = self.__size - self.max_size
+            if excess > 0:
+                self.__size -= self.__connection.execute(
+                    "DELETE FROM probes WHERE key IN (SELECT key FROM probes "
+                    "ORDER BY used LIMIT ?)", (excess,)).rowcount
+        self.__connection.commit()
+
+    def __count(self) -> int:
+        return self.__connection.execute(
+            "SELECT COUNT(*) FROM probes").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def close(self):
+        """
+        Writes the pending usage times and closes the database
+        """
+        with self._lock:
+            self.__write_used()
+            self.__connection.commit()
+            self.__connection.close()
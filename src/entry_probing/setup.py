@@ -17,4 +17,5 @@ setuptools.setup(
         "Programming Language :: Python :: 3"
     ],
     install_requires=['requests', 'pyppeteer'],
+    extras_require={'async': ['aiohttp']},
 )
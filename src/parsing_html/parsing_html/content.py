@@ -4,20 +4,28 @@ import errno
 from .table import *
 from .div import *
 
+# List of elements that are going to be removed from the html
+REMOVE_LIST = ["head", "header", "footer", "polygon", "path", "script",
+               "symbol", "meta", "link", "title", "style", "nav", "form"]
+REMOVE_CLASS = ["sidebar-inner", "breadcrumb", "share", "navegacao",
+                "skiptranslate", "goog-te-spinner-pos", "social-list",
+                "social-icon", "copyright", "id_assist_frame",
+                "fbc-badge-tooltip", "areaNaoImprimivel", "menu_container"]
+REMOVE_ID = ["boxes", "mySidenav", "chat-panel", "footer"]
+
+# Tags that indicate the content is in a table or div format
+TABLE_TAGS = ["table"]
+DIV_TAGS = ["p", "h1", "h2", "h3"]
+
 
 def clean_html(html_file, is_string):
     """
     Receives the html file and removes unnecessary parts, as header and footer.
     """
 
-    # List of elements that are going to be removed from the html
-    remove_list = ["head", "header", "footer", "polygon", "path", "script",
-                   "symbol", "meta", "link", "title", "style", "nav", "form"]
-    remove_class = ["sidebar-inner", "breadcrumb", "share", "navegacao",
-                    "skiptranslate", "goog-te-spinner-pos", "social-list",
-                    "social-icon", "copyright", "id_assist_frame",
-                    "fbc-badge-tooltip", "areaNaoImprimivel", "menu_container"]
-    remove_id = ["boxes", "mySidenav", "chat-panel", "footer"]
+    remove_list = REMOVE_LIST
+    remove_class = REMOVE_CLASS
+    remove_id = REMOVE_ID
 
     # Check if the html_file is a string with the page or a path to the file
     soup = ""
@@ -74,9 +82,8 @@ def check_div(html_file):
     table_content = False
     div_content = False
 
-    # List of elements that are going to be removed from the html
-    table_tag = ["table"]
-    div_tag = ["p", "h1", "h2", "h3"]
+    table_tag = TABLE_TAGS
+    div_tag = DIV_TAGS
 
     # Open the string with BeautifulSoup
     f = html_file
@@ -176,3 +183,101 @@ def html_detect_content(html_file, is_string=False, output_file='output',
                 pass
         # raise the same exception
         raise e
+
+
+def clean_tree(tree):
+    """
+    Receives an lxml.html tree and removes unnecessary parts, as header and
+    footer, in place. Same rules as clean_html.
+    """
+    remove_class = set(REMOVE_CLASS)
+    remove_id = set(REMOVE_ID)
+
+    to_remove = list(tree.iter(*REMOVE_LIST))
+    for el in tree.iter("div", "table"):
+        if el.get("id") in remove_id:
+            to_remove.append(el)
+        elif el.tag == "div" and \
+                remove_class.intersection(el.get("class", "").split()):
+            to_remove.append(el)
+
+    for el in to_remove:
+        if el.getparent() is not None:
+            el.drop_tree()
+
+    return tree
+
+
+def set_link_text(a):
+    """Replaces the contents of a link element with its href value."""
+    for child in list(a):
+        a.remove(child)
+    a.text = a.get("href")
+
+
+def fix_tree_links(tree):
+    """
+    Receives an lxml.html tree and replaces the text of absolute links with
+    their values, in place. Same rules as fix_links.
+    """
+    for a in tree.iter("a"):
+        if "http" in a.get("href", ""):
+            set_link_text(a)
+
+    return tree
+
+
+def check_tree(tree):
+    """
+    Receives an lxml.html tree and returns booleans indicating if the content
+    is in a table or div. Same rules as check_div.
+    """
+    table_content = next(tree.iter(*TABLE_TAGS), None) is not None
+    div_content = next(tree.iter(*DIV_TAGS), None) is not None
+
+    return table_content, div_content
+
+
+def tree_detect_content(tree, output_file='output',
+                        match='.+', flavor=None, header=None, index_col=None, skiprows=None,
+                        attrs=None, parse_dates=False, thousands=', ', encoding=None, decimal='.',
+                        converters=None, na_values=None, keep_default_na=True, displayed_only=True,
+                        to_csv=False):
+    """
+    Same as html_detect_content, but receives an already parsed lxml.html
+    tree, which is modified in place. Cleaning, link fixing, content
+    detection and div extraction run on the tree itself, so the page is not
+    parsed again.
+
+    :param tree : lxml.html.HtmlElement (Root of the parsed page)
+    Other parameters are described in html_detect_content.
+    """
+    try:
+        clean_tree(tree)
+        fix_tree_links(tree)
+
+        table_content, div_content = check_tree(tree)
+        if div_content:
+            tree_div_to_file(tree, output_file, to_csv)
+        if table_content:
+            tree_table_to_file(
+                tree, output_file, match, flavor, header, index_col,
+                skiprows, attrs, parse_dates, thousands, encoding, decimal,
+                converters, na_values, keep_default_na, displayed_only, to_csv)
+        if not (table_content or div_content):
+            raise ValueError('No content found.')
+
+    except Exception as e:
+        # try to remove output file if any error occured
+        files = [
+            output_file,
+            output_file + ".csv",
+            output_file + ".json",
+        ]
+        for f in files:
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+        # raise the same exception
+        raise e
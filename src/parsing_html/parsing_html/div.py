@@ -22,6 +22,18 @@ def extract_div(html_file):
     return csv_list_all
 
 
+def extract_tree_div(tree):
+    """
+    Receives an lxml.html tree and creates a list of elements with the content
+    of the page
+    """
+    csv_list_all = []
+    for val in tree.itertext():
+        if val != '\n' and not val.isspace():
+            csv_list_all.append(val)
+    return csv_list_all
+
+
 def write_file(list_content, output_name, to_csv):
     """
     Receives a list of content and the name of the output file, saves the file
@@ -50,3 +62,17 @@ def div_to_file(html_file_path, output_file='output', to_csv=False):
     list_content = extract_div(html_file_path)
     # Saves the content in a file
     write_file(list_content, output_file, to_csv)
+
+
+def tree_div_to_file(tree, output_file='output', to_csv=False):
+    """
+    Receives an lxml.html tree, converts its content to csv and saves the file
+    on disk.
+
+    :param tree : lxml.html.HtmlElement (Root of the parsed page)
+    :param output_file : str, optional (Name and path of the output file,
+    default is output)
+    :param to_csv : bool, default False (Whether the output file is csv or json)
+    """
+    list_content = extract_tree_div(tree)
+    write_file(list_content, output_file, to_csv)
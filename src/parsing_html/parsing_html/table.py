@@ -1,3 +1,5 @@
+import io
+import lxml.html
 import pandas as pd
 from bs4 import BeautifulSoup
 
@@ -32,6 +34,42 @@ def html_to_df(html_file, match, flavor, header, index_col, skiprows, attrs,
     return dfs
 
 
+def tree_to_df(tree, match, flavor, header, index_col, skiprows, attrs,
+               parse_dates, thousands, encoding, decimal, converters, na_values,
+               keep_default_na, displayed_only):
+    """
+    Same as html_to_df, but receives an lxml.html tree. Only the outermost
+    tables are serialized and handed to Pandas, after the link elements inside
+    them have their text replaced by their values.
+    """
+    try:
+        tables = [t for t in tree.iter('table')
+                  if next(t.iterancestors('table'), None) is None]
+
+        for table in tables:
+            for a in table.iter('a'):
+                if a.get('href') is not None:
+                    for child in list(a):
+                        a.remove(child)
+                    a.text = a.get('href')
+
+        html_tables = "".join(lxml.html.tostring(t, encoding='unicode')
+                              for t in tables)
+
+        dfs = pd.read_html(io.StringIO(html_tables), match=match, flavor=flavor,
+                           header=header, index_col=index_col,
+                           skiprows=skiprows, attrs=attrs,
+                           parse_dates=parse_dates, thousands=thousands,
+                           encoding=encoding, decimal=decimal,
+                           converters=converters, na_values=na_values,
+                           keep_default_na=keep_default_na,
+                           displayed_only=displayed_only)
+    except:
+        raise Exception("The table could not be found in the HTML file.")
+
+    return dfs
+
+
 def df_to_file(dfs, output_file, to_csv, index=False):
     """
     Receives a list of DataFrames and write them to a csv file (output_file).
@@ -95,3 +133,20 @@ def table_to_file(html_file_path, output_file='output',
                      na_values, keep_default_na, displayed_only)
     # Save the Pandas DataFrame to a file
     df_to_file(dfs, output_file, to_csv)
+
+
+def tree_table_to_file(tree, output_file='output',
+                       match='.+', flavor=None, header=None, index_col=None, skiprows=None,
+                       attrs=None, parse_dates=False, thousands=', ', encoding=None, decimal='.',
+                       converters=None, na_values=None, keep_default_na=True, displayed_only=True, to_csv=False):
+    """
+    Same as table_to_file, but receives an lxml.html tree instead of the html
+    file.
+
+    :param tree : lxml.html.HtmlElement (Root of the parsed page)
+    Other parameters are described in table_to_file.
+    """
+    dfs = tree_to_df(tree, match, flavor, header, index_col,
+                     skiprows, attrs, parse_dates, thousands, encoding, decimal, converters,
+                     na_values, keep_default_na, displayed_only)
+    df_to_file(dfs, output_file, to_csv)
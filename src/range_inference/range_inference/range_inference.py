@@ -2,6 +2,7 @@
 This module filters the search space for a specified parameter
 """
 
+import concurrent.futures
 import datetime
 import functools
 import itertools
@@ -18,6 +19,10 @@ class RangeInference():
     space. The __filter_range method is the core of the binary search. The
     filter_numeric_range and filter_daterange methods do computation on the
     inputs to call __filter_range accordingly.
+
+    The entries near each midpoint are probed concurrently, in batches of
+    parallel entries, and an optional budget limits the number of entries
+    probed in the search of each range.
     """
 
 
@@ -30,6 +35,8 @@ class RangeInference():
                                range_gen: Generator,
                                extra_params: Optional[List[Any]] = None,
                                preprocess: Callable[[Any, Any], Any] = None,
+                               parallel: int = 1,
+                               max_probes: Optional[int] = None
                                ) -> None:
         """
         Takes in the parameters for __filter_range and validates them, raising
@@ -53,6 +60,9 @@ class RangeInference():
                              the position for the filtered parameter)
         :param preprocess:   function to be applied to each generated entry to
                              search
+        :param parallel:     number of entries probed concurrently
+        :param max_probes:   maximum number of entries probed, None for no
+                             limit
         """
         begin, end = limits
 
@@ -82,6 +92,15 @@ class RangeInference():
             raise ValueError("A valid preprocessing function must be " +
                              "supplied.")
 
+        if not isinstance(parallel, int) or parallel < 1:
+            raise ValueError("The number of entries probed concurrently " +
+                             "must be a positive integer.")
+
+        if max_probes is not None and (not isinstance(max_probes, int) or
+                                       max_probes < 1):
+            raise ValueError("The maximum number of probes must either be " +
+                             "None or a positive integer.")
+
 
     @staticmethod
     def __filter_range(limits: Tuple[Union[int, datetime.date],
@@ -91,7 +110,9 @@ class RangeInference():
                        mid_calc: Callable[[Any, Any], int],
                        range_gen: Generator,
                        extra_params: Optional[List[Any]] = None,
-                       preprocess: Callable[[Any, Any], Any] = lambda x: x
+                       preprocess: Callable[[Any, Any], Any] = lambda x: x,
+                       parallel: int = 1,
+                       max_probes: Optional[int] = None
                        ) -> Union[int, datetime.date]:
         """
         Does a binary search in the given range to discover which part of it
@@ -99,6 +120,11 @@ class RangeInference():
         before doing the division step. This method works for both dates and
         integers, and contains the barebones algorithm only.
 
+        The entries near the midpoint are probed from the last one, in batches
+        of parallel entries checked concurrently. Only the last hit matters,
+        so the first batch with a hit decides the step and the remaining
+        entries are not probed.
+
         :param limits:       tuple with lower and upper limits for the range to
                              be checked
         :param entry_probe:  instance of EntryProbing describing the request
@@ -117,6 +143,11 @@ class RangeInference():
                              the position for the filtered parameter)
         :param preprocess:   function to be applied to each generated entry to
                              search (identity function by default)
+        :param parallel:     number of entries probed concurrently
+        :param max_probes:   maximum number of entries probed, None for no
+                             limit. If it is reached before the search ends,
+                             the end of the part of the range not discarded
+                             yet is returned, so no entries are lost
 
         :returns: position where the last hit entry was found, None if no
                   entries were found
@@ -124,7 +155,8 @@ class RangeInference():
         # Validate inputs
         RangeInference.__range_validate_input(limits, entry_probe, step_size,
                                               mid_calc, range_gen,
-                                              extra_params, preprocess)
+                                              extra_params, preprocess,
+                                              parallel, max_probes)
 
         begin, end = limits
 
@@ -141,22 +173,53 @@ class RangeInference():
 
         param_index = extra_params.index(None)
 
-        params_instance = extra_params.copy()
-        while curr_begin < curr_end:
-            mid = mid_calc(curr_begin, curr_end)
-            # check the required number of entries before declaring a miss
-            all_miss = True
-            for i in range_gen(mid, curr_begin, curr_end):
-                params_instance[param_index] = preprocess(i)
-
-                if entry_probe.check_entry(params_instance):
-                    all_miss = False
-                    last_hit = i
-
-            if all_miss:
-                curr_end = mid - delta
-            else:
-                curr_begin = last_hit + delta
+        def check(entry):
+            params_instance = extra_params.copy()
+            params_instance[param_index] = preprocess(entry)
+            return entry_probe.check_entry(params_instance)
+
+        executor = None
+        if parallel > 1:
+            executor = concurrent.futures.ThreadPoolExecutor(parallel)
+
+        probes = 0
+        try:
+            while curr_begin < curr_end:
+                mid = mid_calc(curr_begin, curr_end)
+                # check the required number of entries before declaring a
+                # miss, starting from the last one
+                window = list(range_gen(mid, curr_begin, curr_end))
+                window.reverse()
+
+                window_hit = None
+                for start in range(0, len(window), parallel):
+                    batch = window[start:start + parallel]
+                    if max_probes is not None:
+                        if probes >= max_probes:
+                            # Out of budget, keep the part of the range which
+                            # may still have entries
+                            return curr_end
+                        batch = batch[:max_probes - probes]
+                    probes += len(batch)
+
+                    if executor is None:
+                        results = map(check, batch)
+                    else:
+                        results = executor.map(check, batch)
+
+                    hits = [i for i, hit in zip(batch, results) if hit]
+                    if len(hits) > 0:
+                        window_hit = hits[0]
+                        break
+
+                if window_hit is None:
+                    curr_end = mid - delta
+                else:
+                    last_hit = window_hit
+                    curr_begin = last_hit + delta
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
         return last_hit
 
@@ -166,7 +229,9 @@ class RangeInference():
                              end: int,
                              entry_probe: EntryProbing,
                              extra_params: Optional[List[Any]] = None,
-                             cons_misses: int = 100
+                             cons_misses: int = 100,
+                             parallel: int = 1,
+                             max_probes: Optional[int] = None
                              ) -> int:
         """
         Does the binary search over a numeric range.
@@ -180,6 +245,11 @@ class RangeInference():
                              the position for the filtered parameter)
         :param cons_misses:  number of consecutive misses needed to discard all
                              following entries
+        :param parallel:     number of entries probed concurrently
+        :param max_probes:   maximum number of entries probed in the search of
+                             each range, None for no limit (the end of the part
+                             of the range not discarded yet is returned when
+                             it is reached)
 
         :returns: position where the last hit entry was found, None if no
                   entries were found
@@ -197,7 +267,8 @@ class RangeInference():
 
 
         return RangeInference.__filter_range((begin, end), entry_probe, 1,
-                calc_mid, range_gen, extra_params)
+                calc_mid, range_gen, extra_params, parallel=parallel,
+                max_probes=max_probes)
 
 
     @staticmethod
@@ -229,7 +300,9 @@ class RangeInference():
                          detail_level: str = 'Y',
                          date_format: Optional[str] = None,
                          extra_params: Optional[List[Any]] = None,
-                         cons_misses: int = 100
+                         cons_misses: int = 100,
+                         parallel: int = 1,
+                         max_probes: Optional[int] = None
                          ) -> Union[str, datetime.date]:
         """
         Does the binary search over a date range.
@@ -247,6 +320,11 @@ class RangeInference():
                              position for the filtered parameter)
         :param cons_misses:  number of consecutive misses needed to discard all
                              following entries
+        :param parallel:     number of entries probed concurrently
+        :param max_probes:   maximum number of entries probed in the search of
+                             each range, None for no limit (the end of the part
+                             of the range not discarded yet is returned when
+                             it is reached)
 
         :returns: position where the last hit entry was found, None if no
                   entries were found
@@ -293,7 +371,8 @@ class RangeInference():
             return entry
 
         return RangeInference.__filter_range((begin, end), entry_probe,
-                time_delta, calc_mid, range_gen, extra_params, preprocess)
+                time_delta, calc_mid, range_gen, extra_params, preprocess,
+                parallel, max_probes)
 
     @staticmethod
     def filter_formatted_code(code_format: str,
@@ -305,7 +384,9 @@ class RangeInference():
                                               [List[int]], int]] = None,
                               verif_index: Optional[int] = None,
                               extra_params: Optional[List[Any]] = None,
-                              cons_misses: int = 100
+                              cons_misses: int = 100,
+                              parallel: int = 1,
+                              max_probes: Optional[int] = None
                               ) -> List[Union[Tuple[int, int],
                                               List[int]]]:
         """
@@ -333,6 +414,11 @@ class RangeInference():
                              position for the filtered parameter)
         :param cons_misses:  number of consecutive misses needed to discard all
                              following entries
+        :param parallel:     number of entries probed concurrently
+        :param max_probes:   maximum number of entries probed in the search of
+                             each range, None for no limit (the end of the part
+                             of the range not discarded yet is returned when
+                             it is reached)
 
         :returns: a copy of param_limits, but with updated end values for
                   filtered ranges
@@ -371,7 +457,7 @@ class RangeInference():
 
                 new_end = RangeInference.__filter_range((begin, end),
                             entry_probe, 1, calc_mid, range_gen, extra_params,
-                            preprocess)
+                            preprocess, parallel, max_probes)
                 new_param_limits[index] = (begin, new_end)
 
         return new_param_limits
@@ -385,7 +471,9 @@ class RangeInference():
                             origin_ids: List[int],
                             entry_probe: EntryProbing,
                             extra_params: Optional[List[Any]] = None,
-                            cons_misses: int = 100
+                            cons_misses: int = 100,
+                            parallel: int = 1,
+                            max_probes: Optional[int] = None
                             ) -> int:
         """
         Does the binary search over the sequential number section of a process
@@ -404,6 +492,11 @@ class RangeInference():
                              position for the filtered parameter)
         :param cons_misses:  number of consecutive misses needed to discard all
                              following entries
+        :param parallel:     number of entries probed concurrently
+        :param max_probes:   maximum number of entries probed in the search of
+                             each range, None for no limit (the end of the part
+                             of the range not discarded yet is returned when
+                             it is reached)
 
         :returns: the highest sequential digit found for all possible
                   combination of other parameters
@@ -445,7 +538,8 @@ class RangeInference():
 
             curr_seq = RangeInference.filter_formatted_code(updated_format,
                          [(0, SEQ_LIMIT)], [True], entry_probe, verif,
-                verif_index, extra_params, cons_misses)[0][1]
+                verif_index, extra_params, cons_misses, parallel,
+                max_probes)[0][1]
             if curr_seq is not None and curr_seq > max_seq:
                 max_seq = curr_seq
 
@@ -10,6 +10,7 @@ from binary import TabulaExtractor
 from binary import TextsExtractor
 from binary import ExcelExtractor
 from binary import Extractor
+from binary import extract_many
 import pandas as pd
 import unittest
 import csv
@@ -64,6 +65,18 @@ class TestExtractor(unittest.TestCase):
         self.assertIsInstance(Extractor(path1).extra(), TabulaExtractor)
         self.assertEqual(Extractor(path2).extra(), None)
 
+    def test_extract_many(self):
+        """
+        This method tests the batch extraction of extra contents.
+
+        """
+
+        results = extract_many([edital, cotacao, image])
+
+        self.assertIsInstance(results[edital][0], pd.DataFrame)
+        self.assertEqual(results[cotacao], None)
+        self.assertIsInstance(results[image], TypeError)
+
     # Exceptions
 
     def test_invalid_path(self):
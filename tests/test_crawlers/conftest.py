@@ -0,0 +1,9 @@
+"""
+The crawlers package is not installed, it is imported from the root of the
+repository
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                "..", "..")))
@@ -0,0 +1,247 @@
+"""
+This module tests the shared queue and seen requests of the distributed mode,
+with two workers connected to a local stand-in for Redis
+"""
+import unittest
+from unittest import mock
+
+import scrapy
+from scrapy.utils.request import RequestFingerprinter
+
+import crawling_utils
+from crawlers import distributed
+from crawlers.distributed import RedisDupeFilter, RedisScheduler
+
+
+class LocalRedis():
+    """
+    In-memory stand-in for the subset of the Redis client used by the
+    scheduler and the dupefilter
+    """
+
+    def __init__(self):
+        self.sets = {}
+        self.sorted_sets = {}
+
+    def sadd(self, key, *members):
+        members_set = self.sets.setdefault(key, set())
+        size = len(members_set)
+        members_set.update(members)
+        return len(members_set) - size
+
+    def srem(self, key, *members):
+        members_set = self.sets.get(key, set())
+        size = len(members_set)
+        members_set.difference_update(members)
+        return size - len(members_set)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def scard(self, key):
+        return len(self.sets.get(key, set()))
+
+    def srandmember(self, key, count):
+        return list(self.sets.get(key, set()))[:count]
+
+    def zadd(self, key, mapping):
+        scores = self.sorted_sets.setdefault(key, {})
+        added = len(set(mapping) - set(scores))
+        scores.update(mapping)
+        return added
+
+    def zrem(self, key, *members):
+        scores = self.sorted_sets.get(key, {})
+        return sum(scores.pop(m, None) is not None for m in members)
+
+    def zcard(self, key):
+        return len(self.sorted_sets.get(key, {}))
+
+    def zcount(self, key, minimum, maximum):
+        minimum, maximum = float(minimum), float(maximum)
+        return sum(minimum <= score <= maximum
+                   for score in self.sorted_sets.get(key, {}).values())
+
+    def zpopmin(self, key):
+        scores = self.sorted_sets.get(key, {})
+        if len(scores) == 0:
+            return []
+        member = min(scores, key=lambda m: (scores[m], m))
+        return [(member, scores.pop(member))]
+
+    def pipeline(self):
+        return LocalPipeline(self)
+
+
+class LocalPipeline():
+    """
+    Pipeline of LocalRedis: queues the commands and runs them on execute
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue_command(*args, **kwargs):
+            self.commands.append((getattr(self.server, name), args, kwargs))
+        return queue_command
+
+    def execute(self):
+        results = [command(*args, **kwargs)
+                   for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+class DistributedTest(unittest.TestCase):
+    """
+    Testing routines for the distributed scheduler and dupefilter, with two
+    workers sharing the same LocalRedis
+    """
+
+    def setUp(self):
+        """
+        Creates two workers of the same instance
+        """
+        self.server = LocalRedis()
+        distributed.set_redis(self.server)
+        self.spider = scrapy.Spider(name="test")
+        self.workers = [self.create_worker(i) for i in range(2)]
+
+    def tearDown(self):
+        """
+        Restores the connection to REDIS_URL
+        """
+        distributed.set_redis(None)
+
+    def create_worker(self, index: int,
+                      idle_timeout: float = 10) -> RedisScheduler:
+        """
+        Returns the scheduler of a worker, opened with the test spider
+        """
+        dupefilter = RedisDupeFilter(self.server, "test:seen",
+                                     RequestFingerprinter())
+        scheduler = RedisScheduler(distributed.get_redis({}), "test",
+                                   dupefilter, idle_timeout)
+        # Workers run in the same process in the tests
+        scheduler.worker_id = f"worker-{index}"
+        scheduler.open(self.spider)
+        return scheduler
+
+
+    def test_shared_queue(self):
+        """
+        Tests that requests enqueued by a worker are popped by the other, by
+        priority within a domain
+        """
+        first, second = self.workers
+
+        self.assertTrue(first.enqueue_request(
+            scrapy.Request("http://a.com/low", priority=0)))
+        self.assertTrue(first.enqueue_request(
+            scrapy.Request("http://a.com/high", priority=10)))
+        self.assertTrue(second.enqueue_request(
+            scrapy.Request("http://b.com/1")))
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 3)
+
+        popped = [second.next_request().url for _ in range(3)]
+        self.assertEqual(sorted(popped), ["http://a.com/high",
+                                          "http://a.com/low",
+                                          "http://b.com/1"])
+        self.assertLess(popped.index("http://a.com/high"),
+                        popped.index("http://a.com/low"))
+
+        self.assertIsNone(first.next_request())
+        self.assertEqual(len(first), 0)
+
+
+    def test_empty_domains_removed(self):
+        """
+        Tests that a domain leaves the set of domains once its queue is
+        emptied, and is added back by a new request
+        """
+        first, second = self.workers
+
+        first.enqueue_request(scrapy.Request("http://a.com/1"))
+        first.enqueue_request(scrapy.Request("http://b.com/1"))
+        self.assertEqual(self.server.scard("test:domains"), 2)
+
+        popped = second.next_request().url
+        self.assertEqual(self.server.scard("test:domains"), 1)
+        second.next_request()
+        self.assertEqual(self.server.scard("test:domains"), 0)
+
+        # A request enqueued by another worker while a domain was removed
+        # keeps it in the set
+        domain = crawling_utils.get_url_domain(popped)
+        self.server.zadd(f"test:queue:{domain}", {b"request": 0})
+        second.remove_domain(domain)
+        self.assertEqual(self.server.smembers("test:domains"), {domain})
+
+
+    def test_shared_dupefilter(self):
+        """
+        Tests that a request seen by a worker is filtered by the other
+        """
+        first, second = self.workers
+
+        self.assertTrue(first.enqueue_request(
+            scrapy.Request("http://a.com/1")))
+        self.assertFalse(second.enqueue_request(
+            scrapy.Request("http://a.com/1")))
+        self.assertTrue(second.enqueue_request(
+            scrapy.Request("http://a.com/2")))
+
+        # Requests not to be filtered are always enqueued
+        self.assertTrue(second.enqueue_request(
+            scrapy.Request("http://a.com/1", dont_filter=True)))
+        self.assertEqual(len(first), 3)
+
+        # Popping a request does not make it unseen
+        first.next_request()
+        self.assertFalse(second.enqueue_request(
+            scrapy.Request("http://a.com/2")))
+
+
+    @mock.patch("crawlers.distributed.time.time")
+    def test_idle_timeout(self, now):
+        """
+        Tests that the workers only finish after both were idle for the idle
+        timeout
+        """
+        now.return_value = 100
+        first, second = self.workers
+        first.touch()
+        second.touch()
+
+        # Nothing in the queue, but the workers were active recently
+        now.return_value = 105
+        self.assertTrue(first.has_pending_requests())
+        self.assertTrue(second.has_pending_requests())
+
+        # A request enqueued by a worker keeps the other one running
+        second.enqueue_request(scrapy.Request("http://a.com/1"))
+        now.return_value = 200
+        self.assertTrue(first.has_pending_requests())
+
+        # Popping it makes the first worker active again
+        first.next_request()
+        now.return_value = 205
+        self.assertTrue(second.has_pending_requests())
+
+        # Both finish once every worker was idle for the timeout
+        now.return_value = 211
+        self.assertFalse(first.has_pending_requests())
+        self.assertFalse(second.has_pending_requests())
+
+        # A closed worker no longer keeps the others running
+        now.return_value = 300
+        first.touch()
+        first.close("finished")
+        self.assertFalse(second.has_pending_requests())
+
+
+if __name__ == '__main__':
+    unittest.main()
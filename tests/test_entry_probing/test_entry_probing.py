@@ -8,9 +8,10 @@ import unittest
 from unittest import mock
 
 from entry_probing import EntryProbing, HTTPProbingRequest,\
-    PyppeteerProbingRequest, HTTPStatusProbingResponse,\
+    AsyncHTTPProbingRequest, PyppeteerProbingRequest, HTTPStatusProbingResponse,\
     TextMatchProbingResponse,\
-    BinaryFormatProbingResponse, ResponseData
+    BinaryFormatProbingResponse, ResponseData, MemoryProbeCache
+from entry_probing.entry_probing_response import BODY_NONE, BODY_STREAM
 
 # helper function to create a mock of a Pyppeteer.page.Page entry
 from test_entry_probing_request import create_mock_pyp_page
@@ -30,7 +31,8 @@ class EntryProbingTest(unittest.TestCase):
 
         return mock.Mock(headers={'Content-Type': 'text/html'},
                          text="entry found",
-                         status_code=200)
+                         status_code=200, encoding=None,
+                         iter_content=lambda *_: iter([b"entry ", b"found"]))
 
 
     def response_404(*_, **__) -> mock.Mock:
@@ -41,7 +43,8 @@ class EntryProbingTest(unittest.TestCase):
 
         return mock.Mock(headers={'Content-Type': 'text/html'},
                          text="entry not found",
-                         status_code=404)
+                         status_code=404, encoding=None,
+                         iter_content=lambda *_: iter([b"entry not found"]))
 
 
     def response_binary(*_, **__) -> mock.Mock:
@@ -355,6 +358,219 @@ class EntryProbingTest(unittest.TestCase):
         self.assertTrue(isinstance(probe.response, ResponseData))
 
 
+    def test_probing_check_response(self):
+        """
+        Tests the validation of responses obtained outside of the request
+        handler, such as the ones received by a Scrapy spider
+        """
+
+        probe = EntryProbing(HTTPProbingRequest("http://test.com/",
+                                                method="GET"))
+        probe.add_response_handler(HTTPStatusProbingResponse(200))\
+             .add_response_handler(TextMatchProbingResponse("entry found"))
+
+        found = ResponseData(headers={'Content-Type': 'text/html'},
+                             status_code=200, text="The entry found")
+        self.assertTrue(probe.check_response(found))
+        self.assertEqual(probe.response, found)
+
+        not_found = ResponseData(headers={'Content-Type': 'text/html'},
+                                 status_code=404, text="Not found")
+        self.assertFalse(probe.check_response(not_found))
+        self.assertEqual(probe.response, not_found)
+
+
+    def test_probing_check_entries(self):
+        """
+        Tests the checking of many entries at once, with both synchronous and
+        asynchronous request handlers
+        """
+
+        def response(url, *_, **__):
+            if url.endswith("/404"):
+                return self.response_404()
+            return self.response_200()
+
+        # Synchronous handler, entries are checked one at a time
+        HTTPProbingRequest.REQUEST_METHODS["GET"] = response
+        probe = EntryProbing(HTTPProbingRequest("http://test.com/{}",
+                                                method="GET"))
+        probe.add_response_handler(HTTPStatusProbingResponse(200))
+        self.assertEqual(probe.check_entries([[1], [404], [2]]),
+                         [True, False, True])
+        self.assertEqual(probe.response.status_code, 200)
+
+        # Asynchronous handler, requests are awaited concurrently
+        async def process(url_entries=[], req_entries={}, body=None):
+            status = 404 if url_entries == [404] else 200
+            return ResponseData(headers={'Content-Type': 'text/html'},
+                                status_code=status, text="entry found")
+
+        request = AsyncHTTPProbingRequest("http://test.com/{}", "GET")
+        with mock.patch.object(request, "process", side_effect=process):
+            probe = EntryProbing(request)
+            probe.add_response_handler(HTTPStatusProbingResponse(200))\
+                 .add_response_handler(TextMatchProbingResponse("found"))
+
+            self.assertEqual(probe.check_entries([[1], [404], [2]]),
+                             [True, False, True])
+            self.assertEqual(probe.check_entries([]), [])
+
+            # The sync wrapper is used by check_entry
+            self.assertTrue(probe.check_entry([1]))
+            self.assertFalse(probe.check_entry([404]))
+            self.assertEqual(probe.response.status_code, 404)
+
+            # Coroutine version, in another event loop
+            result = self.loop.run_until_complete(
+                probe.async_check_entries([[404], [3]]))
+            self.assertEqual(result, [False, True])
+        probe.close()
+
+
+    def test_probing_body_reading(self):
+        """
+        Tests that the body is only read as far as the response handlers need
+        it, and that the checks stop at the first failing handler
+        """
+
+        chunks_read = []
+
+        def chunks(*_):
+            for chunk in [b"entry", b" found", b" and more", b" text"]:
+                chunks_read.append(chunk)
+                yield chunk
+
+        get_mock = mock.Mock(side_effect=lambda *_, **__: mock.Mock(
+            headers={'Content-Type': 'text/html'}, status_code=200,
+            encoding=None, iter_content=chunks))
+        HTTPProbingRequest.REQUEST_METHODS["GET"] = get_mock
+
+        # Only the status is checked, the body is not downloaded
+        probe = EntryProbing(HTTPProbingRequest("http://test.com/",
+                                                method="GET"))
+        probe.add_response_handler(HTTPStatusProbingResponse(200))
+        self.assertEqual(probe.body_mode, BODY_NONE)
+        self.assertTrue(probe.check_entry())
+        self.assertEqual(get_mock.call_args[1], {'data': None,
+                                                 'stream': True})
+        self.assertEqual(chunks_read, [])
+
+        # The body is streamed until the text is found
+        probe.add_response_handler(TextMatchProbingResponse("entry found"))
+        self.assertEqual(probe.body_mode, BODY_STREAM)
+        self.assertTrue(probe.check_entry())
+        self.assertEqual(chunks_read, [b"entry", b" found"])
+
+        # The text is not found, the whole body is read
+        chunks_read.clear()
+        probe = EntryProbing(HTTPProbingRequest("http://test.com/",
+                                                method="GET"))
+        probe.add_response_handler(TextMatchProbingResponse("missing"))
+        self.assertFalse(probe.check_entry())
+        self.assertEqual(len(chunks_read), 4)
+
+        # A failing status check skips the body handlers
+        chunks_read.clear()
+        body_handler = TextMatchProbingResponse("entry found")
+        probe = EntryProbing(HTTPProbingRequest("http://test.com/",
+                                                method="GET"))
+        probe.add_response_handler(body_handler)\
+             .add_response_handler(HTTPStatusProbingResponse(404))
+        with mock.patch.object(body_handler, "process") as process:
+            self.assertFalse(probe.check_entry())
+            self.assertFalse(process.called)
+        self.assertEqual(chunks_read, [])
+
+        # Handlers are not called after the first failure
+        second = HTTPStatusProbingResponse(200)
+        probe = EntryProbing(HTTPProbingRequest("http://test.com/",
+                                                method="GET"))
+        probe.add_response_handler(HTTPStatusProbingResponse(404))\
+             .add_response_handler(second)
+        with mock.patch.object(second, "process") as process:
+            self.assertFalse(probe.check_entry())
+            self.assertFalse(process.called)
+
+
+    def test_probing_cache(self):
+        """
+        Tests that entries found in the cache of the probe are not requested
+        again, with both synchronous and asynchronous request handlers
+        """
+
+        def response(url, *_, **__):
+            if url.endswith("/404"):
+                return self.response_404()
+            return self.response_200()
+
+        # Synchronous handler
+        get_mock = mock.Mock(side_effect=response)
+        HTTPProbingRequest.REQUEST_METHODS["GET"] = get_mock
+        cache = MemoryProbeCache()
+        probe = EntryProbing(HTTPProbingRequest("http://test.com/{}",
+                                                method="GET"), cache)
+        probe.add_response_handler(HTTPStatusProbingResponse(200))
+        self.assertIs(probe.cache, cache)
+
+        self.assertIsNone(probe.cached_result([1]))
+        self.assertTrue(probe.check_entry([1]))
+        self.assertFalse(probe.check_entry([404]))
+        self.assertEqual(get_mock.call_count, 2)
+
+        self.assertEqual(probe.check_entries([[1], [404], [2]]),
+                         [True, False, True])
+        self.assertEqual(get_mock.call_count, 3)
+        self.assertTrue(probe.cached_result([2]))
+        self.assertFalse(probe.cached_result([404]))
+
+        # Results of responses obtained elsewhere are cached with their
+        # entries
+        found = ResponseData(headers={'Content-Type': 'text/html'},
+                             status_code=200, text="")
+        self.assertTrue(probe.check_response(found, [3]))
+        self.assertTrue(probe.cached_result([3]))
+        self.assertTrue(probe.check_response(found))
+        self.assertIsNone(probe.cached_result([4]))
+
+        # Server errors are transient, their verdicts are not cached
+        error = ResponseData(headers={'Content-Type': 'text/html'},
+                             status_code=503, text="")
+        self.assertFalse(probe.check_response(error, [6]))
+        self.assertIsNone(probe.cached_result([6]))
+
+        # Asynchronous handler, only the entries missing from the cache are
+        # requested
+        requested = []
+
+        async def process(url_entries=[], req_entries={}, body=None):
+            requested.append(url_entries)
+            status = 404 if url_entries == [404] else 200
+            return ResponseData(headers={'Content-Type': 'text/html'},
+                                status_code=status, text="")
+
+        request = AsyncHTTPProbingRequest("http://test.com/{}", "GET")
+        with mock.patch.object(request, "process", side_effect=process):
+            probe = EntryProbing(request, cache)
+            probe.add_response_handler(HTTPStatusProbingResponse(200))
+
+            self.assertEqual(probe.check_entries([[1], [404], [5]]),
+                             [True, False, True])
+            self.assertEqual(requested, [[5]])
+            self.assertTrue(probe.check_entry([5]))
+            self.assertEqual(requested, [[5]])
+        probe.close()
+
+        # Without a cache every entry is requested
+        probe = EntryProbing(HTTPProbingRequest("http://test.com/{}",
+                                                method="GET"))
+        self.assertIsNone(probe.cache)
+        probe.check_entry([1])
+        probe.check_entry([1])
+        self.assertIsNone(probe.cached_result([1]))
+        self.assertEqual(get_mock.call_count, 5)
+
+
     def test_probing_param_errors(self):
         """
         Tests the passing of invalid parameters to the probing methods
@@ -368,6 +584,11 @@ class EntryProbingTest(unittest.TestCase):
                                                 method="GET"))
         self.assertRaises(TypeError, probe.add_response_handler, [1])
 
+        # invalid cache
+        self.assertRaises(TypeError, EntryProbing,
+                          HTTPProbingRequest("http://test.com/", method="GET"),
+                          {})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -9,7 +9,8 @@ import pyppeteer
 import requests.exceptions
 import urllib3.exceptions
 
-from entry_probing import HTTPProbingRequest, PyppeteerProbingRequest
+from entry_probing import HTTPProbingRequest, AsyncHTTPProbingRequest,\
+    PyppeteerProbingRequest
 
 
 # Helper functions
@@ -187,6 +188,59 @@ class ProbingRequestTest(unittest.TestCase):
         self.assertEqual(list(post_mock.call_args), expected)
 
 
+    def test_succesful_req_async_http(self):
+        """
+        Tests if the correct asynchronous HTTP requests are sent to the
+        specified URLs with the expected parameters, both from synchronous
+        code and from another event loop
+        """
+
+        # The awaitables of the session return these values (mock.AsyncMock
+        # is not available in Python 3.7)
+        def async_mock(value=None):
+            async def return_value(*_, **__):
+                return value
+            return mock.Mock(side_effect=return_value)
+
+        # Replaces the aiohttp session used by the AsyncHTTPProbingRequest
+        mock_response = mock.Mock(headers={'Content-Type': 'text/html'},
+                                  status=200)
+        mock_response.text = async_mock("test content")
+        session = mock.MagicMock()
+        session.request = async_mock(mock_response)
+        session.close = async_mock()
+
+        with mock.patch("aiohttp.ClientSession", return_value=session), \
+             mock.patch("aiohttp.TCPConnector"):
+            # GET request with a parameter in the URL
+            probe = AsyncHTTPProbingRequest("http://test.com/{}", "GET")
+            result = probe.run(probe.process([10]))
+            expected = [("GET", "http://test.com/10"), {'data': None}]
+            self.assertEqual(list(session.request.call_args), expected)
+            self.assertEqual(result.status_code, 200)
+            self.assertEqual(result.text, "test content")
+
+            # POST request with parameters in the URL and in the request body,
+            # awaited from another event loop
+            probe = AsyncHTTPProbingRequest("http://test.com/{}/{}", "POST",
+                                            {'extra1': 0})
+            self.loop.run_until_complete(probe.process([1, 2],
+                                                       {'test1': 10}))
+            expected = [("POST", "http://test.com/1/2"),
+                        {'data': {'extra1': 0, 'test1': 10}}]
+            self.assertEqual(list(session.request.call_args), expected)
+
+            # The entries of a request are not kept in the following ones
+            probe.run(probe.process())
+            expected = [("POST", "http://test.com/{}/{}"),
+                        {'data': {'extra1': 0}}]
+            self.assertEqual(list(session.request.call_args), expected)
+
+            # The session is shared by the requests and closed with the probe
+            probe.close()
+            self.assertTrue(session.close.called)
+
+
     def test_succesful_req_pyp(self):
         """
         Tests valid requests with Pyppeteer
@@ -238,6 +292,25 @@ class ProbingRequestTest(unittest.TestCase):
                           "http://nonexistenturl/", "POST", [])
 
 
+    def test_invalid_req_async_http(self):
+        """
+        Tests invalid asynchronous HTTP requests
+        """
+
+        # Unsupported HTTP method
+        self.assertRaises(ValueError, AsyncHTTPProbingRequest,
+                          "nonexistenturl/", "OPTIONS")
+
+        # Invalid request body
+        self.assertRaises(TypeError, AsyncHTTPProbingRequest,
+                          "http://nonexistenturl/", "POST", [])
+
+        # aiohttp not installed
+        with mock.patch("entry_probing.entry_probing_request.aiohttp", None):
+            self.assertRaises(ValueError, AsyncHTTPProbingRequest,
+                              "http://test.com/", "GET")
+
+
     def test_invalid_req_pyp(self):
         """
         Tests invalid requests with Pyppeteer
@@ -7,6 +7,7 @@ from unittest import mock
 
 from entry_probing import HTTPStatusProbingResponse, TextMatchProbingResponse,\
     BinaryFormatProbingResponse, ResponseData
+from entry_probing.entry_probing_response import BODY_NONE, BODY_STREAM
 
 
 class ProbingResponseTest(unittest.TestCase):
@@ -68,6 +69,42 @@ class ProbingResponseTest(unittest.TestCase):
         self.assertFalse(resp_handler.process(text_not_found))
 
 
+    def test_text_match_patterns(self):
+        """
+        Tests the text-matching response handler with many strings and with
+        regular expressions
+        """
+
+        text_found = mock.MagicMock(spec=ResponseData,
+                                    text="Page found in our database")
+        text_not_found = mock.MagicMock(spec=ResponseData,
+                                        text="Sorry, page not found")
+
+        # Any of the strings must be present
+        resp_handler = TextMatchProbingResponse(["no results", "IN OUR"])
+        self.assertTrue(resp_handler.process(text_found))
+        self.assertFalse(resp_handler.process(text_not_found))
+
+        # Regular expressions, compiled into a single pattern
+        resp_handler = TextMatchProbingResponse([r"page\s+FOUND", r"^x"],
+                                                regex=True)
+        self.assertTrue(resp_handler.process(text_found))
+        self.assertFalse(resp_handler.process(text_not_found))
+        self.assertIsNone(resp_handler.scanner())
+
+        # Special characters of strings are not interpreted
+        resp_handler = TextMatchProbingResponse("page.found")
+        self.assertFalse(resp_handler.process(text_found))
+
+        # Matches between the windows in which the text is searched
+        text = "a" * 50 + "Page Found" + "b" * 50
+        long_text = mock.MagicMock(spec=ResponseData, text=text)
+        resp_handler = TextMatchProbingResponse(["page found", "zzz"])
+        for size in range(1, 12):
+            resp_handler.WINDOW_SIZE = size
+            self.assertTrue(resp_handler.process(long_text))
+
+
 
     def test_binary_format(self):
         """
@@ -95,6 +132,106 @@ class ProbingResponseTest(unittest.TestCase):
         self.assertFalse(resp_handler.process(binary_resp))
 
 
+    def test_create_from_scrapy(self):
+        """
+        Tests the conversion of a Scrapy response into a ResponseData
+        """
+
+        # Mock of a scrapy.http.Response, which stores headers as bytes
+        text_resp = mock.Mock(status=200, text="Entry found",
+                              headers={b'Content-Type': [b'text/html']})
+        response = ResponseData.create_from_scrapy(text_resp)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "Entry found")
+        self.assertEqual(response.headers['content-type'], 'text/html')
+
+        # The body of binary responses is not decoded
+        binary_resp = mock.Mock(status=200, text="%PDF",
+                                headers={b'Content-Type': [b'application/pdf']})
+        response = ResponseData.create_from_scrapy(binary_resp)
+        self.assertEqual(response.text, "")
+        self.assertTrue(BinaryFormatProbingResponse().process(response))
+
+
+    def test_text_match_scanner(self):
+        """
+        Tests the incremental search of the text match response handler
+        """
+
+        resp_handler = TextMatchProbingResponse("Entry Found")
+        self.assertTrue(resp_handler.needs_body)
+        self.assertFalse(HTTPStatusProbingResponse(200).needs_body)
+        self.assertFalse(BinaryFormatProbingResponse().needs_body)
+        self.assertIsNone(HTTPStatusProbingResponse(200).scanner())
+
+        # Match split between chunks, found case insensitively
+        scanner = resp_handler.scanner()
+        self.assertFalse(scanner.feed("The ent"))
+        self.assertFalse(scanner.feed("R"))
+        self.assertTrue(scanner.feed("y found here"))
+        self.assertTrue(scanner.valid)
+
+        # Text not found in any chunk
+        scanner = resp_handler.scanner()
+        for chunk in ["entry", " not", " found"]:
+            self.assertFalse(scanner.feed(chunk))
+        self.assertFalse(scanner.valid)
+
+        # The opposite flag is applied to the result of the scanner
+        self.assertFalse(TextMatchProbingResponse("entry found",
+                                                  opposite=True).result(True))
+
+
+    def test_create_from_requests_streamed(self):
+        """
+        Tests the creation of a ResponseData from a requests response,
+        reading the body as needed
+        """
+
+        def requests_resp():
+            return mock.Mock(status_code=200, text="Entry found",
+                             encoding="utf-8",
+                             headers={'Content-Type': 'text/html'},
+                             iter_content=lambda *_: iter([b"Entry \xc3",
+                                                           b"\xa9 found"]))
+
+        # The whole body is read
+        response = ResponseData.create_from_requests(requests_resp())
+        self.assertFalse(response.streamed)
+        self.assertEqual(response.text, "Entry found")
+
+        # The body is not needed, the connection is dropped
+        resp = requests_resp()
+        response = ResponseData.create_from_requests(resp, BODY_NONE)
+        self.assertEqual(response.text, "")
+        self.assertTrue(resp.close.called)
+
+        # Small unneeded bodies are read before closing, keeping the
+        # connection alive
+        resp = requests_resp()
+        resp.headers['Content-Length'] = '11'
+        content = mock.PropertyMock(return_value=b"Entry found")
+        type(resp).content = content
+        ResponseData.create_from_requests(resp, BODY_NONE)
+        self.assertTrue(content.called)
+        self.assertTrue(resp.close.called)
+
+        # The body is read in chunks, decoding characters split between them
+        resp = requests_resp()
+        response = ResponseData.create_from_requests(resp, BODY_STREAM)
+        self.assertTrue(response.streamed)
+        self.assertFalse(resp.close.called)
+        self.assertEqual(list(response.iter_text()), ["Entry ", "\u00e9 found"])
+        response.close()
+        self.assertTrue(resp.close.called)
+
+        # The rest of a streamed body is read when its text is requested
+        response = ResponseData.create_from_requests(requests_resp(),
+                                                     BODY_STREAM)
+        self.assertEqual(response.text, "Entry \u00e9 found")
+        self.assertFalse(response.streamed)
+
+
     def test_invalid_params(self):
         """
         Tests the handling of invalid parameters
@@ -105,6 +242,8 @@ class ProbingResponseTest(unittest.TestCase):
 
         # No text to match supplied
         self.assertRaises(TypeError, TextMatchProbingResponse)
+        self.assertRaises(TypeError, TextMatchProbingResponse, [])
+        self.assertRaises(TypeError, TextMatchProbingResponse, ["a", 1])
 
         # No status code supplied
         self.assertRaises(TypeError, HTTPStatusProbingResponse)
@@ -0,0 +1,171 @@
+"""
+This module tests the caches of probing results
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from entry_probing import MemoryProbeCache, DiskProbeCache
+from entry_probing.probe_cache import request_key
+
+
+class ProbeCacheTest(unittest.TestCase):
+    """
+    Testing routines for the caches of probing results, run with both the
+    memory and the disk caches
+    """
+
+    def setUp(self):
+        """
+        Creates a folder for the disk caches
+        """
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Removes the folder of the disk caches
+        """
+        self.folder.cleanup()
+
+    def create_caches(self, max_size: int = 100, ttl: float = None) -> list:
+        """
+        Returns a memory and a disk cache with the given parameters
+        """
+        path = os.path.join(self.folder.name,
+                            f"cache_{max_size}_{ttl}.sqlite3")
+        return [MemoryProbeCache(max_size, ttl),
+                DiskProbeCache(path, max_size, ttl)]
+
+
+    def test_request_key(self):
+        """
+        Tests the keys of the requests
+        """
+
+        self.assertEqual(request_key("get", "http://test.com/1"),
+                         request_key("GET", "http://test.com/1", {}))
+        self.assertEqual(request_key("POST", "http://test.com", {'a': 1,
+                                                                 'b': 2}),
+                         request_key("POST", "http://test.com", {'b': 2,
+                                                                 'a': 1}))
+        self.assertNotEqual(request_key("GET", "http://test.com/1"),
+                            request_key("GET", "http://test.com/2"))
+        self.assertNotEqual(request_key("POST", "http://test.com", {'a': 1}),
+                            request_key("POST", "http://test.com", {'a': 2}))
+
+
+    def test_hits_and_misses(self):
+        """
+        Tests the storage of the verdicts and the counters of the caches
+        """
+
+        for cache in self.create_caches():
+            self.assertIsNone(cache.get("a"))
+            cache.put("a", True)
+            cache.put("b", False)
+            self.assertTrue(cache.get("a"))
+            self.assertFalse(cache.get("b"))
+            self.assertIsNone(cache.get("c"))
+            self.assertEqual(cache.stats, {"hits": 2, "misses": 2,
+                                           "size": 2})
+
+            # A verdict is replaced when put again
+            cache.put("a", False)
+            self.assertFalse(cache.get("a"))
+            self.assertEqual(len(cache), 2)
+            cache.close()
+
+
+    def test_lru_eviction(self):
+        """
+        Tests that the least recently used verdicts are evicted
+        """
+
+        for cache in self.create_caches(max_size=2):
+            with mock.patch("entry_probing.probe_cache.time.time") as now:
+                now.return_value = 1
+                cache.put("a", True)
+                now.return_value = 2
+                cache.put("b", True)
+
+                # "a" is used, so "b" is evicted by "c"
+                now.return_value = 3
+                self.assertTrue(cache.get("a"))
+                now.return_value = 4
+                cache.put("c", False)
+
+            self.assertEqual(len(cache), 2)
+            self.assertTrue(cache.get("a"))
+            self.assertIsNone(cache.get("b"))
+            self.assertFalse(cache.get("c"))
+            cache.close()
+
+
+    def test_ttl(self):
+        """
+        Tests the expiration of the verdicts
+        """
+
+        for cache in self.create_caches(ttl=10):
+            with mock.patch("entry_probing.probe_cache.time.time") as now:
+                now.return_value = 100
+                cache.put("a", True)
+
+                now.return_value = 110
+                self.assertTrue(cache.get("a"))
+
+                now.return_value = 111
+                self.assertIsNone(cache.get("a"))
+                self.assertEqual(len(cache), 0)
+            cache.close()
+
+
+    def test_disk_persistence(self):
+        """
+        Tests that the verdicts of the disk cache are kept between runs
+        """
+
+        path = os.path.join(self.folder.name, "cache.sqlite3")
+        cache = DiskProbeCache(path)
+        cache.put("a", True)
+        cache.close()
+
+        cache = DiskProbeCache(path)
+        self.assertTrue(cache.get("a"))
+        cache.close()
+
+
+    def test_disk_eviction_after_reopening(self):
+        """
+        Tests that the disk cache counts the verdicts stored by previous runs
+        when evicting
+        """
+
+        path = os.path.join(self.folder.name, "cache.sqlite3")
+        cache = DiskProbeCache(path, max_size=3)
+        for key in "abc":
+            cache.put(key, True)
+        cache.close()
+
+        cache = DiskProbeCache(path, max_size=3)
+        # Replacing a verdict doesn't add to the count
+        cache.put("c", False)
+        self.assertEqual(len(cache), 3)
+        cache.put("d", True)
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get("a"))
+        self.assertFalse(cache.get("c"))
+        cache.close()
+
+
+    def test_invalid_params(self):
+        """
+        Tests the handling of invalid parameters
+        """
+
+        self.assertRaises(ValueError, MemoryProbeCache, max_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -223,6 +223,86 @@ class RangeInferenceTest(unittest.TestCase):
                           10, entry_probe, None, -1)
 
 
+    def test_numeric_parallel_probing(self):
+        """
+        Tests that probing the entries near the midpoints concurrently gives
+        the same results, and stops once the outcome of each window is known
+        """
+
+        cases = [(0, 50, 10), (25, 48, 10), (0, -1, 10), (0, 123, 10),
+                 (5, 5, 10), (0, 0, 7), (90, 95, 50)]
+        for first, last, cons_misses in cases:
+            entry_probe = RangeInferenceTest.dummy_entry_probe(first, last)
+            expected = RangeInference.filter_numeric_range(0, 200,
+                           entry_probe, cons_misses=cons_misses)
+            for parallel in [2, 3, 10, 64]:
+                result = RangeInference.filter_numeric_range(0, 200,
+                             entry_probe, cons_misses=cons_misses,
+                             parallel=parallel)
+                self.assertEqual(result, expected)
+
+        # The window is probed from its end, and the first hit found decides
+        # the step: only the last entry of each window with hits is probed
+        probed = []
+
+        def check(x):
+            probed.append(x[0])
+            return x[0] <= 50
+
+        entry_probe = mock.Mock(spec=EntryProbing, check_entry=check)
+        result = RangeInference.filter_numeric_range(0, 200, entry_probe,
+                                                     cons_misses=10)
+        self.assertEqual(result, 50)
+        self.assertEqual(probed[:2], [109, 108])
+        self.assertIn(50, probed)
+        self.assertNotIn(49, probed)
+
+
+    def test_numeric_probe_budget(self):
+        """
+        Tests the limit on the number of entries probed
+        """
+
+        probed = []
+
+        def check(x):
+            probed.append(x[0])
+            return x[0] <= 50
+
+        entry_probe = mock.Mock(spec=EntryProbing, check_entry=check)
+
+        # The search ends within the budget
+        result = RangeInference.filter_numeric_range(0, 200, entry_probe,
+                                                     cons_misses=10,
+                                                     max_probes=1000)
+        self.assertEqual(result, 50)
+
+        # Out of budget, the part of the range which may have entries is kept
+        for parallel in [1, 4]:
+            probed.clear()
+            result = RangeInference.filter_numeric_range(0, 200, entry_probe,
+                                                         cons_misses=10,
+                                                         parallel=parallel,
+                                                         max_probes=15)
+            self.assertEqual(len(probed), 15)
+            self.assertGreaterEqual(result, 50)
+            self.assertLessEqual(result, 200)
+
+
+    def test_numeric_error_parallel(self):
+        """
+        Tests the errors when the concurrency or the probe budget are invalid
+        """
+        entry_probe = RangeInferenceTest.dummy_entry_probe(0, 50)
+
+        self.assertRaises(ValueError, RangeInference.filter_numeric_range, 0,
+                          10, entry_probe, parallel=0)
+        self.assertRaises(ValueError, RangeInference.filter_numeric_range, 0,
+                          10, entry_probe, parallel=None)
+        self.assertRaises(ValueError, RangeInference.filter_numeric_range, 0,
+                          10, entry_probe, max_probes=0)
+
+
     # DATE RANGE
 
 
@@ -597,6 +677,12 @@ class RangeInferenceTest(unittest.TestCase):
                               segment_ids, court_ids, origin_ids, entry_probe)
         self.assertEqual(result, LAST_VAL)
 
+        # Probing the entries concurrently
+        result = RangeInference.filter_process_code(first_year, last_year,
+                              segment_ids, court_ids, origin_ids, entry_probe,
+                              parallel=8)
+        self.assertEqual(result, LAST_VAL)
+
 
 if __name__ == '__main__':
     unittest.main()